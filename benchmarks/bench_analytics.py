@@ -0,0 +1,125 @@
+"""
+Benchmark for the usage analytics log.
+
+Reports:
+
+    record   event loop time per handled command: AnalyticsSink.record()
+             against one synchronous SQLite insert per interaction
+    flush    events per second written in batches by the worker thread,
+             and the longest the event loop went without running while
+             --events were recorded and flushed in the background
+    usage    one /usage query answered from the daily rollups against the
+             same answer computed by scanning the raw events
+
+Run from the repository root:
+    python -m benchmarks.bench_analytics
+    python -m benchmarks.bench_analytics --events 1000000 --guilds 5000
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from src.bot.analytics import DAY, AnalyticsSink, AnalyticsStore, UsageEvent
+
+COMMANDS = [f"command{i}" for i in range(30)]
+DAYS = 30
+SYNC_INSERTS = 5_000
+
+def make_events(rng, count, guilds, now):
+    return [
+        UsageEvent(now - rng.random() * DAYS * DAY, rng.choice(COMMANDS), rng.randrange(1, guilds + 1), 0)
+        for _ in range(count)
+    ]
+
+def sync_insert_ns(path, events):
+    # The naive sink: one committed insert per interaction, on the event loop
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE events (timestamp REAL, command TEXT, guild_id INTEGER, outcome INTEGER)")
+    start = time.perf_counter()
+    for event in events:
+        conn.execute("INSERT INTO events VALUES (?, ?, ?, ?)",
+                     (event.timestamp, event.command, event.guild_id, event.outcome))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed / len(events) * 1e9
+
+async def run_sink(store, events, batch_size):
+    sink = AnalyticsSink(store, batch_size=batch_size, flush_interval=0.05, max_pending=len(events))
+    sink.start()
+    stall = 0.0
+    start = time.perf_counter()
+    record_time = 0.0
+    # Record in bursts, yielding to the loop in between as command handlers would
+    for i in range(0, len(events), 1000):
+        tick = time.perf_counter()
+        for event in events[i:i + 1000]:
+            sink.record(event.command, event.guild_id)
+        record_time += time.perf_counter() - tick
+        tick = time.perf_counter()
+        await asyncio.sleep(0)
+        stall = max(stall, time.perf_counter() - tick)
+    while sink.pending:
+        tick = time.perf_counter()
+        await asyncio.sleep(0.001)
+        stall = max(stall, time.perf_counter() - tick - 0.001)
+    await sink.close()
+    elapsed = time.perf_counter() - start
+    return record_time / len(events) * 1e9, len(events) / elapsed, stall * 1000, sink.dropped
+
+def time_ms(function, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the usage analytics log")
+    parser.add_argument("--events", type=int, default=200_000, help="events recorded and written")
+    parser.add_argument("--guilds", type=int, default=1_000, help="distinct guilds in the events")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    now = time.time()
+    events = make_events(rng, args.events, args.guilds, now)
+    with tempfile.TemporaryDirectory() as directory:
+        naive_ns = sync_insert_ns(str(Path(directory) / "naive.db"), events[:SYNC_INSERTS])
+
+        # The sink stamps events with the real clock
+        store = AnalyticsStore(Path(directory) / "analytics.db")
+        record_ns, throughput, stall_ms, dropped = asyncio.run(run_sink(store, events, args.batch_size))
+        print(f"record: {record_ns:7.0f} ns per event (synchronous insert: {naive_ns:7.0f} ns)")
+        print(f"flush:  {throughput:9.0f} events/s, longest loop stall {stall_ms:.1f} ms, {dropped} dropped")
+
+        # Rewrite the events with their spread timestamps for the query comparison
+        store = AnalyticsStore(Path(directory) / "spread.db")
+        for i in range(0, len(events), args.batch_size):
+            store.write(events[i:i + args.batch_size])
+        since_day = int(now // DAY) - 6
+        guild_id = rng.randrange(1, args.guilds + 1)
+        rollup_ms = time_ms(lambda: store.usage(since_day, guild_id))
+        conn = store._connection()
+        raw_ms = time_ms(lambda: conn.execute(
+            "SELECT command, COUNT(*) FROM events WHERE timestamp >= ? AND guild_id = ? "
+            "GROUP BY command ORDER BY COUNT(*) DESC LIMIT 15",
+            (since_day * DAY, guild_id),
+        ).fetchall())
+        rollup_all_ms = time_ms(lambda: store.usage(since_day))
+        raw_all_ms = time_ms(lambda: conn.execute(
+            "SELECT command, COUNT(*) FROM events WHERE timestamp >= ? GROUP BY command ORDER BY COUNT(*) DESC LIMIT 15",
+            (since_day * DAY,),
+        ).fetchall())
+        print(f"usage:  one server {rollup_ms:6.2f} ms (raw scan {raw_ms:7.2f} ms), "
+              f"all servers {rollup_all_ms:6.2f} ms (raw scan {raw_all_ms:7.2f} ms)")
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark for /doc autocomplete.
+
+Builds a topic index over thousands of synthetic docs entries and links and
+measures suggestion latency for the partial input a user types keystroke by
+keystroke.
+
+Run from the repository root:
+    python -m benchmarks.bench_autocomplete
+"""
+import random
+import statistics
+import time
+
+from src.bot.autocomplete import TopicIndex
+
+ENTRIES = 5_000
+WORDS = (
+    "trmnl device plugin battery display eink wifi firmware screen refresh "
+    "framework design system developer byod byos server api webhook token "
+    "calendar weather news update batch ship order privacy terms support"
+).split()
+
+def synthetic_docs(entries, rng):
+    docs = {}
+    for i in range(entries):
+        docs[f"page-{i}"] = {
+            "title": " ".join(rng.choices(WORDS, k=3)).title(),
+            "content": "",
+            "links": {f"{rng.choice(WORDS).title()} Guide {i}": f"https://docs.usetrmnl.com/page/{i}"},
+        }
+    return {"categories": {}, "docs": docs}
+
+def measure(index, inputs):
+    timings = []
+    for text in inputs:
+        start = time.perf_counter()
+        index.suggest(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99)]
+
+def main():
+    rng = random.Random(42)
+    docs = synthetic_docs(ENTRIES, rng)
+
+    start = time.perf_counter()
+    index = TopicIndex.build(docs)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"build: {len(index.topics):,} topics in {build_ms:.0f} ms")
+
+    # Every prefix of a sample of real names, as typed
+    names = rng.sample([topic.name for topic in index.topics], 500)
+    prefixes = [name[:end] for name in names for end in range(1, len(name) + 1)]
+    p50, p99 = measure(index, prefixes)
+    print(f"prefix: {len(prefixes):,} inputs, p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+    # Misspelled input that only the fuzzy fallback can answer
+    typos = [name[:3] + "x" + name[4:12] for name in names[:100]]
+    p50, p99 = measure(index, typos)
+    print(f"fuzzy: {len(typos):,} inputs, p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark for loading docs from the compiled snapshot.
+
+Builds a synthetic docs.json with N entries (each with a link) and a
+content store with a crawled page per link, then prepares the docs the
+way the bot does on a restart with unchanged files:
+
+    json      the previous path: parse and validate docs.json, parse the
+              content store and the JSON search index cache
+    snapshot  load_prepared_docs(): hash both files and memory-map the
+              snapshot compiled from them
+
+Both then build the same embeds and autocomplete index, and serve the
+same page lookups and searches. Each runs in a fresh process and reports
+load time, lookup and search latency, and resident memory growth.
+
+Run from the repository root:
+    python -m benchmarks.bench_docs_snapshot
+    python -m benchmarks.bench_docs_snapshot --entries 50000
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_gateway_memory import rss_bytes
+from benchmarks.bench_search import words
+from src.bot import trmnl as trmnl_module
+from src.bot.autocomplete import TopicIndex
+from src.bot.docs_loader import load_docs
+from src.bot.ingest import STORE_VERSION, ContentStore
+from src.bot.search import DocsIndex
+
+LOOKUPS = 1_000
+QUERIES = 200
+
+def write_site(tmp, entries):
+    rng = random.Random(42)
+    docs, pages = {}, {}
+    for i in range(entries):
+        url = f"https://docs.usetrmnl.com/page/{i}"
+        docs[f"page-{i}"] = {
+            "title": " ".join(words(rng, 3)).title(),
+            "description": f"Page {i}",
+            "content": " ".join(words(rng, 40)),
+            "links": {f"Page {i}": url},
+        }
+        pages[url] = {"title": " ".join(words(rng, 4)).title(), "summary": " ".join(words(rng, 40))}
+    with open(tmp / "docs.json", "w") as f:
+        json.dump({"categories": {}, "docs": docs}, f)
+    with open(tmp / "content_store.json", "w") as f:
+        json.dump({"version": STORE_VERSION, "pages": pages}, f)
+
+def use_paths(tmp):
+    trmnl_module.DOCS_PATH = tmp / "docs.json"
+    trmnl_module.CONTENT_STORE_PATH = tmp / "content_store.json"
+    trmnl_module.SNAPSHOT_PATH = tmp / "docs_snapshot.bin"
+
+def load_json(tmp):
+    """The docs and caches as the bot loaded them before the snapshot"""
+    docs_data = load_docs(tmp / "docs.json").data
+    content = ContentStore.load(tmp / "content_store.json")
+    with open(tmp / "search_index.json") as f:
+        cached = json.load(f)
+    index = DocsIndex(cached["documents"], cached["postings"])
+    # The JSON cache built every term's weight table on load
+    index.weights = {term: {int(doc_id): weight for doc_id, weight in entries} for term, entries in index.postings.items()}
+    return docs_data, content.pages, index, trmnl_module.build_embeds(docs_data), TopicIndex.build(docs_data)
+
+def load_snapshot(tmp):
+    prepared = trmnl_module.load_prepared_docs()
+    return prepared.docs_data, prepared.content.pages, prepared.search_index, prepared.embeds, prepared.topic_index
+
+def measure(mode, tmp, entries, results):
+    tmp = Path(tmp)
+    use_paths(tmp)
+    rng = random.Random(7)
+    before = rss_bytes()
+
+    start = time.perf_counter()
+    loaded = (load_json if mode == "json" else load_snapshot)(tmp)
+    load_ms = (time.perf_counter() - start) * 1000
+    _, pages, index, _, _ = loaded
+
+    urls = [f"https://docs.usetrmnl.com/page/{rng.randrange(entries)}" for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    for url in urls:
+        pages.get(url)
+    lookup_us = (time.perf_counter() - start) / LOOKUPS * 1e6
+
+    queries = [" ".join(words(rng, 2)) for _ in range(QUERIES)]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        timings.append(time.perf_counter() - start)
+
+    results[mode] = (load_ms, lookup_us, statistics.median(timings) * 1000, rss_bytes() - before)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare loading docs from JSON and from the compiled snapshot")
+    parser.add_argument("--entries", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        write_site(tmp_path, args.entries)
+        use_paths(tmp_path)
+        start = time.perf_counter()
+        prepared = trmnl_module.load_prepared_docs()  # compiles the snapshot
+        compile_ms = (time.perf_counter() - start) * 1000
+        with open(tmp_path / "search_index.json", "w") as f:
+            json.dump({"documents": list(prepared.search_index.documents), "postings": prepared.search_index.postings}, f)
+        del prepared
+        sizes = {name: (tmp_path / name).stat().st_size for name in ("docs.json", "content_store.json", "search_index.json", "docs_snapshot.bin")}
+
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            results = manager.dict()
+            for mode in ("json", "snapshot"):
+                process = context.Process(target=measure, args=(mode, tmp, args.entries, results))
+                process.start()
+                process.join()
+            results = dict(results)
+
+    print(f"{args.entries:,} entries, first load with snapshot compile {compile_ms:,.0f} ms")
+    print("files: " + ", ".join(f"{name} {size / 1e6:.1f} MB" for name, size in sizes.items()))
+    for mode, (load_ms, lookup_us, search_ms, growth) in results.items():
+        print(f"{mode:>9}: load {load_ms:7.1f} ms, page lookup {lookup_us:5.1f} us, "
+              f"search p50 {search_ms:6.3f} ms, resident +{growth / 1e6:6.1f} MB")
+    json_load, snapshot_load = results["json"][0], results["snapshot"][0]
+    print(f"load time: {json_load / snapshot_load:.1f}x faster, "
+          f"resident memory: {results['json'][3] / max(results['snapshot'][3], 1):.1f}x smaller")
+
+if __name__ == "__main__":
+    main()
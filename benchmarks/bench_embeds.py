@@ -0,0 +1,93 @@
+"""
+Micro-benchmark for the doc command embeds.
+
+Compares building a discord.Embed per interaction (the old behaviour) with
+serving the prebuilt embed table from the trmnl cog, then pages through a
+category of LINKS links: the payload of one embed with every link against
+one page with its buttons and menu, and the cost of a page click with
+the cached page against building the page per click.
+
+Run from the repository root:
+    python -m benchmarks.bench_embeds
+"""
+import asyncio
+import json
+import time
+import timeit
+import tracemalloc
+from pathlib import Path
+
+import discord
+
+from src.bot.browser import CATEGORY, browser_view
+from src.bot.trmnl import PAGE_LINKS, build_embeds, build_pages, trmnl
+
+DOCS_PATH = Path(__file__).parents[1] / "docs.json"
+ITERATIONS = 100_000
+LINKS = 200
+CLICKS = 20_000
+
+def build_per_call(doc):
+    embed = discord.Embed(title=doc["title"], description=doc["content"], color=0xBEBEFE)
+    for name, url in doc["links"].items():
+        embed.add_field(name=name, value=url, inline=False)
+    return embed
+
+def measure_allocations(func, calls=1_000):
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    kept = [func() for _ in range(calls)]
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = snapshot_after.compare_to(snapshot_before, "filename")
+    del kept
+    return sum(stat.size_diff for stat in stats) / calls
+
+def main():
+    with open(DOCS_PATH) as f:
+        docs_data = json.load(f)
+    doc = docs_data["docs"]["home"]
+    embeds = build_embeds(docs_data)
+
+    uncached = lambda: build_per_call(doc)
+    cached = lambda: embeds["home"]
+
+    for label, func in (("build per call", uncached), ("prebuilt table", cached)):
+        seconds = timeit.timeit(func, number=ITERATIONS)
+        per_call_ns = seconds / ITERATIONS * 1e9
+        allocated = measure_allocations(func)
+        print(f"{label:>15}: {per_call_ns:8.0f} ns/call, {allocated:8.0f} bytes retained/call")
+
+    asyncio.run(paging(docs_data))
+
+def payload_bytes(embed, view=None):
+    payload = {"embeds": [embed.to_dict()]}
+    if view is not None:
+        payload["components"] = view.to_components()
+    return len(json.dumps(payload))
+
+async def paging(docs_data):
+    docs_data["categories"]["blog"]["links"].update(
+        {f"Post {i}": f"https://usetrmnl.com/blog/post-{i}" for i in range(LINKS)}
+    )
+    pages = build_pages(docs_data)
+    links = list(docs_data["categories"]["blog"]["links"].items())
+    first = trmnl.page_message(pages, CATEGORY, "blog", 0, menu=True)
+    print(f"{len(links)} links: one embed {payload_bytes(build_per_call({'title': 'Blog', 'content': '', 'links': dict(links)})):,} bytes "
+          f"({len(links)} fields, Discord allows 25), one page {payload_bytes(first['embed'], first['view']):,} bytes")
+
+    count = len(pages.categories["blog"])
+    start = time.perf_counter()
+    for i in range(CLICKS):
+        trmnl.page_message(pages, CATEGORY, "blog", i % count, menu=True)
+    cached_us = (time.perf_counter() - start) / CLICKS * 1e6
+    start = time.perf_counter()
+    for i in range(CLICKS):
+        page = i % count
+        build_per_call({"title": "Blog", "content": "", "links": dict(links[page * PAGE_LINKS:(page + 1) * PAGE_LINKS])})
+        browser_view(CATEGORY, "blog", page, count, pages.menu)
+    built_us = (time.perf_counter() - start) / CLICKS * 1e6
+    print(f"page click: cached page {cached_us:6.1f} us, building the page {built_us:6.1f} us (both with a new view)")
+
+if __name__ == "__main__":
+    main()
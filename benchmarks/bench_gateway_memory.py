@@ -0,0 +1,140 @@
+"""
+Benchmark for gateway cache memory.
+
+Feeds N synthetic guilds (GUILD_CREATE payloads with channels, roles,
+emojis and voice states) plus message traffic through a real discord.py
+connection state, once with the bot's previous settings (default intents,
+message content, 1000 cached messages, default member cache) and once
+with the lean profile. Only events the profile's intents subscribe to are
+fed. Each profile runs in a fresh process and reports resident memory
+per guild.
+
+Run from the repository root:
+    python -m benchmarks.bench_gateway_memory
+    python -m benchmarks.bench_gateway_memory --guilds 20000
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import resource
+
+import discord
+
+from src.bot.gateway import gateway_options
+
+PROFILES = {
+    "before": {"gateway": {"profile": "default", "intents": {"message_content": True}}},
+    "lean": {},
+}
+CHANNELS = 12
+ROLES = 8
+EMOJIS = 10
+VOICE_MEMBERS = 3
+MESSAGES_PER_GUILD = 5
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak, not current, but close enough where /proc is missing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def user(user_id):
+    return {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": None}
+
+def member(user_id):
+    return {"user": user(user_id), "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+
+def guild_payload(guild_id, intents):
+    base = guild_id * 1000
+    payload = {
+        "id": str(guild_id),
+        "name": f"Guild {guild_id}",
+        "owner_id": str(base + 1),
+        "member_count": 500,
+        "features": [],
+        "roles": [
+            {"id": str(base + 100 + i), "name": f"role{i}", "permissions": "0", "position": i, "color": 0,
+             "hoist": False, "managed": False, "mentionable": False, "flags": 0}
+            for i in range(ROLES)
+        ],
+        "channels": [
+            {"id": str(base + 200 + i), "type": 0, "name": f"channel-{i}", "position": i, "permission_overwrites": []}
+            for i in range(CHANNELS)
+        ],
+        "emojis": [
+            {"id": str(base + 300 + i), "name": f"emoji{i}", "roles": [], "require_colons": True,
+             "managed": False, "animated": False, "available": True}
+            for i in range(EMOJIS)
+        ],
+        "stickers": [],
+        "members": [],
+        "voice_states": [],
+    }
+    if intents.voice_states:
+        # Discord includes members in voice with their voice states
+        for i in range(VOICE_MEMBERS):
+            user_id = base + 500 + i
+            payload["members"].append(member(user_id))
+            payload["voice_states"].append({
+                "user_id": str(user_id), "channel_id": str(base + 200), "session_id": "x",
+                "deaf": False, "mute": False, "self_deaf": False, "self_mute": False,
+                "self_video": False, "suppress": False, "request_to_speak_timestamp": None,
+            })
+    return payload
+
+def message_payload(guild_id, n, intents):
+    base = guild_id * 1000
+    author_id = base + 600 + n
+    return {
+        "id": str(base * 100 + n), "channel_id": str(base + 200 + n % CHANNELS), "guild_id": str(guild_id),
+        "author": user(author_id), "member": {k: v for k, v in member(author_id).items() if k != "user"},
+        "content": "x" * 80 if intents.message_content else "", "timestamp": "2024-01-01T00:00:00+00:00",
+        "edited_timestamp": None, "tts": False, "mention_everyone": False, "mentions": [],
+        "mention_roles": [], "attachments": [], "embeds": [], "pinned": False, "type": 0,
+    }
+
+def measure(name, guilds, results):
+    options = gateway_options(PROFILES[name])
+    client = discord.Client(**options)
+    state = client._connection
+    intents = options["intents"]
+    gc.collect()
+    before = rss_bytes()
+
+    for guild_id in range(1, guilds + 1):
+        state._add_guild_from_data(guild_payload(guild_id, intents))
+        if intents.guild_messages:
+            for n in range(MESSAGES_PER_GUILD):
+                state.parse_message_create(message_payload(guild_id, n, intents))
+
+    gc.collect()
+    members = sum(len(guild._members) for guild in client.guilds)
+    results[name] = (rss_bytes() - before, len(client.cached_messages), members)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare gateway cache memory per guild")
+    parser.add_argument("--guilds", type=int, default=5000)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        results = manager.dict()
+        for name in PROFILES:
+            process = context.Process(target=measure, args=(name, args.guilds, results))
+            process.start()
+            process.join()
+        results = dict(results)
+
+    print(f"{args.guilds:,} guilds:")
+    for name, (growth, messages, members) in results.items():
+        print(f"{name:>7}: {growth / args.guilds:8,.0f} bytes/guild resident, "
+              f"{messages:,} cached messages, {members:,} cached members")
+    before, lean = results["before"][0], results["lean"][0]
+    if before > 0:
+        print(f"saved: {(before - lean) / args.guilds:,.0f} bytes/guild ({(before - lean) / before:.0%})")
+
+if __name__ == "__main__":
+    main()
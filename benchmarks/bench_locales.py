@@ -0,0 +1,114 @@
+"""
+Benchmark for localized doc embeds.
+
+Adds 0 to 30 synthetic locales to the repository's docs.json (plus --docs
+extra doc commands), each translating --translated of the commands, and
+reports for every locale count:
+
+    build    time to build the English and localized embed pages at reload
+    memory   memory held by the embed pages
+    lookup   the response path: resolve the interaction's locale from the
+             preferences and fetch the prebuilt embed, for a mix of users
+             with a preference, guilds with a preference and neither
+
+Run from the repository root:
+    python -m benchmarks.bench_locales
+    python -m benchmarks.bench_locales --docs 500 --translated 1.0
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+import discord
+
+from benchmarks.bench_search import words
+from src.bot.locales import DEFAULT_LOCALE, LocalePreferences, command_localizations
+from src.bot.trmnl import build_localized_pages, build_pages, command_specs
+
+DOCS_PATH = Path(__file__).parents[1] / "docs.json"
+LOCALE_COUNTS = (0, 5, 15, 30)
+LOOKUPS = 200_000
+
+def make_docs(extra_docs, locale_count, translated):
+    rng = random.Random(42)
+    with open(DOCS_PATH) as f:
+        docs_data = json.load(f)
+    for i in range(extra_docs):
+        docs_data["docs"][f"page-{i}"] = {
+            "title": " ".join(words(rng, 3)).title(),
+            "description": f"Page {i}",
+            "content": " ".join(words(rng, 40)),
+            "links": {f"Page {i}": f"https://docs.usetrmnl.com/page/{i}"},
+        }
+    names = list(command_specs(docs_data))
+    locales = [locale.value for locale in discord.Locale if locale.value != DEFAULT_LOCALE][:locale_count]
+    docs_data["locales"] = {
+        locale: {"docs": {
+            name: {"title": " ".join(words(rng, 3)).title(), "content": " ".join(words(rng, 40))}
+            for name in rng.sample(names, int(len(names) * translated))
+        }}
+        for locale in locales
+    }
+    return docs_data, names
+
+def make_interactions(rng, locales):
+    discord_locales = list(discord.Locale)
+    preferences = LocalePreferences(
+        users={user_id: rng.choice(locales) for user_id in range(0, 10_000, 3)},
+        guilds={guild_id: rng.choice(locales) for guild_id in range(0, 100, 2)},
+    )
+    interactions = [
+        SimpleNamespace(user=SimpleNamespace(id=rng.randrange(10_000)), guild_id=rng.randrange(100),
+                        locale=rng.choice(discord_locales))
+        for _ in range(1_000)
+    ]
+    return preferences, interactions
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure localized embed tables as locales are added")
+    parser.add_argument("--docs", type=int, default=200, help="doc commands added to docs.json")
+    parser.add_argument("--translated", type=float, default=0.5, help="share of commands each locale translates")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    baseline = None
+    for locale_count in LOCALE_COUNTS:
+        docs_data, names = make_docs(args.docs, locale_count, args.translated)
+
+        start = time.perf_counter()
+        tables = build_localized_pages(docs_data, build_pages(docs_data))
+        command_localizations(docs_data, command_specs(docs_data))
+        build_ms = (time.perf_counter() - start) * 1000
+
+        # Built again under tracemalloc, which slows allocation down too much to time it
+        del tables
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        tables = build_localized_pages(docs_data, build_pages(docs_data))
+        held = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        preferences, interactions = make_interactions(rng, list(tables))
+        requests = [(rng.choice(interactions), rng.choice(names)) for _ in range(LOOKUPS)]
+        start = time.perf_counter()
+        for interaction, name in requests:
+            tables[preferences.resolve(interaction, tables)].docs[name][0]
+        lookup_ns = (time.perf_counter() - start) / LOOKUPS * 1e9
+
+        if baseline is None:
+            # The response path before locales: one lookup in the English table
+            english = tables[DEFAULT_LOCALE].docs
+            start = time.perf_counter()
+            for _, name in requests:
+                english[name][0]
+            print(f"English only: lookup {(time.perf_counter() - start) / LOOKUPS * 1e9:5.0f} ns")
+            baseline = held
+        print(f"{locale_count:>2} locales: build {build_ms:7.1f} ms, embeds {held / 1e6:6.2f} MB "
+              f"({held / baseline:4.1f}x), lookup {lookup_ns:5.0f} ns")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark for RateLimitManager.
+
+Measures checks per second against a single hot bucket and across one
+million distinct buckets, and the memory held per bucket record, for both
+Discord header buckets and scoped per-user command limits.
+
+Run from the repository root:
+    python -m benchmarks.bench_rate_limiter
+"""
+import time
+import tracemalloc
+
+from src.bot.rate_limiter import DiscordRateLimit, RateLimitManager
+
+BUCKETS = 1_000_000
+CHECKS = 1_000_000
+
+def populate(manager, count):
+    now = time.monotonic()
+    for i in range(count):
+        key = f"bucket:{i}"
+        manager.buckets[key] = DiscordRateLimit(5, 5, 5.0, key, now=now)
+
+def checks_per_second(manager, keys):
+    check = manager.check_rate_limit
+    start = time.perf_counter()
+    for key in keys:
+        check(key)
+    return len(keys) / (time.perf_counter() - start)
+
+def main():
+    # A huge global limit keeps the global bucket out of the measurement
+    manager = RateLimitManager(global_limit=10**9)
+    populate(manager, 1)
+    rate = checks_per_second(manager, ["bucket:0"] * CHECKS)
+    print(f"hot bucket:        {rate:12,.0f} checks/s")
+
+    tracemalloc.start()
+    manager = RateLimitManager(global_limit=10**9)
+    keys = [f"bucket:{i}" for i in range(BUCKETS)]
+    before = tracemalloc.get_traced_memory()[0]
+    now = time.monotonic()
+    for key in keys:
+        manager.buckets[key] = DiscordRateLimit(5, 5, 5.0, key, now=now)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{BUCKETS:,} buckets:   {(after - before) / 2**20:10.1f} MiB "
+          f"({(after - before) / BUCKETS:.0f} bytes/bucket excluding keys)")
+
+    rate = checks_per_second(manager, keys)
+    print(f"distinct buckets:  {rate:12,.0f} checks/s")
+
+    manager = RateLimitManager(global_limit=10**9)
+    check = manager.check_scoped_rate_limit
+    start = time.perf_counter()
+    for user_id in range(BUCKETS):
+        check("home", user_id, 5, 10.0)
+    rate = BUCKETS / (time.perf_counter() - start)
+    print(f"scoped keys:       {rate:12,.0f} checks/s")
+
+    manager = RateLimitManager(global_limit=10**9)
+    check = manager.check_scoped_rate_limit
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for user_id in range(BUCKETS):
+        check("home", user_id, 5, 10.0)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{BUCKETS:,} scoped:    {(after - before) / 2**20:10.1f} MiB "
+          f"({(after - before) / BUCKETS:.0f} bytes/key)")
+
+if __name__ == "__main__":
+    main()
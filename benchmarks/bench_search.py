@@ -0,0 +1,84 @@
+"""
+Benchmark for the /search index.
+
+Builds a synthetic docs.json with thousands of entries and measures index
+build time, and query latency both on the built index and on one loaded
+from a docs snapshot (as after a restart with unchanged docs), whose
+posting lists are decoded on first use.
+
+The target was sub-millisecond queries. The median is well under that,
+but the 99th percentile is 1-2 ms in both cases: queries made only of
+common words walk deep into their posting lists (see DocsIndex).
+
+Run from the repository root:
+    python -m benchmarks.bench_search
+"""
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from src.bot.search import DocsIndex
+from src.bot.snapshot import open_snapshot, write_snapshot
+
+ENTRIES = 5_000
+QUERIES = 2_000
+WORDS = (
+    "trmnl device plugin battery display eink wifi firmware screen refresh "
+    "framework design system developer byod byos server api webhook token "
+    "calendar weather news update batch ship order privacy terms support"
+).split()
+# Long tail of rarer words so term frequencies follow a Zipf-like curve, as in real docs
+VOCABULARY = WORDS + [f"term{i}" for i in range(5_000)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+def words(rng, count):
+    return rng.choices(VOCABULARY, weights=WEIGHTS, k=count)
+
+def synthetic_docs(entries, rng):
+    docs = {}
+    for i in range(entries):
+        docs[f"page-{i}"] = {
+            "title": " ".join(words(rng, 3)).title(),
+            "content": " ".join(words(rng, 40)),
+            "links": {f"Link {i} {words(rng, 1)[0]}": f"https://docs.usetrmnl.com/page/{i}"},
+        }
+    return {"categories": {}, "docs": docs}
+
+def main():
+    rng = random.Random(42)
+    docs = synthetic_docs(ENTRIES, rng)
+
+    start = time.perf_counter()
+    index = DocsIndex.build(docs)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"build: {len(index.documents):,} documents in {build_ms:.0f} ms")
+
+    queries = [" ".join(words(rng, rng.randint(1, 3))) for _ in range(QUERIES)]
+    report("query", index, queries)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "docs_snapshot.bin"
+        write_snapshot(path, "bench", index.tables())
+        snapshot = open_snapshot(path, "bench")
+        start = time.perf_counter()
+        loaded = DocsIndex.from_snapshot(snapshot)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"snapshot load: {load_ms:.0f} ms ({len(loaded.lists):,} posting lists decoded up front)")
+        report("snapshot query", loaded, queries)
+        del loaded
+        snapshot.close()
+
+def report(label, index, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"{label}: p50 {statistics.median(timings):.3f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99)]:.3f} ms")
+
+if __name__ == "__main__":
+    main()
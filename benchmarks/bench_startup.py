@@ -0,0 +1,150 @@
+"""
+Benchmark for bot startup.
+
+Times DiscordBot.start() up to the point where the gateway connection
+would begin, with Discord's login calls replaced by a fixed simulated
+latency. Compares the previous sequence (log in, then read and index
+docs.json on the event loop, then load extensions one at a time) with the
+current pipeline (docs prepared in a worker thread during login,
+extensions loaded concurrently). Also reports the longest event loop
+stall, which is what delays gateway heartbeats during startup.
+
+--pages adds that many crawled pages (a docs.json category of links plus
+their content store entries) to the real docs, as a larger docs site
+would; 5,000 by default. The bundled docs.json alone loads in a few
+milliseconds, so with --pages 0 both sequences are equally fast. With
+--cold the compiled docs snapshot is removed before every run, as after
+a docs.json update.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --pages 0 --cold
+    python -m benchmarks.bench_startup --login-ms 400 --runs 10
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+from unittest.mock import AsyncMock, MagicMock
+
+from discord.ext import commands
+
+import bot as bot_module
+from benchmarks.bench_search import words
+from src.bot import trmnl as trmnl_module
+from src.bot.ingest import STORE_VERSION
+
+USER = {"id": "1", "username": "trmnl", "discriminator": "0", "avatar": None, "global_name": None}
+
+class PipelineBot(bot_module.DiscordBot):
+    async def load_extension(self, name, *, package=None):
+        # load_extension executes a fresh copy of the module; reuse the one with patched paths
+        await importlib.import_module(name).setup(self)
+
+class SequentialBot(PipelineBot):
+    """The startup sequence before the pipeline, for comparison"""
+    async def start(self, token, *, reconnect=True):
+        await commands.AutoShardedBot.start(self, token, reconnect=reconnect)
+
+    async def load_extensions(self):
+        for name in bot_module.EXTENSIONS:
+            if name == "src.bot.trmnl":
+                # trmnl.__init__ used to read and index docs.json on the event loop
+                self.preloaded_docs = asyncio.get_running_loop().create_future()
+                self.preloaded_docs.set_result(trmnl_module.load_prepared_docs())
+            await self.load_extension(name)
+
+def write_site(tmp, pages):
+    """docs.json plus a category of `pages` crawled links, and their content store"""
+    rng = random.Random(42)
+    with open(trmnl_module.DOCS_PATH) as f:
+        docs = json.load(f)
+    links, store = {}, {}
+    for i in range(pages):
+        url = f"https://docs.usetrmnl.com/archive/{i}"
+        links[f"Archive {i} {words(rng, 1)[0]}"] = url
+        store[url] = {"title": " ".join(words(rng, 4)).title(), "summary": " ".join(words(rng, 40))}
+    docs["categories"]["archive"] = {"title": "Archive", "links": links}
+    with open(tmp / "docs.json", "w") as f:
+        json.dump(docs, f)
+    with open(tmp / "content_store.json", "w") as f:
+        json.dump({"version": STORE_VERSION, "pages": store}, f)
+
+async def watch_loop(stalls):
+    """Track the longest gap between event loop iterations"""
+    last = time.perf_counter()
+    while True:
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        stalls.append(now - last - 0.001)
+        last = now
+
+async def start_once(bot_class, login_latency):
+    bot = bot_class({})
+
+    async def static_login(token):
+        await asyncio.sleep(login_latency)
+        return USER
+
+    bot.http.static_login = static_login
+    bot.application_info = AsyncMock(return_value=MagicMock(id=1, interactions_endpoint_url=None))
+    bot.connect = AsyncMock()
+
+    stalls = []
+    watcher = asyncio.create_task(watch_loop(stalls))
+    start = time.perf_counter()
+    await bot.start("token")
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.002)  # let the watcher record the gap before start() returned
+    watcher.cancel()
+    return elapsed, max(stalls, default=0.0), bot.startup.phases
+
+def run(bot_class, login_latency, runs, cold):
+    timings, stalls, phases = [], [], {}
+    for _ in range(runs):
+        if cold:
+            trmnl_module.SNAPSHOT_PATH.unlink(missing_ok=True)
+        elapsed, stall, phases = asyncio.run(start_once(bot_class, login_latency))
+        timings.append(elapsed)
+        stalls.append(stall)
+    return statistics.median(timings), max(stalls), phases
+
+def main():
+    parser = argparse.ArgumentParser(description="Time bot startup with simulated login latency")
+    parser.add_argument("--login-ms", type=float, default=250.0, help="simulated Discord login round trips")
+    parser.add_argument("--pages", type=int, default=5_000, help="crawled pages added to the docs")
+    parser.add_argument("--cold", action="store_true", help="recompile the docs snapshot on every start")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = {
+            "SYNC_MANIFEST_PATH": tmp / "sync_manifest.json",
+            "SNAPSHOT_PATH": tmp / "docs_snapshot.bin",
+            "CONTENT_STORE_PATH": tmp / "content_store.json",
+        }
+        if args.pages:
+            write_site(tmp, args.pages)
+            paths["DOCS_PATH"] = tmp / "docs.json"
+        with mock.patch.multiple(trmnl_module, **paths), \
+                mock.patch("src.bot.feeds.FEED_STATE_PATH", tmp / "feed_state.json"):
+            trmnl_module.load_prepared_docs()  # compile the docs snapshot, as on a normal restart
+            results = {}
+            for name, bot_class in (("sequential", SequentialBot), ("pipeline", PipelineBot)):
+                results[name] = run(bot_class, args.login_ms / 1000, args.runs, args.cold)
+                elapsed, stall, phases = results[name]
+                print(f"{name:>10}: ready to connect after {elapsed * 1000:6.1f} ms, "
+                      f"longest event loop stall {stall * 1000:5.1f} ms")
+                print("            " + ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in phases.items()))
+            saved = results["sequential"][0] - results["pipeline"][0]
+            print(f"time to ready: {saved * 1000:+.1f} ms saved ({saved / results['sequential'][0]:.0%})")
+
+if __name__ == "__main__":
+    main()
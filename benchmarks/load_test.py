@@ -0,0 +1,306 @@
+"""
+Load test for the trmnl cog.
+
+Builds the real cog against an in-process fake bot and replays synthetic
+interactions through the real command callbacks (generated doc commands,
+/search and /doc) with the real RateLimitManager, coalescer and metrics.
+Three traffic mixes are available:
+
+- bursty: a few users in a few channels firing bursts, with pauses between
+- many-guild: traffic spread evenly over thousands of guilds and users
+- hot-key: Zipf-distributed users with most traffic in one channel
+
+Reports p50/p99 latency, throughput, response outcomes and memory growth.
+The global limit defaults to effectively unlimited so commands run their
+full path past the per-user limits; pass --global-limit 50 to see how
+the bot's real 50 requests/s global budget sheds load.
+With --max-p99-ms / --min-throughput it exits non-zero when a threshold
+is missed, so CI can use it as a regression gate.
+
+Run from the repository root:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --scenario hot-key --interactions 5000 --max-p99-ms 5
+"""
+import argparse
+import asyncio
+import gc
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest import mock
+
+import discord
+
+from src.bot.metrics import MetricsRegistry
+from src.bot.rate_limiter import RateLimitManager
+from src.bot import trmnl as trmnl_module
+
+SCENARIOS = ("bursty", "many-guild", "hot-key")
+UNLIMITED = 10 ** 9
+SEARCH_QUERIES = ["byos", "framework plugin", "design system", "privacy", "battery", "developer edition", "batch update"]
+TOPIC_INPUTS = ["fram", "priv", "byo", "dev", "home", "terms of", "desi"]
+
+class FakeTree:
+    """Just enough of app_commands.CommandTree for the cog to register doc commands"""
+    def __init__(self):
+        self.commands: Dict[str, Any] = {}
+
+    def add_command(self, command, override=False):
+        self.commands[command.name] = command
+
+    def remove_command(self, name):
+        return self.commands.pop(name, None)
+
+    def get_commands(self, guild=None):
+        return list(self.commands.values())
+
+class FakeBot:
+    def __init__(self, global_limit: int):
+        self.tree = FakeTree()
+        self.config: Dict[str, Any] = {}
+        self.rate_limiter = RateLimitManager(global_limit=global_limit)
+        self.metrics = MetricsRegistry()
+
+class FakeUser:
+    __slots__ = ("id",)
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+class FakeCommand:
+    __slots__ = ("name", "qualified_name")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.qualified_name = name
+
+class FakeMessage:
+    __slots__ = ("jump_url",)
+
+    def __init__(self, jump_url: str):
+        self.jump_url = jump_url
+
+class FakeResponse:
+    """InteractionResponse stand-in that records what was sent"""
+    __slots__ = ("done", "sends", "latency")
+
+    def __init__(self, latency: float):
+        self.done = False
+        self.sends = 0
+        self.latency = latency
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def send_message(self, *args, **kwargs) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.done = True
+        self.sends += 1
+
+    async def defer(self, **kwargs) -> None:
+        self.done = True
+
+class FakeFollowup:
+    __slots__ = ("response",)
+
+    def __init__(self, response: FakeResponse):
+        self.response = response
+
+    async def send(self, *args, **kwargs) -> None:
+        self.response.sends += 1
+
+class FakeInteraction:
+    """The parts of discord.Interaction the cog's commands use"""
+    __slots__ = ("id", "user", "guild_id", "channel_id", "locale", "command", "response", "followup", "extras")
+
+    def __init__(self, interaction_id: int, user_id: int, guild_id: int, channel_id: int, command: str, latency: float):
+        self.id = interaction_id
+        self.user = FakeUser(user_id)
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.locale = discord.Locale.american_english
+        self.command = FakeCommand(command)
+        self.response = FakeResponse(latency)
+        self.followup = FakeFollowup(self.response)
+        self.extras: Dict[str, Any] = {}
+
+    async def original_response(self) -> FakeMessage:
+        return FakeMessage(f"https://discord.com/channels/{self.guild_id}/{self.channel_id}/{self.id}")
+
+class Request:
+    """One synthetic interaction: who sends which command where"""
+    __slots__ = ("user_id", "guild_id", "channel_id", "command", "argument")
+
+    def __init__(self, user_id: int, guild_id: int, channel_id: int, command: str, argument: Optional[str]):
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.command = command
+        self.argument = argument
+
+def _pick_command(rng: random.Random, doc_commands: List[str]):
+    # Mostly doc commands, then search, then /doc lookups
+    roll = rng.random()
+    if roll < 0.6:
+        return rng.choice(doc_commands), None
+    if roll < 0.85:
+        return "search", rng.choice(SEARCH_QUERIES)
+    return "doc", rng.choice(TOPIC_INPUTS)
+
+def generate(scenario: str, count: int, doc_commands: List[str], seed: int = 42) -> List[List[Request]]:
+    """Batches of requests; each batch arrives at once"""
+    rng = random.Random(seed)
+    requests: List[Request] = []
+    if scenario == "bursty":
+        for _ in range(count):
+            user = rng.randrange(50)
+            requests.append(Request(user + 1, 1, 100 + user % 5, *_pick_command(rng, doc_commands)))
+        size = 500
+    elif scenario == "many-guild":
+        for _ in range(count):
+            guild = rng.randrange(5_000)
+            requests.append(Request(rng.randrange(100_000) + 1, guild + 1, 10_000 + guild, *_pick_command(rng, doc_commands)))
+        size = 100
+    elif scenario == "hot-key":
+        users = list(range(1, 20_001))
+        weights = [1 / rank ** 1.2 for rank in users]
+        for user in rng.choices(users, weights=weights, k=count):
+            channel = 500 if rng.random() < 0.8 else 500 + rng.randrange(1, 50)
+            requests.append(Request(user, 1, channel, *_pick_command(rng, doc_commands)))
+        size = 200
+    else:
+        raise ValueError(f"Unknown scenario: {scenario}")
+    return [requests[i:i + size] for i in range(0, len(requests), size)]
+
+class LoadReport:
+    """Results of one scenario run"""
+    def __init__(self, scenario: str, latencies: List[float], elapsed: float, interactions: List[FakeInteraction], metrics: MetricsRegistry):
+        self.scenario = scenario
+        self.count = len(latencies)
+        latencies = sorted(latencies)
+        self.p50_ms = statistics.median(latencies) * 1000 if latencies else 0.0
+        self.p99_ms = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0
+        self.throughput = self.count / elapsed if elapsed else 0.0
+        self.unanswered = sum(1 for interaction in interactions if interaction.response.sends == 0)
+        self.failed = sum(1 for interaction in interactions if interaction.extras.get("failed"))
+        self.rate_limited = sum(command.rate_limited for command in metrics.commands.values())
+        self.memory_growth_kib: Optional[float] = None
+
+    def __str__(self) -> str:
+        line = (f"{self.scenario:>10}: {self.count:,} interactions, {self.throughput:10,.0f}/s, "
+                f"p50 {self.p50_ms:.3f} ms, p99 {self.p99_ms:.3f} ms, "
+                f"{self.rate_limited:,} rate limited, {self.failed} failed, {self.unanswered} unanswered")
+        if self.memory_growth_kib is not None:
+            line += f", memory +{self.memory_growth_kib:,.0f} KiB"
+        return line
+
+async def _invoke(cog, request: Request, interaction: FakeInteraction) -> None:
+    await cog.interaction_check(interaction)
+    if request.command == "search":
+        await cog.search.callback(cog, interaction, request.argument)
+    elif request.command == "doc":
+        await cog.doc.callback(cog, interaction, request.argument)
+    else:
+        await cog.doc_commands[request.command].callback(cog, interaction)
+    await cog.on_app_command_completion(interaction, cog.doc_commands.get(request.command) or getattr(cog, request.command))
+
+async def _drive(cog, batches: List[List[Request]], latency: float, gap: float):
+    latencies: List[float] = []
+    interactions: List[FakeInteraction] = []
+    next_id = 1
+
+    async def one(request: Request) -> None:
+        nonlocal next_id
+        interaction = FakeInteraction(next_id, request.user_id, request.guild_id, request.channel_id, request.command, latency)
+        next_id += 1
+        interactions.append(interaction)
+        start = time.perf_counter()
+        await _invoke(cog, request, interaction)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for batch in batches:
+        await asyncio.gather(*(one(request) for request in batch))
+        if gap:
+            await asyncio.sleep(gap)
+    return latencies, time.perf_counter() - start, interactions
+
+def _build_cog(tmp: Path, global_limit: int):
+    with mock.patch.multiple(
+        trmnl_module,
+        SYNC_MANIFEST_PATH=tmp / "sync_manifest.json",
+        SNAPSHOT_PATH=tmp / "docs_snapshot.bin",
+        CONTENT_STORE_PATH=tmp / "content_store.json",
+    ):
+        return trmnl_module.trmnl(FakeBot(global_limit))
+
+def run_scenario(
+    scenario: str,
+    interactions: int = 20_000,
+    global_limit: int = UNLIMITED,
+    latency: float = 0.0,
+    measure_memory: bool = False,
+    seed: int = 42
+) -> LoadReport:
+    """Replay one traffic mix through a fresh cog"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cog = _build_cog(Path(tmp), global_limit)
+        batches = generate(scenario, interactions, sorted(cog.doc_commands), seed)
+        gap = 0.005 if scenario == "bursty" else 0.0
+        latencies, elapsed, fakes = asyncio.run(_drive(cog, batches, latency, gap))
+        report = LoadReport(scenario, latencies, elapsed, fakes, cog.metrics)
+
+        if measure_memory:
+            # Separate run: tracemalloc would skew the timings above
+            del fakes
+            gc.collect()
+            cog = _build_cog(Path(tmp), global_limit)
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            _, _, fakes = asyncio.run(_drive(cog, batches, latency, gap))
+            del fakes
+            gc.collect()
+            report.memory_growth_kib = (tracemalloc.get_traced_memory()[0] - before) / 1024
+            tracemalloc.stop()
+    return report
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay synthetic interactions through the trmnl cog")
+    parser.add_argument("--scenario", choices=SCENARIOS + ("all",), default="all")
+    parser.add_argument("--interactions", type=int, default=20_000)
+    parser.add_argument("--global-limit", type=int, default=UNLIMITED, help="global requests per second")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated Discord response time")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--max-p99-ms", type=float, help="fail if any scenario's p99 is higher")
+    parser.add_argument("--min-throughput", type=float, help="fail if any scenario handles fewer interactions per second")
+    args = parser.parse_args(argv)
+
+    failures = []
+    for scenario in SCENARIOS if args.scenario == "all" else (args.scenario,):
+        report = run_scenario(
+            scenario,
+            interactions=args.interactions,
+            global_limit=args.global_limit,
+            latency=args.latency_ms / 1000,
+            measure_memory=not args.no_memory,
+        )
+        print(report)
+        if report.unanswered or report.failed:
+            failures.append(f"{scenario}: {report.unanswered} unanswered, {report.failed} failed")
+        if args.max_p99_ms is not None and report.p99_ms > args.max_p99_ms:
+            failures.append(f"{scenario}: p99 {report.p99_ms:.3f} ms > {args.max_p99_ms} ms")
+        if args.min_throughput is not None and report.throughput < args.min_throughput:
+            failures.append(f"{scenario}: {report.throughput:,.0f}/s < {args.min_throughput:,.0f}/s")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,43 +1,161 @@
+import asyncio
 import json
 import logging
 import os
 import platform
 import sys
+from typing import Optional
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
+from src.bot.analytics import create_analytics
+from src.bot.circuit_breaker import create_breaker
+from src.bot.gateway import gateway_options
+from src.bot.http_hooks import RateLimitTrace
+from src.bot.locales import DocsTranslator
+from src.bot.metrics import MetricsRegistry, MetricsServer
+from src.bot.rate_limit_backends import create_backend
+from src.bot.rate_limiter import RateLimitManager, create_response_queue, rate_limit_policies
+from src.bot.sharding import shard_options
+from src.bot.startup import StartupTimer
+from src.bot.trmnl import load_prepared_docs
 
-if not os.path.isfile(f"{os.path.realpath(os.path.dirname(__file__))}/config.json"):
-    sys.exit("'config.json' not found! Please add it and try again.")
-else:
-    with open(f"{os.path.realpath(os.path.dirname(__file__))}/config.json") as file:
-        config = json.load(file)
+CONFIG_PATH = f"{os.path.realpath(os.path.dirname(__file__))}/config.json"
 
-# Setup intents with message content enabled
-intents = discord.Intents.default()
-intents.message_content = True
+# Loaded concurrently by setup_hook; a failing extension is reported and skipped
+EXTENSIONS = (
+    "src.bot.trmnl",  # docs commands, /search, /doc and admin commands
+    "src.bot.feeds",  # blog feed poller; idle unless "feeds" is configured
+)
 
-class DiscordBot(commands.Bot):
-    def __init__(self) -> None:
+def load_config(path: str = CONFIG_PATH) -> dict:
+    """Read config.json; every option has a default, so a missing file only warns"""
+    if not os.path.isfile(path):
+        print("'config.json' not found, starting with default settings.")
+        return {}
+    try:
+        with open(path) as file:
+            config = json.load(file)
+    except ValueError as e:
+        sys.exit(f"'config.json' is not valid JSON: {e}")
+    if not isinstance(config, dict):
+        sys.exit("'config.json' must contain an object.")
+    return config
+
+class DiscordBot(commands.AutoShardedBot):
+    def __init__(self, config: dict, startup: Optional[StartupTimer] = None) -> None:
+        # Cogs read these again; a bad entry must stop startup, not leave trmnl unloaded
+        rate_limit_policies(config)
+        create_response_queue(config)
+        # One rate limiter for the whole bot, fed by every HTTP response
+        rate_limiter = RateLimitManager(backend=create_backend(config), breaker=create_breaker(config))
+        self.rate_limit_trace = RateLimitTrace(rate_limiter)
         super().__init__(
             command_prefix="!",
-            intents=intents,
             help_command=None,
+            http_trace=self.rate_limit_trace.trace_config(),
+            **gateway_options(config),
+            **shard_options(config),
         )
         self.config = config
+        self.rate_limiter = rate_limiter
+        self.metrics = MetricsRegistry()
+        self.metrics_server = None
+        # Per guild, per day command usage behind /usage; written in batches off the event loop
+        self.analytics = create_analytics(config)
+        self.startup = startup or StartupTimer()
+        self.preloaded_docs = None
+
+    async def start(self, token: str, *, reconnect: bool = True) -> None:
+        # Read and index docs.json in a worker thread while logging in; trmnl's setup awaits it
+        self.preloaded_docs = asyncio.get_running_loop().run_in_executor(None, load_prepared_docs)
+        try:
+            await super().start(token, reconnect=reconnect)
+        finally:
+            # Still set if login failed before the extensions were loaded
+            pending, self.preloaded_docs = self.preloaded_docs, None
+            if pending is not None and not pending.cancel() and not pending.cancelled():
+                pending.exception()  # retrieve it, so it is not logged as never retrieved
+
+    async def login(self, token: str) -> None:
+        # discord.py calls setup_hook from login, which ends this phase
+        self.startup.begin("login")
+        try:
+            await super().login(token)
+        finally:
+            self.startup.end("login")
 
     async def setup_hook(self) -> None:
         """
         This will just be executed when the bot starts the first time.
         """
+        self.startup.end("login")
         print(f"Logged in as {self.user.name}")
         print(f"discord.py API version: {discord.__version__}")
         print(f"Python version: {platform.python_version()}")
         print("-------------------")
-        
-        # Load trmnl.py with our article command
-        await self.load_extension("src.bot.trmnl")
 
-load_dotenv()
-bot = DiscordBot()
-bot.run(os.getenv("DISCORD_TOKEN"))
\ No newline at end of file
+        # Localized doc command names and descriptions are read from the commands at sync time
+        await self.tree.set_translator(DocsTranslator())
+
+        if self.analytics is not None:
+            self.analytics.start()
+
+        with self.startup.phase("extensions"):
+            await self.load_extensions()
+
+        # Prometheus endpoint, e.g. "metrics": {"host": "127.0.0.1", "port": 9108}
+        metrics_config = self.config.get("metrics")
+        if metrics_config:
+            self.metrics_server = MetricsServer(
+                self.metrics,
+                host=metrics_config.get("host", "127.0.0.1"),
+                port=int(metrics_config.get("port", 9108)),
+            )
+            try:
+                await self.metrics_server.start()
+                print(f"Serving metrics on http://{self.metrics_server.host}:{self.metrics_server.port}/metrics")
+            except OSError as e:
+                print(f"Could not start metrics server: {e}")
+                self.metrics_server = None
+
+    async def load_extensions(self) -> None:
+        """Load every extension concurrently, reporting failures instead of aborting startup"""
+        async def load(name: str) -> None:
+            with self.startup.phase(name):
+                await self.load_extension(name)
+
+        results = await asyncio.gather(*(load(name) for name in EXTENSIONS), return_exceptions=True)
+        for name, result in zip(EXTENSIONS, results):
+            if isinstance(result, Exception):
+                print(f"Failed to load extension {name}: {result!r}")
+
+    async def close(self) -> None:
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+        if self.analytics is not None:
+            await self.analytics.close()
+        await super().close()
+
+    async def on_shard_ready(self, shard_id: int) -> None:
+        guilds = sum(1 for guild in self.guilds if guild.shard_id == shard_id)
+        print(f"Shard {shard_id} ready with {guilds} guilds")
+
+    async def on_ready(self) -> None:
+        if self.startup.mark_ready():
+            print(self.startup.report())
+
+def main() -> None:
+    startup = StartupTimer()
+    with startup.phase("config"):
+        load_dotenv()
+        config = load_config()
+        try:
+            # Validates the gateway, sharding, rate limit and queue options up front
+            bot = DiscordBot(config, startup)
+        except ValueError as e:
+            sys.exit(f"Invalid config.json: {e}")
+    bot.run(os.getenv("DISCORD_TOKEN"))
+
+if __name__ == "__main__":
+    main()
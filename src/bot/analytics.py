@@ -0,0 +1,265 @@
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+ANALYTICS_PATH = Path(__file__).parents[2] / "analytics.db"
+DAY = 86_400  # rollups are per UTC day, stored as days since the epoch
+DIRECT_MESSAGES = 0  # guild id recorded for commands used outside a guild
+PRUNE_INTERVAL = 3600.0  # seconds between deletions of expired raw events
+
+# Outcome of a command, also the index of its count in a rollup row
+OK = 0
+ERROR = 1
+RATE_LIMITED = 2
+
+class UsageEvent:
+    """One handled command"""
+    __slots__ = ("timestamp", "command", "guild_id", "outcome")
+
+    def __init__(self, timestamp: float, command: str, guild_id: int, outcome: int):
+        self.timestamp = timestamp
+        self.command = command
+        self.guild_id = guild_id
+        self.outcome = outcome
+
+class CommandUsage:
+    """A command's counts over the days asked for"""
+    __slots__ = ("command", "calls", "errors", "rate_limited")
+
+    def __init__(self, command: str, calls: int, errors: int, rate_limited: int):
+        self.command = command
+        self.calls = calls
+        self.errors = errors
+        self.rate_limited = rate_limited
+
+class AnalyticsStore:
+    """
+    Usage events in a SQLite database in WAL mode. Raw events are appended to
+    `events` and kept for `retention_days`; every batch also adds its counts
+    to `daily_usage` (day, guild, command) in the same transaction, so
+    queries read the rollups instead of scanning events. Safe to use from
+    several threads.
+    """
+    def __init__(self, path: Path, retention_days: int = 30, clock: Callable[[], float] = time.time):
+        self.path = str(path)
+        self.retention_days = retention_days
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._pruned_at = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use, so a bot that never handles a command creates no file
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "timestamp REAL NOT NULL, command TEXT NOT NULL, guild_id INTEGER NOT NULL, outcome INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS daily_usage ("
+                "day INTEGER NOT NULL, guild_id INTEGER NOT NULL, command TEXT NOT NULL, "
+                "calls INTEGER NOT NULL, errors INTEGER NOT NULL, rate_limited INTEGER NOT NULL, "
+                "PRIMARY KEY (day, guild_id, command)) WITHOUT ROWID"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def write(self, events: List[UsageEvent]) -> None:
+        """Append a batch of events and add it to the daily rollups in one transaction"""
+        rollups: Dict[Tuple[int, int, str], List[int]] = {}
+        for event in events:
+            counts = rollups.setdefault((int(event.timestamp // DAY), event.guild_id, event.command), [0, 0, 0])
+            counts[event.outcome] += 1
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO events (timestamp, command, guild_id, outcome) VALUES (?, ?, ?, ?)",
+                    [(event.timestamp, event.command, event.guild_id, event.outcome) for event in events],
+                )
+                conn.executemany(
+                    "INSERT INTO daily_usage (day, guild_id, command, calls, errors, rate_limited) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(day, guild_id, command) DO UPDATE SET "
+                    "calls = calls + excluded.calls, errors = errors + excluded.errors, "
+                    "rate_limited = rate_limited + excluded.rate_limited",
+                    [(day, guild_id, command, sum(counts), counts[ERROR], counts[RATE_LIMITED])
+                     for (day, guild_id, command), counts in rollups.items()],
+                )
+                now = self.clock()
+                if now - self._pruned_at >= PRUNE_INTERVAL:
+                    conn.execute("DELETE FROM events WHERE timestamp < ?", (now - self.retention_days * DAY,))
+                    self._pruned_at = now
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def usage(self, since_day: int, guild_id: Optional[int] = None, limit: int = 15) -> List[CommandUsage]:
+        """Busiest commands from `since_day` on, in one guild or all of them"""
+        query = "SELECT command, SUM(calls), SUM(errors), SUM(rate_limited) FROM daily_usage WHERE day >= ?"
+        params: List[Any] = [since_day]
+        if guild_id is not None:
+            query += " AND guild_id = ?"
+            params.append(guild_id)
+        query += " GROUP BY command ORDER BY SUM(calls) DESC, command LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._connection().execute(query, params).fetchall()
+        return [CommandUsage(*row) for row in rows]
+
+    def daily_calls(self, since_day: int, guild_id: Optional[int] = None) -> Dict[int, int]:
+        """Calls per day from `since_day` on, as {day: calls}"""
+        query = "SELECT day, SUM(calls) FROM daily_usage WHERE day >= ?"
+        params: List[Any] = [since_day]
+        if guild_id is not None:
+            query += " AND guild_id = ?"
+            params.append(guild_id)
+        query += " GROUP BY day ORDER BY day"
+        with self._lock:
+            return dict(self._connection().execute(query, params).fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+class AnalyticsSink:
+    """
+    Append-only usage log in front of an AnalyticsStore. record() only
+    appends to an in-memory buffer; a background task writes the buffer in
+    batches of `batch_size` from a worker thread, every `flush_interval`
+    seconds or as soon as a full batch is waiting.
+
+    At most `max_pending` events wait in memory. If the store falls that far
+    behind, new events are dropped and counted in `dropped` instead of
+    slowing down commands, and a failed batch goes back in front of the
+    buffer as far as it fits.
+    """
+    def __init__(
+        self,
+        store: AnalyticsStore,
+        batch_size: int = 500,
+        flush_interval: float = 10.0,
+        max_pending: int = 50_000,
+        clock: Callable[[], float] = time.time
+    ):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max(self.batch_size, max_pending)
+        self.clock = clock
+        self.pending: Deque[UsageEvent] = deque()
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed_batches = 0
+        self._flush_lock = asyncio.Lock()
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, command: str, guild_id: Optional[int], outcome: int = OK) -> bool:
+        """
+        Buffer one handled command
+        Returns: False if the buffer is full and the event was dropped
+        """
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self.pending.append(UsageEvent(self.clock(), command, guild_id or DIRECT_MESSAGES, outcome))
+        self.recorded += 1
+        if len(self.pending) >= self.batch_size and self._batch_ready is not None:
+            self._batch_ready.set()
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._batch_ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Write the events buffered so far, batch by batch
+        Returns: number of events written
+        """
+        loop = asyncio.get_running_loop()
+        written = 0
+        async with self._flush_lock:
+            # Events recorded meanwhile wait for the next flush, so a busy bot can't keep this going
+            left = len(self.pending)
+            while left > 0 and self.pending:
+                batch = [self.pending.popleft() for _ in range(min(self.batch_size, left, len(self.pending)))]
+                left -= len(batch)
+                try:
+                    await loop.run_in_executor(None, self.store.write, batch)
+                except Exception as e:
+                    print(f"Could not write usage analytics: {e}")
+                    self.failed_batches += 1
+                    self._requeue(batch)
+                    break
+                written += len(batch)
+        self.written += written
+        return written
+
+    def _requeue(self, batch: List[UsageEvent]) -> None:
+        room = max(0, self.max_pending - len(self.pending))
+        kept = batch[len(batch) - room:] if room < len(batch) else batch
+        self.dropped += len(batch) - len(kept)
+        self.pending.extendleft(reversed(kept))
+
+    async def close(self) -> None:
+        """Stop the background task and write what is left"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(None, self.store.close)
+
+def create_analytics(config: Any) -> Optional[AnalyticsSink]:
+    """
+    Build the usage log from the bot config, e.g.
+    "analytics": {"path": "analytics.db", "batch_size": 500, "flush_interval": 10, "max_pending": 50000, "retention_days": 30}
+    Enabled by default; "analytics": {"enabled": false} turns it off. A relative
+    path is opened from the working directory; without one the log is kept
+    next to the bot's other state files.
+    """
+    options = config.get("analytics") if isinstance(config, dict) else None
+    options = options or {}
+    if not options.get("enabled", True):
+        return None
+    store = AnalyticsStore(
+        Path(options.get("path", ANALYTICS_PATH)),
+        retention_days=int(options.get("retention_days", 30)),
+    )
+    return AnalyticsSink(
+        store,
+        batch_size=int(options.get("batch_size", 500)),
+        flush_interval=float(options.get("flush_interval", 10.0)),
+        max_pending=int(options.get("max_pending", 50_000)),
+    )
@@ -0,0 +1,123 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+import difflib
+import hashlib
+
+# The fuzzy fallback runs on the event loop for every keystroke, so it is
+# limited to inputs of a few characters and a bounded number of names
+FUZZY_MIN_LENGTH = 3
+FUZZY_CANDIDATES = 100
+FUZZY_CUTOFF = 0.6
+
+class Topic:
+    """Something /doc can show: a docs entry (by command) or a single link"""
+    __slots__ = ("key", "name", "command", "url")
+
+    def __init__(self, key: str, name: str, command: Optional[str] = None, url: Optional[str] = None):
+        self.key = key
+        self.name = name
+        self.command = command
+        self.url = url
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def link_key(name: str, url: str) -> str:
+    """
+    Autocomplete value for a link. It stays the same across docs reloads,
+    fits Discord's 100 character limit and tells apart links sharing a name.
+    """
+    return "l:" + hashlib.sha1(f"{name}\n{url}".encode()).hexdigest()[:16]
+
+class TopicIndex:
+    """
+    Prefix index over every docs title and link name, for autocomplete.
+
+    Every topic is stored under its full name and under each later word of
+    its name, in one sorted array, so a prefix lookup is a binary search
+    followed by a short scan. Fuzzy matching only runs when the prefix
+    search finds nothing, over at most FUZZY_CANDIDATES precomputed names
+    of a length that could match.
+    """
+    def __init__(self, topics: List[Topic]):
+        self.topics = topics
+        self.by_key = {topic.key: topic for topic in topics}
+        self.by_name: Dict[str, Topic] = {}
+        entries: List[Tuple[str, int]] = []
+        for position, topic in enumerate(topics):
+            normalized = _normalize(topic.name)
+            self.by_name.setdefault(normalized, topic)
+            words = normalized.split(" ")
+            for start in range(len(words)):
+                entries.append((" ".join(words[start:]), position))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.positions = [position for _, position in entries]
+        self.names = list(self.by_name)
+        # First letter -> names, to keep the fuzzy fallback's candidate list short
+        self.names_by_initial: Dict[str, List[str]] = {}
+        for name in self.names:
+            self.names_by_initial.setdefault(name[:1], []).append(name)
+
+    @classmethod
+    def build(cls, docs_data: Dict[str, Any]) -> "TopicIndex":
+        topics: List[Topic] = []
+        seen_links = set()
+        for name, doc in docs_data["docs"].items():
+            topics.append(Topic(f"d:{name}", doc["title"], command=name))
+        link_groups = [doc.get("links", {}) for doc in docs_data["docs"].values()]
+        link_groups += [category["links"] for category in docs_data["categories"].values()]
+        for links in link_groups:
+            for link_name, url in links.items():
+                if (link_name, url) in seen_links:
+                    continue
+                seen_links.add((link_name, url))
+                topics.append(Topic(link_key(link_name, url), link_name, url=url))
+        return cls(topics)
+
+    def suggest(self, text: str, limit: int = 25) -> List[Topic]:
+        """Topics whose name, or a word in it, starts with `text`; fuzzy matches if there are none"""
+        prefix = _normalize(text)
+        if not prefix:
+            return self.topics[:limit]
+
+        results: List[Topic] = []
+        seen = set()
+        keys = self.keys
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and len(results) < limit and keys[i].startswith(prefix):
+            position = self.positions[i]
+            if position not in seen:
+                seen.add(position)
+                results.append(self.topics[position])
+            i += 1
+
+        if not results and len(prefix) >= FUZZY_MIN_LENGTH:
+            # Typos: fall back to similarity over the precomputed names,
+            # trying names with the same first letter before all of them
+            matches = self._close_matches(prefix, self.names_by_initial.get(prefix[0], []), limit)
+            if not matches:
+                matches = self._close_matches(prefix, self.names, limit)
+            results = [self.by_name[name] for name in matches]
+        return results
+
+    @staticmethod
+    def _close_matches(text: str, names: List[str], limit: int) -> List[str]:
+        # Names much shorter or longer than the input can never reach the cutoff
+        shortest = len(text) * FUZZY_CUTOFF / (2 - FUZZY_CUTOFF)
+        longest = len(text) * (2 - FUZZY_CUTOFF) / FUZZY_CUTOFF
+        candidates = []
+        for name in names:
+            if shortest <= len(name) <= longest:
+                candidates.append(name)
+                if len(candidates) == FUZZY_CANDIDATES:
+                    break
+        return difflib.get_close_matches(text, candidates, n=limit, cutoff=FUZZY_CUTOFF)
+
+    def resolve(self, value: str) -> Optional[Topic]:
+        """Topic for a selected autocomplete value, or the best match for free text"""
+        topic = self.by_key.get(value) or self.by_name.get(_normalize(value))
+        if topic is None:
+            matches = self.suggest(value, limit=1)
+            topic = matches[0] if matches else None
+        return topic
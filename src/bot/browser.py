@@ -0,0 +1,93 @@
+import discord
+from typing import Any, List, Optional, Sequence
+
+# What a page belongs to, the first part of its custom_id
+DOC = "d"
+CATEGORY = "c"
+# Button slots, so both buttons have a unique custom_id even when disabled
+PREVIOUS = "p"
+NEXT = "n"
+CATEGORY_MENU_ID = "trmnl:category"
+MENU_OPTIONS = 25  # Discord's limit for one select menu
+MENU_CHUNK = MENU_OPTIONS - 2  # categories per menu, leaving room for the previous and more options
+
+class PageButton(discord.ui.DynamicItem[discord.ui.Button], template=r"trmnl:page:(?P<kind>[dc]):(?P<key>[-_a-z0-9]{1,32}):(?P<page>[0-9]{1,4}):(?P<slot>[pn])"):
+    """
+    Previous or next button of a doc or category browser. The page it opens
+    is encoded in its custom_id, so clicks are routed without any state kept
+    per message, including after a restart.
+    """
+    def __init__(self, kind: str, key: str, page: int, slot: str, disabled: bool = False):
+        super().__init__(discord.ui.Button(
+            label="Previous" if slot == PREVIOUS else "Next",
+            style=discord.ButtonStyle.secondary,
+            custom_id=f"trmnl:page:{kind}:{key}:{page}:{slot}",
+            disabled=disabled,
+        ))
+        self.kind = kind
+        self.key = key
+        self.page = page
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: Any) -> "PageButton":
+        return cls(match["kind"], match["key"], int(match["page"]), match["slot"])
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        await _show_page(interaction, self.kind, self.key, self.page)
+
+class CategoryMenu(discord.ui.DynamicItem[discord.ui.Select], template=r"trmnl:category"):
+    """Select menu opening the first page of a docs.json category"""
+    def __init__(self, options: Sequence[discord.SelectOption]):
+        super().__init__(discord.ui.Select(
+            custom_id=CATEGORY_MENU_ID,
+            placeholder="Browse a category",
+            options=list(options[:MENU_OPTIONS]),
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Select, match: Any) -> "CategoryMenu":
+        return cls(item.options)
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        await _show_page(interaction, CATEGORY, self.item.values[0], 0)
+
+async def _show_page(interaction: discord.Interaction, kind: str, key: str, page: int) -> None:
+    # The trmnl cog owns the page tables; it may be reloaded between sending and clicking
+    cog = interaction.client.get_cog("trmnl")
+    if cog is None:
+        await interaction.response.send_message("The docs are not available right now.", ephemeral=True)
+        return
+    await cog.show_page(interaction, kind, key, page)
+
+def menu_options(menu: Sequence[discord.SelectOption], key: Optional[str] = None) -> List[discord.SelectOption]:
+    """
+    The category menu shown with a page. Past 25 categories the menu shows the
+    chunk of categories holding `key`, plus options opening the first category
+    of the previous and the next chunk, which show their own chunk in turn.
+    """
+    if len(menu) <= MENU_OPTIONS:
+        return list(menu)
+    values = [option.value for option in menu]
+    start = values.index(key) // MENU_CHUNK * MENU_CHUNK if key in values else 0
+    options = list(menu[start:start + MENU_CHUNK])
+    if start:
+        options.insert(0, discord.SelectOption(label="Previous categories…", value=values[start - MENU_CHUNK]))
+    if start + MENU_CHUNK < len(menu):
+        options.append(discord.SelectOption(label="More categories…", value=values[start + MENU_CHUNK]))
+    return options
+
+def browser_view(
+    kind: str,
+    key: str,
+    page: int,
+    page_count: int,
+    menu: Sequence[discord.SelectOption] = ()
+) -> discord.ui.View:
+    """Paging buttons (if there are several pages) and the category menu for one page"""
+    view = discord.ui.View(timeout=None)
+    if page_count > 1:
+        view.add_item(PageButton(kind, key, max(page - 1, 0), PREVIOUS, disabled=page == 0))
+        view.add_item(PageButton(kind, key, min(page + 1, page_count - 1), NEXT, disabled=page >= page_count - 1))
+    if menu:
+        view.add_item(CategoryMenu(menu_options(menu, key if kind == CATEGORY else None)))
+    return view
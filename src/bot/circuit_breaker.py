@@ -0,0 +1,189 @@
+from enum import Enum
+from typing import Any, Callable, Optional, Tuple
+import time
+
+# Discord bans an IP through Cloudflare after 10,000 invalid requests (401, 403, 404, 429) in 10 minutes
+INVALID_REQUEST_LIMIT = 10_000
+INVALID_REQUEST_WINDOW = 600.0
+
+class CircuitState(Enum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+class SlidingWindowCounter:
+    """
+    Events in the last `window` seconds, estimated from the counts of the
+    current and the previous fixed window: the previous count is weighted by
+    how much of it the sliding window still overlaps.
+    """
+    __slots__ = ("window", "started", "current", "previous")
+
+    def __init__(self, window: float, now: float):
+        self.window = window
+        self.started = now
+        self.current = 0
+        self.previous = 0
+
+    def _roll(self, now: float) -> None:
+        elapsed = now - self.started
+        if elapsed < self.window:
+            return
+        windows = int(elapsed // self.window)
+        self.previous = self.current if windows == 1 else 0
+        self.current = 0
+        self.started += windows * self.window
+
+    def add(self, now: float, count: int = 1) -> None:
+        self._roll(now)
+        self.current += count
+
+    def count(self, now: float) -> float:
+        self._roll(now)
+        overlap = 1.0 - (now - self.started) / self.window
+        return self.previous * overlap + self.current
+
+class InvalidRequestBreaker:
+    """
+    Circuit breaker on Discord's invalid request limit. Outgoing calls ask
+    allow() first; critical ones (responses to interactions) always pass.
+
+    closed     everything is sent. Above `shed_at` of the limit, a growing
+               share of non-critical calls is shed, reaching all of them at
+               `open_at`, where the circuit opens.
+    open       non-critical calls are shed for `cooldown` seconds, then the
+               circuit goes half-open.
+    half_open  up to `probes` non-critical calls are let through. Any invalid
+               response reopens the circuit. Once the probes succeed, it
+               closes if the windowed count is below `open_at`, otherwise
+               the next round of probes starts. Only the responses to the
+               probes themselves count (see admit()), not those to critical
+               calls; a probe that ends without a verdict frees its slot.
+    """
+    def __init__(
+        self,
+        limit: int = INVALID_REQUEST_LIMIT,
+        window: float = INVALID_REQUEST_WINDOW,
+        shed_at: float = 0.5,
+        open_at: float = 0.8,
+        cooldown: float = 30.0,
+        probes: int = 5,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if not 0 < shed_at < open_at:
+            raise ValueError("shed_at must be positive and below open_at")
+        self.limit = limit
+        self.shed_threshold = limit * shed_at
+        self.open_threshold = limit * open_at
+        self.cooldown = cooldown
+        self.probes = probes
+        # Suggested wait for a call shed outside the open state
+        self.retry_after = 1.0
+        self.clock = clock
+        self.counter = SlidingWindowCounter(window, clock())
+        self._state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self.probes_left = 0
+        self.probe_successes = 0
+        # Share of non-critical calls let through while shedding, accumulated
+        self._credit = 0.0
+        self.shed = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state is CircuitState.OPEN and self.clock() >= self.opened_at + self.cooldown:
+            self._half_open()
+        return self._state
+
+    @property
+    def invalid_requests(self) -> float:
+        """Invalid responses in the sliding window"""
+        return self.counter.count(self.clock())
+
+    def _open(self, now: float) -> None:
+        self._state = CircuitState.OPEN
+        self.opened_at = now
+        self.opened += 1
+
+    def _half_open(self) -> None:
+        self._state = CircuitState.HALF_OPEN
+        self.probes_left = self.probes
+        self.probe_successes = 0
+
+    def record_invalid(self) -> CircuitState:
+        now = self.clock()
+        self.counter.add(now)
+        state = self.state
+        if state is CircuitState.HALF_OPEN or (state is CircuitState.CLOSED and self.counter.count(now) >= self.open_threshold):
+            self._open(now)
+        return self._state
+
+    def record_success(self, probe: bool = False) -> None:
+        """A valid response; only those to probes count toward closing a half-open circuit"""
+        if not probe or self.state is not CircuitState.HALF_OPEN:
+            return
+        self.probe_successes += 1
+        if self.probe_successes < self.probes:
+            return
+        if self.counter.count(self.clock()) < self.open_threshold:
+            self._state = CircuitState.CLOSED
+            self._credit = 0.0
+        else:
+            self._half_open()
+
+    def record_inconclusive_probe(self) -> None:
+        """A probe ended without a verdict (a server error or no response): let another call probe instead"""
+        if self.state is CircuitState.HALF_OPEN:
+            self.probes_left = min(self.probes, self.probes_left + 1)
+
+    def allow(self, critical: bool = False) -> Optional[float]:
+        """
+        Ask to send one outgoing call
+        Returns: None if it can be sent, float seconds to wait if it is shed
+        """
+        return self.admit(critical)[0]
+
+    def admit(self, critical: bool = False) -> Tuple[Optional[float], bool]:
+        """
+        Like allow(), also telling whether the call goes out as a probe of
+        the half-open circuit; report its response with probe=True
+        Returns: (None or seconds to wait, probe)
+        """
+        if critical:
+            return None, False
+        state = self.state
+        if state is CircuitState.OPEN:
+            self.shed += 1
+            return self.opened_at + self.cooldown - self.clock(), False
+        if state is CircuitState.HALF_OPEN:
+            if self.probes_left > 0:
+                self.probes_left -= 1
+                return None, True
+            self.shed += 1
+            return self.retry_after, False
+
+        count = self.counter.count(self.clock())
+        if count < self.shed_threshold:
+            return None, False
+        self._credit += max(0.0, (self.open_threshold - count) / (self.open_threshold - self.shed_threshold))
+        if self._credit >= 1.0:
+            self._credit -= 1.0
+            return None, False
+        self.shed += 1
+        return self.retry_after, False
+
+def create_breaker(config: Any) -> InvalidRequestBreaker:
+    """
+    Build the breaker from the bot config, e.g.
+    "circuit_breaker": {"shed_at": 0.5, "open_at": 0.8, "cooldown": 30, "probes": 5}
+    """
+    options = config.get("circuit_breaker") if isinstance(config, dict) else None
+    if not options:
+        return InvalidRequestBreaker()
+    return InvalidRequestBreaker(
+        shed_at=float(options.get("shed_at", 0.5)),
+        open_at=float(options.get("open_at", 0.8)),
+        cooldown=float(options.get("cooldown", 30.0)),
+        probes=int(options.get("probes", 5)),
+    )
@@ -0,0 +1,71 @@
+import discord
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import time
+
+class PostedResponse:
+    """A public response recently posted to a channel"""
+    __slots__ = ("expires_at", "content", "jump_url", "interaction")
+
+    def __init__(self, expires_at: float, content: Any, jump_url: Optional[str], interaction: Any):
+        self.expires_at = expires_at
+        self.content = content
+        self.jump_url = jump_url
+        self.interaction = interaction
+
+class ResponseCoalescer:
+    """
+    Remembers which content was posted to which channel, so identical
+    requests within `window` seconds can be pointed at the existing message
+    instead of posting it again.
+    """
+    def __init__(self, window: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.clock = clock
+        # (channel ID, content key) -> PostedResponse, oldest first
+        self.posted: Dict[Tuple[int, Hashable], PostedResponse] = OrderedDict()
+        self.sent = 0
+        self.coalesced = 0
+
+    def _prune(self, now: float) -> None:
+        posted = self.posted
+        while posted:
+            key, oldest = next(iter(posted.items()))
+            if oldest.expires_at > now:
+                return
+            del posted[key]
+
+    def lookup(self, channel_id: Optional[int], key: Hashable, content: Any) -> Optional[PostedResponse]:
+        """The still-fresh response with the same content in this channel, counted as coalesced"""
+        if not self.window or channel_id is None:
+            return None
+        now = self.clock()
+        self._prune(now)
+        entry = self.posted.get((channel_id, key))
+        if entry is None or entry.content is not content:
+            return None
+        self.coalesced += 1
+        return entry
+
+    def record(self, channel_id: Optional[int], key: Hashable, content: Any, result: Any, interaction: Any) -> None:
+        """Remember a response that was just posted publicly"""
+        self.sent += 1
+        if not self.window or channel_id is None:
+            return
+        # discord.py >= 2.5 returns the created message as `resource`
+        message = getattr(result, "resource", result)
+        jump_url = getattr(message, "jump_url", None)
+        entry_key = (channel_id, key)
+        self.posted.pop(entry_key, None)
+        self.posted[entry_key] = PostedResponse(self.clock() + self.window, content, jump_url, interaction)
+
+    async def resolve_url(self, entry: PostedResponse) -> Optional[str]:
+        """Link to the posted message, fetched once from its interaction if needed"""
+        if entry.jump_url is None and entry.interaction is not None:
+            try:
+                message = await entry.interaction.original_response()
+                entry.jump_url = message.jump_url
+            except (discord.HTTPException, discord.ClientException):
+                pass
+            entry.interaction = None
+        return entry.jump_url
@@ -0,0 +1,120 @@
+import discord
+from discord import app_commands
+from pathlib import Path
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import os
+
+GLOBAL_SCOPE = "global"
+
+def command_hash(command: app_commands.Command, tree: app_commands.CommandTree) -> str:
+    """Stable hash of a command's serialized definition"""
+    try:
+        payload = command.to_dict(tree)
+    except TypeError:
+        # discord.py < 2.4 does not take the tree argument
+        payload = command.to_dict()
+    # Localizations are only added to the payload by the tree's translator at sync time
+    extras = getattr(command, "extras", None)
+    localizations = extras.get("localizations") if isinstance(extras, dict) else None
+    if localizations:
+        payload = dict(payload, localizations=localizations)
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class SyncDiff:
+    """Difference between the last synced manifest and the current tree"""
+    def __init__(self, added: List[str], removed: List[str], changed: List[str], first_sync: bool = False):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.first_sync = first_sync
+
+    @property
+    def has_changes(self) -> bool:
+        return self.first_sync or bool(self.added or self.removed or self.changed)
+
+class SyncResult:
+    """Outcome of CommandSyncer.sync"""
+    def __init__(self, scope: str, diff: SyncDiff, synced: Optional[list], total: int):
+        self.scope = scope
+        self.diff = diff
+        self.synced = synced
+        self.total = total
+
+    @property
+    def pushed(self) -> bool:
+        return self.synced is not None
+
+class CommandSyncer:
+    """
+    Syncs the command tree only when a command definition changed.
+    A manifest of per-command hashes for every scope (global or a guild ID)
+    is kept on disk and updated after each successful push. It is read and
+    written in an executor, one sync at a time.
+    """
+    def __init__(self, tree: app_commands.CommandTree, manifest_path: Path):
+        self.tree = tree
+        self.manifest_path = Path(manifest_path)
+        # A sync reads, pushes and writes the manifest; another one in between would lose its entry
+        self._syncing = asyncio.Lock()
+
+    def load_manifest(self) -> Dict[str, Dict[str, str]]:
+        """Blocking; run it in an executor when called from the event loop"""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable sync manifest: {e}")
+            return {}
+
+    def save_manifest(self, manifest: Dict[str, Dict[str, str]]) -> None:
+        """Blocking; run it in an executor when called from the event loop"""
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def snapshot(self, guild: Optional[discord.abc.Snowflake] = None) -> Dict[str, str]:
+        """Hash every command registered for the scope"""
+        return {
+            command.name: command_hash(command, self.tree)
+            for command in self.tree.get_commands(guild=guild)
+        }
+
+    @staticmethod
+    def diff(previous: Optional[Dict[str, str]], current: Dict[str, str]) -> SyncDiff:
+        if previous is None:
+            return SyncDiff(sorted(current), [], [], first_sync=True)
+        return SyncDiff(
+            added=sorted(current.keys() - previous.keys()),
+            removed=sorted(previous.keys() - current.keys()),
+            changed=sorted(
+                name for name in current.keys() & previous.keys()
+                if current[name] != previous[name]
+            ),
+        )
+
+    async def sync(self, guild: Optional[discord.abc.Snowflake] = None, force: bool = False) -> SyncResult:
+        """
+        Push the scope's commands to Discord if they changed since the last sync.
+        Returns a SyncResult whose synced list is None when nothing was pushed.
+        """
+        scope = GLOBAL_SCOPE if guild is None else str(guild.id)
+        loop = asyncio.get_running_loop()
+        async with self._syncing:
+            manifest = await loop.run_in_executor(None, self.load_manifest)
+            current = self.snapshot(guild)
+            diff = self.diff(manifest.get(scope), current)
+
+            if not diff.has_changes and not force:
+                return SyncResult(scope, diff, None, len(current))
+
+            synced = await self.tree.sync(guild=guild)
+            manifest[scope] = current
+            await loop.run_in_executor(None, self.save_manifest, manifest)
+        return SyncResult(scope, diff, synced, len(current))
@@ -0,0 +1,135 @@
+from pathlib import Path
+from typing import Any, Dict, Set, Tuple
+import hashlib
+import json
+import os
+import re
+from .locales import SUPPORTED_LOCALES
+
+# Discord slash command names: 1-32 lowercase word characters or dashes
+COMMAND_NAME = re.compile(r"^[-_a-z0-9]{1,32}$")
+# Localized names may use lowercase letters of any script
+LOCALIZED_COMMAND_NAME = re.compile(r"^[-_\w]{1,32}$")
+
+class DocsValidationError(ValueError):
+    """Raised when docs.json does not match the expected schema"""
+
+class DocsSnapshot:
+    """A parsed and validated docs.json together with the file state it came from"""
+    __slots__ = ("data", "digest", "stat")
+
+    def __init__(self, data: Dict[str, Any], digest: str, stat: Tuple[int, int]):
+        self.data = data
+        self.digest = digest
+        self.stat = stat
+
+def file_stat(path: Path) -> Tuple[int, int]:
+    """Cheap change marker for a file: (mtime in ns, size)"""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+def _require(condition: bool, message: str) -> None:
+    if not condition:
+        raise DocsValidationError(message)
+
+def _validate_links(links: Any, where: str) -> None:
+    _require(isinstance(links, dict), f"{where}.links must be an object")
+    for name, url in links.items():
+        _require(isinstance(url, str) and bool(url), f"{where}.links[{name!r}] must be a non-empty string")
+
+def validate_docs(data: Any) -> None:
+    """Check the structure of docs.json, raising DocsValidationError on the first problem"""
+    _require(isinstance(data, dict), "docs.json must contain an object")
+    categories = data.get("categories")
+    docs = data.get("docs")
+    _require(isinstance(categories, dict), "'categories' must be an object")
+    _require(isinstance(docs, dict), "'docs' must be an object")
+
+    for key, category in categories.items():
+        where = f"categories.{key}"
+        # Category keys are part of the doc browser's custom_ids, see browser.py
+        _require(bool(COMMAND_NAME.match(key)), f"{where} is not a valid category key")
+        _require(isinstance(category, dict), f"{where} must be an object")
+        _require(isinstance(category.get("title"), str), f"{where}.title must be a string")
+        _validate_links(category.get("links"), where)
+        commands = category.get("commands", [])
+        _require(isinstance(commands, list), f"{where}.commands must be a list")
+        for name in commands:
+            _require(isinstance(name, str) and bool(COMMAND_NAME.match(name)),
+                     f"{where}.commands contains invalid command name {name!r}")
+
+    for name, doc in docs.items():
+        where = f"docs.{name}"
+        _require(bool(COMMAND_NAME.match(name)), f"{where} is not a valid command name")
+        _require(isinstance(doc, dict), f"{where} must be an object")
+        for field in ("title", "content"):
+            _require(isinstance(doc.get(field), str), f"{where}.{field} must be a string")
+        if "description" in doc:
+            _require(isinstance(doc["description"], str) and 0 < len(doc["description"]) <= 100,
+                     f"{where}.description must be 1-100 characters")
+        if "links" in doc:
+            _validate_links(doc["links"], where)
+        else:
+            _require(doc.get("category") in categories,
+                     f"{where} needs either links or an existing category")
+
+    locales = data.get("locales", {})
+    _require(isinstance(locales, dict), "'locales' must be an object")
+    commands = set(docs).union(*(category.get("commands", ()) for category in categories.values()))
+    for locale, overrides in locales.items():
+        _validate_locale(locale, overrides, categories, commands)
+
+def _validate_locale(locale: str, overrides: Any, categories: Dict[str, Any], commands: Set[str]) -> None:
+    where = f"locales.{locale}"
+    _require(locale in SUPPORTED_LOCALES, f"{where} is not a Discord locale")
+    _require(isinstance(overrides, dict), f"{where} must be an object")
+    localized_categories = overrides.get("categories", {})
+    localized_docs = overrides.get("docs", {})
+    _require(isinstance(localized_categories, dict), f"{where}.categories must be an object")
+    _require(isinstance(localized_docs, dict), f"{where}.docs must be an object")
+
+    for key, category in localized_categories.items():
+        entry = f"{where}.categories.{key}"
+        _require(key in categories, f"{entry} is not a category")
+        _require(isinstance(category, dict), f"{entry} must be an object")
+        _require(isinstance(category.get("title", ""), str), f"{entry}.title must be a string")
+        if "links" in category:
+            _validate_links(category["links"], entry)
+
+    for name, doc in localized_docs.items():
+        entry = f"{where}.docs.{name}"
+        _require(name in commands, f"{entry} is not a doc command")
+        _require(isinstance(doc, dict), f"{entry} must be an object")
+        for field in ("title", "content"):
+            _require(isinstance(doc.get(field, ""), str), f"{entry}.{field} must be a string")
+        if "description" in doc:
+            _require(isinstance(doc["description"], str) and 0 < len(doc["description"]) <= 100,
+                     f"{entry}.description must be 1-100 characters")
+        if "name" in doc:
+            localized_name = doc["name"]
+            _require(isinstance(localized_name, str) and bool(LOCALIZED_COMMAND_NAME.match(localized_name))
+                     and localized_name == localized_name.lower(), f"{entry}.name is not a valid command name")
+        if "links" in doc:
+            _validate_links(doc["links"], entry)
+
+def load_docs(path: Path) -> DocsSnapshot:
+    """
+    Read, parse and validate docs.json.
+    Blocking; run it in an executor when called from the event loop.
+    """
+    stat = file_stat(path)
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return parse_docs(raw, stat)
+
+def parse_docs(raw: bytes, stat: Tuple[int, int]) -> DocsSnapshot:
+    """Parse and validate the bytes of docs.json, read when the file had this stat"""
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise DocsValidationError(f"docs.json is not valid JSON: {e}") from e
+    validate_docs(data)
+    return DocsSnapshot(data, docs_digest(raw), stat)
+
+def docs_digest(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
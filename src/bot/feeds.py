@@ -0,0 +1,261 @@
+import discord
+from discord.ext import tasks
+import aiohttp
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import xml.etree.ElementTree as ET
+import asyncio
+import json
+import os
+import time
+from .rate_limiter import RateLimitedCog
+
+FEED_STATE_PATH = Path(__file__).parents[2] / "feed_state.json"
+POLL_INTERVAL = 900.0  # seconds between feed checks
+MAX_BACKOFF = 6 * 3600.0  # longest wait after repeated failures
+FETCH_TIMEOUT = 30.0
+SEEN_LIMIT = 500  # entry IDs remembered for deduplication
+FEED_LINKS = 10  # newest posts shown in the docs category
+# Discord allows about 5 messages per 5 seconds per channel
+POST_LIMIT = 5
+POST_PER = 5.0
+EMBED_COLOR = 0xBEBEFE
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+class FeedError(ValueError):
+    """Raised when a feed cannot be parsed"""
+
+class FeedEntry:
+    """One post from an RSS or Atom feed"""
+    __slots__ = ("id", "title", "url", "published")
+
+    def __init__(self, id: str, title: str, url: str, published: str = ""):
+        self.id = id
+        self.title = title
+        self.url = url
+        self.published = published
+
+def _text(element: Optional[ET.Element], tag: str) -> str:
+    child = element.find(tag) if element is not None else None
+    return (child.text or "").strip() if child is not None else ""
+
+def parse_feed(body: bytes) -> List[FeedEntry]:
+    """Entries of an RSS 2.0 or Atom feed, in feed order (usually newest first)"""
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError as e:
+        raise FeedError(f"Feed is not valid XML: {e}") from e
+
+    entries: List[FeedEntry] = []
+    if root.tag == f"{ATOM}feed":
+        for item in root.iter(f"{ATOM}entry"):
+            url = ""
+            for link in item.findall(f"{ATOM}link"):
+                if link.get("rel", "alternate") == "alternate":
+                    url = link.get("href", "")
+                    break
+            published = _text(item, f"{ATOM}published") or _text(item, f"{ATOM}updated")
+            entries.append(FeedEntry(_text(item, f"{ATOM}id") or url, _text(item, f"{ATOM}title"), url, published))
+    elif root.tag == "rss":
+        for item in root.iter("item"):
+            url = _text(item, "link")
+            entries.append(FeedEntry(_text(item, "guid") or url, _text(item, "title"), url, _text(item, "pubDate")))
+    else:
+        raise FeedError(f"Unsupported feed format: {root.tag}")
+    return [entry for entry in entries if entry.id and entry.url]
+
+class FeedState:
+    """
+    What the poller remembers across restarts: IDs of entries already seen,
+    the newest posts for the docs category, and the feed's validators for
+    conditional requests.
+    """
+    def __init__(
+        self,
+        seen: Iterable[str] = (),
+        latest: Optional[Dict[str, str]] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        # Insertion ordered, oldest first
+        self.seen: Dict[str, None] = dict.fromkeys(seen)
+        self.latest = latest or {}
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @classmethod
+    def load(cls, path: Path) -> "FeedState":
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable feed state: {e}")
+            return cls()
+        return cls(data.get("seen", []), data.get("latest"), data.get("etag"), data.get("last_modified"))
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        data = {"seen": list(self.seen), "latest": self.latest, "etag": self.etag, "last_modified": self.last_modified}
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, path)
+
+    def mark_seen(self, ids: Iterable[str]) -> None:
+        for entry_id in ids:
+            self.seen[entry_id] = None
+        while len(self.seen) > SEEN_LIMIT:
+            del self.seen[next(iter(self.seen))]
+
+class feeds(RateLimitedCog):
+    """
+    Polls the TRMNL blog feed, announces new posts in the configured
+    channels and lists the newest posts in a docs.json category.
+
+    Configured in config.json, e.g.
+    "feeds": {"url": "https://usetrmnl.com/feed", "channels": [123], "interval": 900, "category": "blog"}
+    The URL may also be a local file path.
+    """
+    def __init__(self, bot, clock: Callable[[], float] = time.monotonic) -> None:
+        super().__init__(bot)
+        self.bot = bot
+        config = getattr(bot, "config", None)
+        options = config.get("feeds", {}) if isinstance(config, dict) else {}
+        self.url: Optional[str] = options.get("url")
+        self.channel_ids: List[int] = [int(channel_id) for channel_id in options.get("channels", [])]
+        self.category: str = options.get("category", "blog")
+        self.interval = float(options.get("interval", POLL_INTERVAL))
+        self.clock = clock
+        self.state = FeedState.load(FEED_STATE_PATH)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self.posted = 0
+
+    async def cog_load(self) -> None:
+        if not self.url:
+            return
+        self.poll_feed.change_interval(seconds=self.interval)
+        self.poll_feed.start()
+
+    async def cog_unload(self) -> None:
+        self.poll_feed.cancel()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    @tasks.loop(seconds=POLL_INTERVAL)
+    async def poll_feed(self) -> None:
+        """Check the feed, backing off exponentially while it keeps failing"""
+        if self.clock() < self.retry_at:
+            return
+        try:
+            await self.poll()
+        except Exception as e:
+            self.failures += 1
+            delay = min(self.interval * 2 ** self.failures, MAX_BACKOFF)
+            self.retry_at = self.clock() + delay
+            print(f"Feed poll failed ({e!r}), retrying in {delay:.0f}s")
+        else:
+            self.failures = 0
+            self.retry_at = 0.0
+
+    @poll_feed.before_loop
+    async def before_poll_feed(self) -> None:
+        # Extensions load concurrently: wait until the trmnl cog can take the saved links
+        await self.bot.wait_until_ready()
+        if self.state.latest:
+            await self.publish_links(self.state.latest)
+
+    async def fetch(self) -> Optional[Tuple[bytes, Optional[str], Optional[str]]]:
+        """
+        The feed body with its ETag and Last-Modified validators, or None if
+        it has not changed since the last fetch. The validators are only
+        stored once the body was handled, see poll.
+        """
+        loop = asyncio.get_running_loop()
+        if "://" not in self.url:
+            body = await loop.run_in_executor(None, Path(self.url).read_bytes)
+            return body, None, None
+
+        if self.session is None:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT))
+        headers = {}
+        if self.state.etag:
+            headers["If-None-Match"] = self.state.etag
+        if self.state.last_modified:
+            headers["If-Modified-Since"] = self.state.last_modified
+        async with self.session.get(self.url, headers=headers) as response:
+            if response.status == 304:
+                return None
+            response.raise_for_status()
+            body = await response.read()
+            return body, response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    async def poll(self) -> List[FeedEntry]:
+        """
+        Fetch the feed once and announce entries not seen before.
+        The first poll only records what is already there, so the backlog is not reposted.
+        Entries are marked seen, and the validators kept, only once they were
+        announced, so a poll that fails part way is retried in full.
+        Returns: the new entries
+        """
+        fetched = await self.fetch()
+        if fetched is None:
+            return []
+        body, etag, last_modified = fetched
+        loop = asyncio.get_running_loop()
+        entries = await loop.run_in_executor(None, parse_feed, body)
+
+        first_poll = not self.state.seen
+        new = [entry for entry in entries if entry.id not in self.state.seen]
+        if new:
+            self.state.latest = {entry.title[:256]: entry.url for entry in entries[:FEED_LINKS]}
+            try:
+                await self.publish_links(self.state.latest)
+            except Exception as e:
+                # The docs are republished with the links on their next reload
+                print(f"Could not list new feed posts in the docs: {e!r}")
+            if not first_poll:
+                for entry in reversed(new):  # oldest first
+                    await self.announce(entry)
+            self.state.mark_seen(entry.id for entry in new)
+        self.state.etag = etag
+        self.state.last_modified = last_modified
+        await loop.run_in_executor(None, self.state.save, FEED_STATE_PATH)
+        return [] if first_poll else new
+
+    async def publish_links(self, links: Dict[str, str]) -> None:
+        """List the newest posts in the docs category, via the trmnl cog"""
+        docs_cog = self.bot.get_cog("trmnl")
+        if docs_cog is not None:
+            await docs_cog.set_extra_links(self.category, links)
+
+    async def announce(self, entry: FeedEntry) -> None:
+        """Post an entry to every configured channel, within each channel's rate limit"""
+        embed = discord.Embed(title=entry.title[:256], url=entry.url, description="New on the TRMNL blog", color=EMBED_COLOR)
+        for channel_id in self.channel_ids:
+            channel = self.bot.get_channel(channel_id)
+            if channel is None:
+                print(f"Feed channel {channel_id} not found")
+                continue
+            # With the HTTP trace attached, the send itself takes the global request
+            include_global = not self.rate_limiter.traced
+            while True:
+                retry_after = self.rate_limiter.check_scoped_rate_limit(
+                    "feed", channel_id, POST_LIMIT, POST_PER, include_global=include_global
+                )
+                if not retry_after:
+                    break
+                await asyncio.sleep(retry_after)
+            try:
+                await channel.send(embed=embed)
+                self.posted += 1
+            except discord.HTTPException as e:
+                print(f"Could not post feed entry to {channel_id}: {e}")
+
+async def setup(bot) -> None:
+    await bot.add_cog(feeds(bot))
@@ -0,0 +1,48 @@
+import discord
+from typing import Any, Dict
+
+PROFILES = ("lean", "default")
+
+def gateway_options(config: Any) -> Dict[str, Any]:
+    """
+    Client keyword arguments for gateway intents and caches, from the
+    "gateway" config, e.g.
+    "gateway": {"profile": "lean", "intents": {"voice_states": true}, "max_messages": null, "member_cache": false}
+
+    The "lean" profile (used when nothing is configured) only subscribes to
+    guild events and caches no messages or members: slash commands carry
+    everything they need in the interaction. "default" is discord.py's own
+    default intents and caches. "intents", "max_messages", "member_cache"
+    and "chunk_guilds" override the profile.
+    """
+    options = config.get("gateway", {}) if isinstance(config, dict) else {}
+    profile = options.get("profile", "lean")
+    if profile == "lean":
+        intents = discord.Intents.none()
+        intents.guilds = True  # guild and channel cache, used to resolve feed channels
+        max_messages = None
+        member_cache = False
+    elif profile == "default":
+        intents = discord.Intents.default()
+        max_messages = 1000
+        member_cache = True
+    else:
+        raise ValueError(f"gateway: unknown profile {profile!r}, expected one of {', '.join(PROFILES)}")
+
+    for name, enabled in options.get("intents", {}).items():
+        if name not in discord.Intents.VALID_FLAGS:
+            raise ValueError(f"gateway: unknown intent {name!r}")
+        setattr(intents, name, bool(enabled))
+    max_messages = options.get("max_messages", max_messages)
+    if options.get("member_cache", member_cache):
+        member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+    else:
+        member_cache_flags = discord.MemberCacheFlags.none()
+
+    return {
+        "intents": intents,
+        "max_messages": max_messages,
+        "member_cache_flags": member_cache_flags,
+        # Nothing uses the member list, so don't download it for every guild at startup
+        "chunk_guilds_at_startup": bool(options.get("chunk_guilds", False)),
+    }
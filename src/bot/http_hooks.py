@@ -0,0 +1,156 @@
+import aiohttp
+from collections import OrderedDict
+from typing import Dict
+import asyncio
+import re
+from .rate_limiter import RateLimitManager
+
+# Path segments whose ID is a "major parameter": Discord gives every value its own bucket
+MAJOR_PARAMETERS = ("channels", "guilds", "webhooks")
+
+# Responses Discord counts towards the Cloudflare invalid request limit
+INVALID_STATUSES = frozenset((401, 403, 404, 429))
+
+# REST API requests; the same session also opens the gateway websocket and fetches from the CDN
+API_PATH = re.compile(r"/api/v\d+/")
+
+def is_api_route(path: str) -> bool:
+    """Only REST API requests count towards Discord's rate limits"""
+    return API_PATH.match(path) is not None
+
+def route_key(method: str, path: str) -> str:
+    """
+    Normalize a request path to the route it is rate limited under, e.g.
+    GET /api/v10/channels/1/messages/2 -> GET /api/v10/channels/1/messages/:id
+    """
+    parts = path.split("/")
+    for i in range(1, len(parts)):
+        if parts[i].isdigit() and parts[i - 1] not in MAJOR_PARAMETERS:
+            parts[i] = ":id"
+        elif i >= 2 and parts[i - 2] == "interactions":
+            parts[i] = ":token"
+    return f"{method} {'/'.join(parts)}"
+
+def major_parameters(path: str) -> str:
+    """
+    The part of a path Discord keeps separate buckets for: the channel or
+    guild ID, or the ID and token of a webhook or interaction
+    """
+    parts = path.split("/")
+    for i, part in enumerate(parts):
+        if part in ("channels", "guilds"):
+            return "/".join(parts[i:i + 2])
+        if part in ("webhooks", "interactions"):
+            return "/".join(parts[i:i + 3])
+    return ""
+
+def is_interaction_route(path: str) -> bool:
+    """Interaction responses and followups are exempt from the global rate limit"""
+    parts = path.split("/")
+    for i, part in enumerate(parts):
+        if part == "interactions":
+            return True
+        if part == "webhooks":
+            # /webhooks/{application_id}/{interaction_token}/...
+            return len(parts) > i + 2
+    return False
+
+class RateLimitTrace:
+    """
+    aiohttp tracing hooks that connect discord.py's HTTP client to a
+    RateLimitManager. Response headers update the manager's buckets, and
+    requests wait for their bucket before being sent, so they are
+    scheduled ahead of time instead of running into 429s.
+
+    Invalid responses feed the manager's circuit breaker. While it sheds,
+    requests the bot makes on its own (posts, fetches, syncs) wait;
+    interaction responses are critical and are always sent.
+
+    Other requests on the session, such as gateway connects and CDN
+    downloads, are left alone.
+    """
+    def __init__(self, manager: RateLimitManager, max_routes: int = 4096):
+        self.manager = manager
+        manager.traced = True
+        self.max_routes = max_routes
+        # Route key -> Discord bucket hash, least recently used first
+        self.routes: Dict[str, str] = OrderedDict()
+        self.delayed_requests = 0
+        self.held_requests = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self.on_request_start)
+        trace_config.on_request_end.append(self.on_request_end)
+        trace_config.on_request_exception.append(self.on_request_exception)
+        return trace_config
+
+    async def on_request_start(self, session, context, params: aiohttp.TraceRequestStartParams) -> None:
+        path = params.url.path
+        if not is_api_route(path):
+            return
+        if not is_interaction_route(path):
+            context.probe = await self.wait_for_circuit()
+        bucket = self.routes.get(route_key(params.method, path), "")
+        if not bucket and is_interaction_route(path):
+            return
+        major = major_parameters(path)
+        if bucket and major:
+            bucket = f"{bucket}:{major}"
+
+        delayed = False
+        while True:
+            if bucket and is_interaction_route(path):
+                retry_after = self.manager.check_bucket(bucket)
+            else:
+                retry_after = self.manager.check_rate_limit(bucket)
+            if not retry_after:
+                break
+            delayed = True
+            await asyncio.sleep(retry_after)
+        if delayed:
+            self.delayed_requests += 1
+
+    async def wait_for_circuit(self) -> bool:
+        """
+        Hold a non-critical request until the circuit breaker lets it through
+        Returns: True if it goes out as a probe of the half-open circuit
+        """
+        held = False
+        while True:
+            retry_after, probe = self.manager.admit_request()
+            if retry_after is None:
+                break
+            held = True
+            await asyncio.sleep(retry_after)
+        if held:
+            self.held_requests += 1
+        return probe
+
+    async def on_request_end(self, session, context, params: aiohttp.TraceRequestEndParams) -> None:
+        if not is_api_route(params.url.path):
+            return
+        response = params.response
+        headers = response.headers
+        self.manager.update_rate_limits(headers, major_parameters(params.url.path))
+
+        bucket = headers.get("X-RateLimit-Bucket")
+        if bucket:
+            key = route_key(params.method, params.url.path)
+            self.routes[key] = bucket
+            self.routes.move_to_end(key)
+            if len(self.routes) > self.max_routes:
+                self.routes.popitem(last=False)
+
+        status = response.status
+        probe = getattr(context, "probe", False)
+        if status in INVALID_STATUSES and not (status == 429 and headers.get("X-RateLimit-Scope") == "shared"):
+            self.manager.track_invalid_request()
+        elif status < 400:
+            self.manager.track_success(probe)
+        elif probe:
+            self.manager.track_inconclusive_probe()
+
+    async def on_request_exception(self, session, context, params: aiohttp.TraceRequestExceptionParams) -> None:
+        if getattr(context, "probe", False):
+            self.manager.track_inconclusive_probe()
@@ -0,0 +1,269 @@
+"""
+Offline ingestion of the pages linked from docs.json.
+
+Fetches every linked page with a shared, concurrency-limited aiohttp
+session and writes the page titles and summaries to a JSON content store
+that the trmnl cog loads with docs.json. Validators (ETag, Last-Modified)
+are kept per page, so a re-crawl sends conditional GETs and skips pages
+that have not changed.
+
+Run from the repository root, then use /reload_docs:
+    python -m src.bot.ingest
+"""
+import aiohttp
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from .docs_loader import load_docs
+
+DOCS_PATH = Path(__file__).parents[2] / "docs.json"
+CONTENT_STORE_PATH = Path(__file__).parents[2] / "content_store.json"
+STORE_VERSION = 1
+SUMMARY_LENGTH = 300
+CONCURRENCY = 8
+TIMEOUT = 15.0  # seconds per page
+USER_AGENT = "TRMNL-Discord-Bot docs ingestion"
+
+def collect_urls(docs_data: Dict[str, Any]) -> List[str]:
+    """Every distinct http(s) link in docs.json, in file order"""
+    link_groups = [doc.get("links", {}) for doc in docs_data["docs"].values()]
+    link_groups += [category["links"] for category in docs_data["categories"].values()]
+    urls: Dict[str, None] = {}
+    for links in link_groups:
+        for url in links.values():
+            if url.startswith(("http://", "https://")):
+                urls.setdefault(url, None)
+    return list(urls)
+
+def _shorten(text: str, length: int = SUMMARY_LENGTH) -> str:
+    text = " ".join(text.split())
+    if len(text) <= length:
+        return text
+    return text[:length - 1].rsplit(" ", 1)[0] + "…"
+
+class PageExtractor(HTMLParser):
+    """Pulls the title and a short summary out of an HTML page"""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.meta: Dict[str, str] = {}
+        self.paragraphs: List[str] = []
+        self._in_title = False
+        self._paragraph: Optional[List[str]] = None
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "title":
+            self._in_title = True
+        elif tag == "p":
+            self._paragraph = []
+        elif tag == "meta":
+            values = dict(attrs)
+            key = values.get("property") or values.get("name")
+            if key and values.get("content"):
+                self.meta.setdefault(key.lower(), values["content"])
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title":
+            self._in_title = False
+        elif tag == "p" and self._paragraph is not None:
+            text = " ".join("".join(self._paragraph).split())
+            if text:
+                self.paragraphs.append(text)
+            self._paragraph = None
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data
+        elif self._paragraph is not None:
+            self._paragraph.append(data)
+
+def extract_page(html: str) -> Tuple[str, str]:
+    """(title, summary) of a page: Open Graph and meta tags first, then <title> and the first paragraph"""
+    parser = PageExtractor()
+    parser.feed(html)
+    parser.close()
+    title = parser.meta.get("og:title") or parser.title
+    summary = (
+        parser.meta.get("og:description")
+        or parser.meta.get("description")
+        or (parser.paragraphs[0] if parser.paragraphs else "")
+    )
+    return _shorten(title, 256), _shorten(summary)
+
+class ContentStore:
+    """
+    Crawled page data keyed by URL: title, summary, content hash and the
+    validators for the next conditional GET.
+    """
+    def __init__(self, pages: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def load(cls, path: Path) -> "ContentStore":
+        """Blocking; a missing or unreadable store is treated as empty"""
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return cls()
+        except OSError as e:
+            print(f"Ignoring unreadable content store: {e}")
+            return cls()
+        return cls.parse(raw)
+
+    @classmethod
+    def parse(cls, raw: bytes) -> "ContentStore":
+        """The store from the bytes of its file; empty if they are unreadable"""
+        if not raw:
+            return cls()
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            print(f"Ignoring unreadable content store: {e}")
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != STORE_VERSION:
+            return cls()
+        return cls(data.get("pages", {}))
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": STORE_VERSION, "pages": self.pages}, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    @property
+    def digest(self) -> str:
+        """Hash of the crawled content, for cache invalidation"""
+        encoded = json.dumps(
+            {url: [page.get("title"), page.get("summary")] for url, page in self.pages.items()},
+            sort_keys=True
+        )
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def prune(self, urls: Iterable[str]) -> List[str]:
+        """Drop pages no longer linked from docs.json"""
+        keep = set(urls)
+        removed = [url for url in self.pages if url not in keep]
+        for url in removed:
+            del self.pages[url]
+        return removed
+
+class CrawlResult:
+    """Outcome of one crawl, as lists of URLs"""
+    def __init__(self):
+        self.fetched: List[str] = []
+        self.unchanged: List[str] = []
+        self.failed: List[str] = []
+        self.removed: List[str] = []
+
+    def __str__(self) -> str:
+        return (f"{len(self.fetched)} fetched, {len(self.unchanged)} unchanged, "
+                f"{len(self.failed)} failed, {len(self.removed)} removed")
+
+async def _fetch_page(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    url: str,
+    store: ContentStore,
+    result: CrawlResult
+) -> None:
+    previous = store.pages.get(url)
+    headers = {}
+    if previous is not None:
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+    async with semaphore:
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and previous is not None:
+                    result.unchanged.append(url)
+                    return
+                if response.status != 200:
+                    print(f"Skipping {url}: HTTP {response.status}")
+                    result.failed.append(url)
+                    return
+                body = await response.read()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                charset = response.charset or "utf-8"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Skipping {url}: {e!r}")
+            result.failed.append(url)
+            return
+
+    content_hash = hashlib.sha256(body).hexdigest()
+    if previous is not None and previous.get("sha256") == content_hash:
+        # The server ignored the validators but the page is the same
+        previous.update(etag=etag, last_modified=last_modified)
+        result.unchanged.append(url)
+        return
+
+    title, summary = extract_page(body.decode(charset, errors="replace"))
+    store.pages[url] = {
+        "title": title,
+        "summary": summary,
+        "sha256": content_hash,
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": int(time.time()),
+    }
+    result.fetched.append(url)
+
+async def crawl(
+    urls: List[str],
+    store: ContentStore,
+    concurrency: int = CONCURRENCY,
+    session: Optional[aiohttp.ClientSession] = None
+) -> CrawlResult:
+    """
+    Fetch `urls` into `store`, at most `concurrency` at a time.
+    Pages that fail keep their previous entry; pages not in `urls` are removed.
+    """
+    result = CrawlResult()
+    semaphore = asyncio.Semaphore(concurrency)
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=concurrency),
+            timeout=aiohttp.ClientTimeout(total=TIMEOUT),
+            headers={"User-Agent": USER_AGENT},
+        )
+    try:
+        await asyncio.gather(*(_fetch_page(session, semaphore, url, store, result) for url in urls))
+    finally:
+        if own_session:
+            await session.close()
+    result.removed = store.prune(urls)
+    return result
+
+async def ingest(docs_path: Path, store_path: Path, concurrency: int = CONCURRENCY) -> CrawlResult:
+    """Crawl everything linked from docs.json and update the content store on disk"""
+    snapshot = load_docs(docs_path)
+    store = ContentStore.load(store_path)
+    result = await crawl(collect_urls(snapshot.data), store, concurrency)
+    store.save(store_path)
+    return result
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Crawl the pages linked from docs.json into the content store")
+    parser.add_argument("--docs", type=Path, default=DOCS_PATH, help="path to docs.json")
+    parser.add_argument("--store", type=Path, default=CONTENT_STORE_PATH, help="content store to update")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="pages fetched at once")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    result = asyncio.run(ingest(args.docs, args.store, args.concurrency))
+    print(f"Crawled in {time.perf_counter() - start:.1f}s: {result}")
+
+if __name__ == "__main__":
+    main()
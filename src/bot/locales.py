@@ -0,0 +1,129 @@
+import discord
+from discord import app_commands
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+import json
+import os
+
+# docs.json is written in English; other languages are overrides under "locales"
+DEFAULT_LOCALE = discord.Locale.american_english.value
+SUPPORTED_LOCALES = frozenset(locale.value for locale in discord.Locale)
+
+def localize_docs(docs_data: Dict[str, Any], locale: str) -> Dict[str, Any]:
+    """
+    Return docs.json data in one locale: the locale's category and docs
+    overrides laid over the English entries, field by field. Commands that
+    only exist in a category get a docs entry when the locale describes them.
+    """
+    overrides = docs_data.get("locales", {}).get(locale)
+    if not overrides:
+        return docs_data
+    categories = dict(docs_data["categories"])
+    for key, category in overrides.get("categories", {}).items():
+        categories[key] = dict(categories[key], **category)
+
+    docs = dict(docs_data["docs"])
+    for name, doc in overrides.get("docs", {}).items():
+        base = docs.get(name)
+        if base is None:
+            key = next(key for key, category in categories.items() if name in category.get("commands", ()))
+            base = {"title": categories[key]["title"], "content": "", "category": key}
+        docs[name] = dict(base, **doc)
+    return dict(docs_data, categories=categories, docs=docs)
+
+def command_localizations(docs_data: Dict[str, Any], specs: Mapping[str, str]) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """
+    Localized names and descriptions of the doc commands, as
+    {command: {"name": {locale: name}, "description": {locale: description}}}.
+    Only strings that differ from the English ones are listed.
+    """
+    localizations: Dict[str, Dict[str, Dict[str, str]]] = {}
+    for locale, overrides in docs_data.get("locales", {}).items():
+        localized = localize_docs(docs_data, locale)
+        for name in overrides.get("docs", {}):
+            if name not in specs:
+                continue
+            doc = localized["docs"][name]
+            entry = localizations.setdefault(name, {"name": {}, "description": {}})
+            if doc.get("name", name) != name:
+                entry["name"][locale] = doc["name"]
+            description = (doc.get("description") or doc["title"])[:100]
+            if description != specs[name]:
+                entry["description"][locale] = description
+    return {name: entry for name, entry in localizations.items() if entry["name"] or entry["description"]}
+
+class DocsTranslator(app_commands.Translator):
+    """
+    Reads the localized names and descriptions the trmnl cog stores on each
+    generated doc command (command.extras["localizations"]) when the command
+    tree is synced.
+    """
+    async def translate(
+        self,
+        string: app_commands.locale_str,
+        locale: discord.Locale,
+        context: app_commands.TranslationContext
+    ) -> Optional[str]:
+        if context.location is app_commands.TranslationContextLocation.command_name:
+            field = "name"
+        elif context.location is app_commands.TranslationContextLocation.command_description:
+            field = "description"
+        else:
+            return None
+        localizations = context.data.extras.get("localizations")
+        if not localizations:
+            return None
+        return localizations[field].get(locale.value)
+
+class LocalePreferences:
+    """Docs language chosen per user and per guild, persisted as JSON"""
+    def __init__(self, users: Optional[Dict[int, str]] = None, guilds: Optional[Dict[int, str]] = None):
+        self.users = users or {}
+        self.guilds = guilds or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "LocalePreferences":
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable locale preferences: {e}")
+            return cls()
+        return cls(
+            {int(user_id): locale for user_id, locale in data.get("users", {}).items()},
+            {int(guild_id): locale for guild_id, locale in data.get("guilds", {}).items()},
+        )
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        data = {
+            "users": {str(user_id): locale for user_id, locale in self.users.items()},
+            "guilds": {str(guild_id): locale for guild_id, locale in self.guilds.items()},
+        }
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, path)
+
+    def set(self, table: Dict[int, str], key: int, locale: Optional[str]) -> None:
+        """Set a user's or guild's locale; None clears it"""
+        if locale is None:
+            table.pop(key, None)
+        else:
+            table[key] = locale
+
+    def resolve(self, interaction: discord.Interaction, available: Mapping[str, Any]) -> str:
+        """
+        The locale to answer an interaction in: the user's choice, then the
+        guild's, then the user's Discord language if the docs have it
+        """
+        if len(available) == 1:
+            return DEFAULT_LOCALE  # English only, nothing to choose from
+        locale = self.users.get(interaction.user.id)
+        if locale is None and interaction.guild_id is not None:
+            locale = self.guilds.get(interaction.guild_id)
+        if locale is None:
+            locale = getattr(interaction.locale, "value", None)
+        return locale if locale in available else DEFAULT_LOCALE
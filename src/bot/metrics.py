@@ -0,0 +1,167 @@
+from aiohttp import web
+from typing import Callable, Dict, List, Optional, Tuple
+import time
+
+# Sub-buckets per power of two: latencies are kept to within 1/16 (~6%)
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+QUANTILES = (0.5, 0.9, 0.99)
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of durations, in whole microseconds.
+
+    Values below 16µs get a bucket each; above that every power of two is
+    split into 16 equal buckets, so recording is a few integer operations
+    and the relative error stays below ~6% from microseconds to hours.
+    """
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (SUB_BUCKETS * 28)  # up to ~2^31µs (35 minutes)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @staticmethod
+    def bucket_index(micros: int) -> int:
+        if micros < SUB_BUCKETS:
+            return micros
+        shift = micros.bit_length() - SUB_BUCKET_BITS - 1
+        return shift * SUB_BUCKETS + (micros >> shift)
+
+    @staticmethod
+    def bucket_upper(index: int) -> int:
+        """Largest value, in microseconds, recorded in bucket `index`"""
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        return ((index - shift * SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        # bucket_index, inlined: this runs once per command
+        micros = int(seconds * 1_000_000)
+        if micros < SUB_BUCKETS:
+            index = micros
+        else:
+            shift = micros.bit_length() - SUB_BUCKET_BITS - 1
+            index = (shift << SUB_BUCKET_BITS) + (micros >> shift)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, quantile: float) -> float:
+        """Duration in seconds that `quantile` of the recorded values do not exceed"""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(quantile * self.count + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.bucket_upper(index) / 1_000_000, self.max)
+        return self.max
+
+class CommandMetrics:
+    """Latency and outcome counters for one command"""
+    __slots__ = ("latency", "calls", "errors", "rate_limited", "invalid_requests")
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.invalid_requests = 0
+
+class MetricsRegistry:
+    """
+    Per-command metrics shared by every cog, plus gauges read at export time
+    (e.g. the rate limiter's invalid request count).
+    """
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.commands: Dict[str, CommandMetrics] = {}
+        # name -> (help text, reader)
+        self.gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self.started_at = time.monotonic()
+
+    def command(self, name: str) -> CommandMetrics:
+        metrics = self.commands.get(name)
+        if metrics is None:
+            metrics = self.commands[name] = CommandMetrics()
+        return metrics
+
+    def observe(self, name: str, seconds: float, error: bool = False) -> None:
+        """Record one finished invocation of a command"""
+        metrics = self.command(name)
+        metrics.calls += 1
+        metrics.latency.record(seconds)
+        if error:
+            metrics.errors += 1
+
+    def add_gauge(self, name: str, help_text: str, reader: Callable[[], float]) -> None:
+        self.gauges[name] = (help_text, reader)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP trmnl_command_duration_seconds Slash command handling time",
+            "# TYPE trmnl_command_duration_seconds summary",
+        ]
+        for name, metrics in sorted(self.commands.items()):
+            latency = metrics.latency
+            for quantile in QUANTILES:
+                lines.append(
+                    f'trmnl_command_duration_seconds{{command="{name}",quantile="{quantile}"}} '
+                    f"{latency.percentile(quantile):.6f}"
+                )
+            lines.append(f'trmnl_command_duration_seconds_sum{{command="{name}"}} {latency.total:.6f}')
+            lines.append(f'trmnl_command_duration_seconds_count{{command="{name}"}} {latency.count}')
+
+        for metric, attribute, help_text in (
+            ("trmnl_command_calls_total", "calls", "Slash command invocations"),
+            ("trmnl_command_errors_total", "errors", "Slash command invocations that failed"),
+            ("trmnl_command_rate_limited_total", "rate_limited", "Slash command invocations rejected by the rate limiter"),
+            ("trmnl_command_invalid_requests_total", "invalid_requests", "403 and 404 responses while handling a command"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, metrics in sorted(self.commands.items()):
+                lines.append(f'{metric}{{command="{name}"}} {getattr(metrics, attribute)}')
+
+        for name, (help_text, reader) in sorted(self.gauges.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {reader()}")
+        return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """Serves MetricsRegistry.render_prometheus at /metrics on a local port"""
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.runner: Optional[web.AppRunner] = None
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render_prometheus(), content_type="text/plain", charset="utf-8")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        if self.port == 0:
+            # Ephemeral port, e.g. in tests: report the one actually bound
+            self.port = self.runner.addresses[0][1]
+
+    async def close(self) -> None:
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
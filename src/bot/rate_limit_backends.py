@@ -0,0 +1,253 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+import math
+import os
+import sqlite3
+import threading
+import time
+
+RATE_LIMITS_PATH = Path(__file__).parents[2] / "ratelimits.db"
+# Seconds to wait when another process is leasing from the database
+BUSY_WAIT = 0.01
+# Shared TATs are stored relative to this wall clock offset to keep float precision
+CLOCK_BASE = 1_700_000_000.0
+
+def _shared_clock() -> float:
+    return time.time() - CLOCK_BASE
+
+class RateLimitBackend:
+    """
+    Storage for budgets shared by every process of the bot, such as the
+    global 50 requests per second limit. Budgets are GCRA buckets allowing
+    `limit` requests per `per` seconds, identified by name.
+    """
+    def acquire(self, key: str, limit: int, per: float) -> float:
+        """
+        Take one request from a budget
+        Returns: 0.0 if granted, otherwise seconds to wait
+        """
+        raise NotImplementedError
+
+    def remaining(self, key: str, limit: int, per: float) -> int:
+        """Requests that could be granted right now"""
+        raise NotImplementedError
+
+    def refund(self, key: str, limit: int, per: float) -> None:
+        """Give back one request taken by acquire() that was never sent (by default it is kept)"""
+
+    def close(self) -> None:
+        pass
+
+def _gcra_available(tat: float, now: float, limit: int, per: float) -> Tuple[int, float]:
+    """Requests available at `now` and the TAT to build on"""
+    interval = per / limit
+    tat = tat if tat > now else now
+    available = math.floor((per - interval - (tat - now)) / interval + 1e-6) + 1
+    return max(0, min(limit, available)), tat
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process budgets on the monotonic clock (the default), safe to use from several threads"""
+    def __init__(self):
+        self.tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, limit: int, per: float) -> float:
+        interval = per / limit
+        with self._lock:
+            now = time.monotonic()
+            tat = self.tats.get(key, now)
+            if tat < now:
+                tat = now
+            wait = tat - (per - interval) - now
+            if wait > 0:
+                return wait
+            self.tats[key] = tat + interval
+        return 0.0
+
+    def remaining(self, key: str, limit: int, per: float) -> int:
+        with self._lock:
+            now = time.monotonic()
+            return _gcra_available(self.tats.get(key, now), now, limit, per)[0]
+
+    def refund(self, key: str, limit: int, per: float) -> None:
+        with self._lock:
+            tat = self.tats.get(key)
+            if tat is not None:
+                self.tats[key] = tat - per / limit
+
+class SQLiteBackend(RateLimitBackend):
+    """
+    Budgets shared between processes through a SQLite database in WAL mode.
+
+    Processes on the same host share one wall clock, which the stored TATs
+    are based on (see CLOCK_BASE). To avoid a database transaction per
+    request, a process leases up to `lease_size` requests at once and hands
+    them out locally for at most `lease_ttl` seconds; unused leased requests
+    are discarded, so the shared budget is never exceeded. Refunds are not
+    returned to the shared budget: the request may have come from an
+    earlier lease.
+
+    acquire() is called from the event loop, so it never waits for the
+    database: leases are refilled on a background thread once half of one
+    is used, and when a lease runs out anyway, one refill is tried inline
+    without waiting for other processes to release the database.
+    """
+    def __init__(self, path: Path, lease_size: int = 5, lease_ttl: float = 0.1):
+        self.path = str(path)
+        self.lease_size = max(1, lease_size)
+        self.lease_ttl = lease_ttl
+        self._leases: Dict[str, Tuple[int, float]] = {}
+        # Shared TAT seen by the last lease, so remaining() needs no query
+        self._tats: Dict[str, float] = {}
+        self._refilling: Set[str] = set()
+        self._refiller: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._inline_conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS budgets (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+        return conn
+
+    def _check_process(self) -> None:
+        # Connections, leases and the refill thread must not be shared with forked children
+        if self._pid != os.getpid():
+            self._conn = self._inline_conn = self._refiller = None
+            self._leases.clear()
+            self._tats.clear()
+            self._refilling.clear()
+            self._pid = os.getpid()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection for the refill thread, which may wait on other processes"""
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def _inline_connection(self) -> sqlite3.Connection:
+        """Connection for acquire(), which gives up at once when the database is busy"""
+        if self._inline_conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA busy_timeout = 0")
+            self._inline_conn = conn
+        return self._inline_conn
+
+    def _lease(self, conn: sqlite3.Connection, key: str, limit: int, per: float, count: int) -> Tuple[int, float, float]:
+        """Reserve up to `count` requests in one transaction. Returns (granted, wait, shared TAT)"""
+        now = _shared_clock()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM budgets WHERE key = ?", (key,)).fetchone()
+            available, tat = _gcra_available(row[0] if row else now, now, limit, per)
+            granted = min(count, available)
+            if granted:
+                tat += granted * per / limit
+                conn.execute(
+                    "INSERT INTO budgets (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    (key, tat),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if granted:
+            return granted, 0.0, tat
+        return 0, max(tat - (per - per / limit) - now, 1e-6), tat
+
+    def _refill_later(self, key: str, limit: int, per: float) -> None:
+        # Called with the lock held
+        if key in self._refilling:
+            return
+        if self._refiller is None:
+            self._refiller = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-limit-lease")
+        self._refilling.add(key)
+        self._refiller.submit(self._refill, key, limit, per)
+
+    def _refill(self, key: str, limit: int, per: float) -> None:
+        try:
+            granted, _, tat = self._lease(self._connection(), key, limit, per, self.lease_size)
+        except sqlite3.Error as e:
+            print(f"Could not lease rate limit requests: {e}")
+            granted, tat = 0, None
+        with self._lock:
+            self._refilling.discard(key)
+            if tat is not None:
+                self._tats[key] = tat
+            if granted:
+                now = time.monotonic()
+                left, expires = self._leases.get(key, (0, 0.0))
+                self._leases[key] = ((left if now < expires else 0) + granted, now + self.lease_ttl)
+
+    def acquire(self, key: str, limit: int, per: float) -> float:
+        with self._lock:
+            self._check_process()
+            now = time.monotonic()
+            left, expires = self._leases.get(key, (0, 0.0))
+            if left and now < expires:
+                self._leases[key] = (left - 1, expires)
+                if 0 < left - 1 <= self.lease_size // 2:
+                    self._refill_later(key, limit, per)
+                return 0.0
+
+            try:
+                granted, wait, tat = self._lease(self._inline_connection(), key, limit, per, self.lease_size)
+            except sqlite3.OperationalError:
+                # Another process is leasing; let the refill thread wait for it instead
+                self._refill_later(key, limit, per)
+                return BUSY_WAIT
+            self._tats[key] = tat
+            if not granted:
+                return wait
+            self._leases[key] = (granted - 1, now + self.lease_ttl)
+            return 0.0
+
+    def remaining(self, key: str, limit: int, per: float) -> int:
+        """Requests left in the lease plus the shared budget as of the last lease, without a query"""
+        with self._lock:
+            self._check_process()
+            now = _shared_clock()
+            available = _gcra_available(self._tats.get(key, now), now, limit, per)[0]
+            left, expires = self._leases.get(key, (0, 0.0))
+            if time.monotonic() < expires:
+                available += left
+            return min(limit, available)
+
+    def close(self) -> None:
+        with self._lock:
+            refiller = self._refiller if self._pid == os.getpid() else None
+            self._refiller = None
+        if refiller is not None:
+            refiller.shutdown(wait=True)
+        with self._lock:
+            if self._pid == os.getpid():
+                for conn in (self._conn, self._inline_conn):
+                    if conn is not None:
+                        conn.close()
+            self._conn = self._inline_conn = None
+            self._leases.clear()
+            self._tats.clear()
+            self._refilling.clear()
+
+def create_backend(config: Any) -> RateLimitBackend:
+    """
+    Build the backend named in the bot config, e.g.
+    "rate_limit_backend": {"type": "sqlite", "path": "ratelimits.db", "lease_size": 5}
+    A relative path is opened from the working directory; without one the
+    database is kept next to the bot's other state files.
+    """
+    options = config.get("rate_limit_backend") if isinstance(config, dict) else None
+    if not options or options.get("type", "memory") == "memory":
+        return MemoryBackend()
+    if options["type"] == "sqlite":
+        return SQLiteBackend(
+            Path(options.get("path", RATE_LIMITS_PATH)),
+            lease_size=int(options.get("lease_size", 5)),
+            lease_ttl=float(options.get("lease_ttl", 0.1)),
+        )
+    raise ValueError(f"Unknown rate limit backend: {options['type']}")
@@ -1,36 +1,226 @@
 from discord.ext import commands
 import discord
 from discord import app_commands
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+import math
+import threading
 import time
 import asyncio
-from collections import defaultdict
+from collections import OrderedDict
+from enum import Enum
+from .analytics import ERROR, OK, RATE_LIMITED, AnalyticsSink
+from .circuit_breaker import CircuitState, InvalidRequestBreaker, create_breaker
+from .metrics import MetricsRegistry
+from .rate_limit_backends import MemoryBackend, RateLimitBackend, create_backend
+from .response_queue import DeferredResponseQueue, QueueFull
 
 class DiscordRateLimit:
-    """Represents a Discord rate limit bucket"""
-    def __init__(self, limit: int, remaining: int, reset_after: float, bucket: str):
+    """
+    Represents a Discord rate limit bucket.
+    Implemented as GCRA: the bucket stores only its theoretical arrival time
+    (TAT) on the monotonic clock, so each check is O(1) and has no window edges.
+    """
+    __slots__ = ("limit", "reset_after", "bucket", "interval", "tolerance", "tat")
+
+    def __init__(self, limit: int, remaining: int, reset_after: float, bucket: str, now: Optional[float] = None):
+        if now is None:
+            now = time.monotonic()
         self.limit = limit
-        self.remaining = remaining
         self.reset_after = reset_after
-        self.reset_at = time.time() + reset_after
         self.bucket = bucket
+        # Emission interval and burst tolerance: `limit` requests per `reset_after` seconds
+        self.interval = reset_after / limit
+        self.tolerance = reset_after - self.interval
+        if remaining <= 0:
+            # Exhausted according to Discord: nothing until the bucket resets
+            self.tat = now + reset_after + self.tolerance
+        else:
+            self.tat = now + (limit - min(remaining, limit)) * self.interval
+
+    @property
+    def remaining(self) -> int:
+        now = time.monotonic()
+        if self.interval <= 0:
+            return self.limit
+        available = math.floor((now + self.tolerance - max(self.tat, now)) / self.interval + 1e-9) + 1
+        return max(0, min(self.limit, available))
+
+    @property
+    def reset_at(self) -> float:
+        """Monotonic time at which the bucket is full again"""
+        return self.tat
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a request would be allowed, 0.0 if allowed now"""
+        tat = self.tat if self.tat > now else now
+        wait = tat - self.tolerance - now
+        return wait if wait > 0 else 0.0
+
+    def consume(self, now: float) -> None:
+        tat = self.tat if self.tat > now else now
+        self.tat = tat + self.interval
+
+class RateLimitScope(Enum):
+    """What a command's local rate limit is shared between"""
+    USER = "user"
+    CHANNEL = "channel"
+    GUILD = "guild"
+    GLOBAL = "global"
+
+class CommandRateLimit:
+    """Local rate limit policy: `limit` uses per `per` seconds for each scope key"""
+    __slots__ = ("scope", "limit", "per")
+
+    def __init__(self, scope: RateLimitScope, limit: int, per: float):
+        if limit <= 0 or per <= 0:
+            raise ValueError("Rate limit and period must be positive")
+        self.scope = scope
+        self.limit = limit
+        self.per = per
+
+    @classmethod
+    def from_config(cls, data: Dict[str, Any]) -> "CommandRateLimit":
+        return cls(
+            scope=RateLimitScope(data.get("scope", "user")),
+            limit=int(data["limit"]),
+            per=float(data["per"]),
+        )
+
+def rate_limit_policies(config: Any) -> Dict[str, CommandRateLimit]:
+    """
+    Read per-command policies from the bot config, e.g.
+    "rate_limits": {"default": {"scope": "user", "limit": 5, "per": 10}}
+    """
+    if not isinstance(config, dict):
+        return {}
+    policies: Dict[str, CommandRateLimit] = {}
+    for command, policy in config.get("rate_limits", {}).items():
+        try:
+            policies[command] = CommandRateLimit.from_config(policy)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"rate_limits: invalid policy for {command!r}: {e}")
+    return policies
+
+def create_response_queue(config: Any) -> Optional[DeferredResponseQueue]:
+    """
+    Read queue-and-defer settings from the bot config, e.g.
+    "rate_limit_queue": {"enabled": true, "max_depth": 25, "timeout": 10}
+    Returns: None unless queue mode is enabled
+    """
+    options = config.get("rate_limit_queue") if isinstance(config, dict) else None
+    if options is None or not options.get("enabled", True):
+        return None
+    try:
+        max_depth = int(options.get("max_depth", 25))
+        timeout = float(options.get("timeout", 10.0))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"rate_limit_queue: {e}")
+    if max_depth <= 0 or timeout <= 0:
+        raise ValueError("rate_limit_queue: max_depth and timeout must be positive")
+    return DeferredResponseQueue(max_depth=max_depth, timeout=timeout)
+
+# Discord error code for an interaction token that expired or was already used
+UNKNOWN_INTERACTION = 10062
+
+DEFAULT_RATE_LIMIT = CommandRateLimit(RateLimitScope.USER, limit=5, per=10.0)
+
+def scope_id(interaction: discord.Interaction, scope: RateLimitScope) -> int:
+    """ID of the user, channel or guild an interaction is limited by (0 for global)"""
+    if scope is RateLimitScope.USER:
+        return interaction.user.id
+    if scope is RateLimitScope.CHANNEL:
+        return interaction.channel_id or interaction.user.id
+    if scope is RateLimitScope.GUILD:
+        # Outside a guild, fall back to limiting the user
+        return interaction.guild_id or interaction.user.id
+    return 0
+
+class Reservation:
+    """
+    A request taken from a command's local limit and the global limit by
+    RateLimitManager.reserve(). Commit it once the response was sent, or
+    refund it if sending failed; whichever comes first settles it.
+    """
+    __slots__ = ("manager", "key", "interval", "settled")
+
+    def __init__(self, manager: "RateLimitManager", key: int, interval: float):
+        self.manager = manager
+        self.key = key
+        self.interval = interval
+        self.settled = False
+
+    def commit(self) -> None:
+        self.manager._settle(self)
+
+    def refund(self, include_global: bool = True) -> bool:
+        """
+        Give the request back to the command's limit and, unless include_global
+        is False (Discord answered, so the request counted), to the global limit.
+        Returns: False if the reservation was already settled
+        """
+        if not self.manager._settle(self):
+            return False
+        self.manager._refund(self, include_global)
+        return True
 
 class RateLimitManager:
-    def __init__(self):
-        # Global rate limit (50 requests per second per bot)
-        self.global_limit = 50
-        self.global_remaining = 50
-        self.global_reset = time.time() + 1.0
+    """
+    Discord, global and per-command rate limits. Every check-and-consume
+    runs under one lock, so the event loop and worker threads can share a
+    manager without spending the same request twice.
+    """
+    def __init__(
+        self,
+        global_limit: int = 50,
+        bucket_ttl: float = 300.0,
+        backend: Optional[RateLimitBackend] = None,
+        breaker: Optional[InvalidRequestBreaker] = None
+    ):
+        # Global rate limit (50 requests per second per bot), kept in the
+        # backend so that several processes can share it
+        self.global_limit = global_limit
+        self.backend = backend if backend is not None else MemoryBackend()
         
-        # Store rate limits by bucket ID
-        self.buckets: Dict[str, DiscordRateLimit] = {}
+        # Store rate limits by bucket ID, least recently used first.
+        # Buckets idle for `bucket_ttl` seconds past their reset are evicted.
+        self.buckets: Dict[str, DiscordRateLimit] = OrderedDict()
+        self.bucket_ttl = bucket_ttl
+
+        # Local per-command limits, keyed by one int packing the command
+        # number and the scope's snowflake, storing only the bucket's TAT.
+        self.scoped: Dict[int, float] = OrderedDict()
+        self._command_ids: Dict[str, int] = {}
         
         # Track invalid requests to prevent Cloudflare bans (10,000 per 10 minutes)
-        self.invalid_requests = 0
-        self.invalid_reset = time.time() + 600  # 10 minutes
+        self.breaker = breaker if breaker is not None else InvalidRequestBreaker()
+        # Set by RateLimitTrace, which counts every HTTP response itself
+        self.traced = False
+
+        # Never held across an await, only around the bookkeeping of one check
+        self._lock = threading.Lock()
+
+    @property
+    def global_remaining(self) -> int:
+        """Read from memory (for the SQLite backend, as of its last lease), so scrapes stay cheap"""
+        return self.backend.remaining("global", self.global_limit, 1.0)
+
+    @property
+    def invalid_requests(self) -> int:
+        """Invalid responses in the last 10 minutes"""
+        with self._lock:
+            return int(self.breaker.invalid_requests)
+
+    @property
+    def circuit_state(self) -> CircuitState:
+        with self._lock:
+            return self.breaker.state
         
-    def update_rate_limits(self, headers: Dict[str, str]) -> None:
-        """Update rate limit info from Discord response headers"""
+    def update_rate_limits(self, headers: Dict[str, str], major: str = "") -> None:
+        """
+        Update rate limit info from Discord response headers. Buckets are
+        shared between routes but not between major parameters, so the state
+        of a request with major parameters is kept under "bucket:major".
+        """
         try:
             # Get rate limit info from headers
             limit = int(headers.get('X-RateLimit-Limit', 0))
@@ -38,13 +228,17 @@ class RateLimitManager:
             reset_after = float(headers.get('X-RateLimit-Reset-After', 0))
             bucket = headers.get('X-RateLimit-Bucket', '')
             
-            if bucket and limit:
-                self.buckets[bucket] = DiscordRateLimit(
+            if bucket and limit and reset_after > 0:
+                rate_limit = DiscordRateLimit(
                     limit=limit,
                     remaining=remaining,
                     reset_after=reset_after,
                     bucket=bucket
                 )
+                key = f"{bucket}:{major}" if major else bucket
+                with self._lock:
+                    self.buckets[key] = rate_limit
+                    self.buckets.move_to_end(key)
         except (ValueError, TypeError) as e:
             print(f"Error parsing rate limit headers: {e}")
 
@@ -53,77 +247,386 @@ class RateLimitManager:
         Check if request would hit rate limit
         Returns: None if request can proceed, float seconds to wait if rate limited
         """
-        now = time.time()
-        
-        # Check global rate limit
-        if now >= self.global_reset:
-            self.global_remaining = self.global_limit
-            self.global_reset = now + 1.0
-            
-        if self.global_remaining <= 0:
-            return self.global_reset - now
-            
-        # Check bucket-specific rate limit
-        if bucket in self.buckets:
-            rate_limit = self.buckets[bucket]
-            if now >= rate_limit.reset_at:
-                rate_limit.remaining = rate_limit.limit
-                rate_limit.reset_at = now + rate_limit.reset_after
-            
-            if rate_limit.remaining <= 0:
-                return rate_limit.reset_at - now
-                
-            rate_limit.remaining -= 1
-            
-        self.global_remaining -= 1
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+
+            # Check bucket-specific rate limit
+            rate_limit = self.buckets.get(bucket)
+            if rate_limit is not None:
+                self.buckets.move_to_end(bucket)
+                wait = rate_limit.wait_time(now)
+                if wait:
+                    return wait
+
+            # Check global rate limit; this takes a request from the shared budget
+            wait = self.backend.acquire("global", self.global_limit, 1.0)
+            if wait:
+                return wait
+
+            if rate_limit is not None:
+                rate_limit.consume(now)
+            return None
+
+    def check_bucket(self, bucket: str) -> Optional[float]:
+        """
+        Check only a Discord bucket, for routes exempt from the global limit
+        Returns: None if request can proceed, float seconds to wait if rate limited
+        """
+        with self._lock:
+            rate_limit = self.buckets.get(bucket)
+            if rate_limit is None:
+                return None
+            now = time.monotonic()
+            self.buckets.move_to_end(bucket)
+            wait = rate_limit.wait_time(now)
+            if wait:
+                return wait
+            rate_limit.consume(now)
+            return None
+
+    def scoped_key(self, command: str, scope_id: int) -> int:
+        """Pack a command name and a snowflake (< 2**64) into a single int key"""
+        with self._lock:
+            return self._scoped_key(command, scope_id)
+
+    def _scoped_key(self, command: str, scope_id: int) -> int:
+        command_id = self._command_ids.get(command)
+        if command_id is None:
+            command_id = self._command_ids[command] = len(self._command_ids) + 1
+        return (command_id << 64) | scope_id
+
+    def check_scoped_rate_limit(
+        self,
+        command: str,
+        scope_id: int,
+        limit: int,
+        per: float,
+        include_global: bool = True
+    ) -> Optional[float]:
+        """
+        Check a command's local limit for one user, channel or guild, plus the
+        global limit unless include_global is False (the request is charged to
+        it elsewhere, e.g. by RateLimitTrace)
+        Returns: None if request can proceed, float seconds to wait if rate limited
+        """
+        with self._lock:
+            return self._take_scoped(self._scoped_key(command, scope_id), per / limit, per, include_global)
+
+    def reserve(self, command: str, scope_id: int, limit: int, per: float) -> Tuple[Optional[Reservation], float]:
+        """
+        Like check_scoped_rate_limit, but the request can be refunded if it is never sent
+        Returns: (reservation, 0.0) if the request can proceed, (None, seconds to wait) if rate limited
+        """
+        interval = per / limit
+        with self._lock:
+            key = self._scoped_key(command, scope_id)
+            wait = self._take_scoped(key, interval, per)
+        if wait:
+            return None, wait
+        return Reservation(self, key, interval), 0.0
+
+    def scoped_wait(self, command: str, scope_id: int, limit: int, per: float) -> float:
+        """Seconds until a command's local limit allows a request, without taking it"""
+        with self._lock:
+            key = self._scoped_key(command, scope_id)
+            now = time.monotonic()
+            tat = self.scoped.get(key, now)
+            return max(tat - (per - per / limit) - now, 0.0)
+
+    def _take_scoped(self, key: int, interval: float, per: float, include_global: bool = True) -> Optional[float]:
+        # Called with the lock held. GCRA on a bare TAT float, see DiscordRateLimit
+        now = time.monotonic()
+        self._evict_idle(now)
+        tat = self.scoped.get(key, now)
+        if tat < now:
+            tat = now
+        wait = tat - (per - interval) - now
+        if wait > 0:
+            return wait
+
+        if include_global:
+            wait = self.backend.acquire("global", self.global_limit, 1.0)
+            if wait:
+                return wait
+
+        self.scoped[key] = tat + interval
+        self.scoped.move_to_end(key)
         return None
 
+    def _settle(self, reservation: Reservation) -> bool:
+        """Mark a reservation settled; False if it already was"""
+        with self._lock:
+            if reservation.settled:
+                return False
+            reservation.settled = True
+            return True
+
+    def _refund(self, reservation: Reservation, include_global: bool) -> None:
+        with self._lock:
+            tat = self.scoped.get(reservation.key)
+            if tat is not None:  # an evicted bucket is already full
+                self.scoped[reservation.key] = tat - reservation.interval
+        if include_global:
+            self.backend.refund("global", self.global_limit, 1.0)
+
+    def _evict_idle(self, now: float, max_evictions: int = 4) -> None:
+        """Drop a few least recently used buckets that have been full for `bucket_ttl` seconds"""
+        buckets = self.buckets
+        for _ in range(max_evictions):
+            if not buckets:
+                break
+            key, oldest = next(iter(buckets.items()))
+            if oldest.tat + self.bucket_ttl > now:
+                break
+            del buckets[key]
+
+        scoped = self.scoped
+        for _ in range(max_evictions):
+            if not scoped:
+                break
+            key, tat = next(iter(scoped.items()))
+            if tat + self.bucket_ttl > now:
+                break
+            del scoped[key]
+
     def track_invalid_request(self) -> bool:
         """
         Track invalid requests to prevent Cloudflare bans
         Returns: True if requests should be paused
         """
-        now = time.time()
-        if now >= self.invalid_reset:
-            self.invalid_requests = 0
-            self.invalid_reset = now + 600
-            
-        self.invalid_requests += 1
-        return self.invalid_requests >= 10000
+        with self._lock:
+            was_open = self.breaker.opened
+            state = self.breaker.record_invalid()
+        if self.breaker.opened != was_open:
+            print("WARNING: Approaching invalid request limit, holding back non-critical requests!")
+        return state is not CircuitState.CLOSED
+
+    def track_success(self, probe: bool = False) -> None:
+        """Record a valid response; those to probes let a half-open circuit close"""
+        with self._lock:
+            self.breaker.record_success(probe)
+
+    def track_inconclusive_probe(self) -> None:
+        """Record a probe that got neither a valid nor an invalid response"""
+        with self._lock:
+            self.breaker.record_inconclusive_probe()
+
+    def allow_request(self, critical: bool = False) -> Optional[float]:
+        """
+        Ask the invalid request circuit breaker to send one request
+        Returns: None if request can proceed, float seconds to wait if it is held back
+        """
+        with self._lock:
+            return self.breaker.allow(critical)
+
+    def admit_request(self) -> Tuple[Optional[float], bool]:
+        """
+        Like allow_request() for a non-critical request, also telling whether
+        it goes out as a probe of the half-open circuit
+        """
+        with self._lock:
+            return self.breaker.admit()
 
 class RateLimitedCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.rate_limiter = RateLimitManager()
-        
-    async def handle_rate_limit(self, interaction: discord.Interaction, bucket: str) -> bool:
+        # Share the bot's manager, which also sees HTTP response headers
+        rate_limiter = getattr(bot, "rate_limiter", None)
+        if not isinstance(rate_limiter, RateLimitManager):
+            config = getattr(bot, "config", None)
+            rate_limiter = RateLimitManager(backend=create_backend(config), breaker=create_breaker(config))
+        self.rate_limiter = rate_limiter
+        # Shared command metrics, also exported by the bot's metrics endpoint
+        metrics = getattr(bot, "metrics", None)
+        if not isinstance(metrics, MetricsRegistry):
+            metrics = MetricsRegistry()
+        self.metrics = metrics
+        metrics.add_gauge("trmnl_invalid_requests", "Invalid HTTP responses in the last 10 minutes",
+                          lambda: rate_limiter.invalid_requests)
+        metrics.add_gauge("trmnl_circuit_state", "Invalid request circuit breaker: 0 closed, 1 half-open, 2 open",
+                          lambda: rate_limiter.circuit_state.value)
+        metrics.add_gauge("trmnl_circuit_shed_requests", "Non-critical requests held back by the circuit breaker",
+                          lambda: rate_limiter.breaker.shed)
+        metrics.add_gauge("trmnl_global_rate_limit_remaining", "Requests left in the global rate limit",
+                          lambda: rate_limiter.global_remaining)
+        # The bot's usage log, if it keeps one
+        usage = getattr(bot, "analytics", None)
+        self.analytics: Optional[AnalyticsSink] = usage if isinstance(usage, AnalyticsSink) else None
+        if self.analytics is not None:
+            metrics.add_gauge("trmnl_analytics_pending_events", "Usage events waiting to be written",
+                              lambda: len(usage.pending))
+            metrics.add_gauge("trmnl_analytics_dropped_events", "Usage events dropped because the buffer was full",
+                              lambda: usage.dropped)
+        self.default_rate_limit = DEFAULT_RATE_LIMIT
+        self.rate_limits: Dict[str, CommandRateLimit] = {}
+        # Queue-and-defer mode: hold rate limited interactions instead of rejecting them
+        self.defer_rate_limited = False
+        self.response_queue = DeferredResponseQueue()
+        config = getattr(bot, "config", None)
+        self.load_rate_limits(config)
+        self.load_response_queue(config)
+
+    def load_rate_limits(self, config: Any) -> None:
+        """Read per-command policies from the bot config, see rate_limit_policies"""
+        policies = rate_limit_policies(config)
+        self.default_rate_limit = policies.pop("default", self.default_rate_limit)
+        self.rate_limits = policies
+
+    def load_response_queue(self, config: Any) -> None:
+        """Read queue-and-defer settings from the bot config, see create_response_queue"""
+        response_queue = create_response_queue(config)
+        if response_queue is not None:
+            self.defer_rate_limited = True
+            self.response_queue = response_queue
+
+    async def handle_rate_limit(self, interaction: discord.Interaction, bucket: str, ephemeral: bool = False) -> bool:
         """
-        Handle rate limiting for a command interaction
+        Handle rate limiting for a command interaction. `ephemeral` is the
+        visibility of the command's response: a queued interaction is
+        deferred with it, and Discord keeps it for the response.
         Returns: True if command should proceed, False if rate limited
         """
-        # Check rate limits
-        retry_after = self.rate_limiter.check_rate_limit(bucket)
+        # Check rate limits for the command's configured scope
+        policy = self.rate_limits.get(bucket, self.default_rate_limit)
+        key_id = scope_id(interaction, policy.scope)
+        reservation: Optional[Reservation] = None
+
+        def check() -> Optional[float]:
+            nonlocal reservation
+            reservation, wait = self.rate_limiter.reserve(bucket, key_id, policy.limit, policy.per)
+            return wait or None
+
+        if self.defer_rate_limited:
+            key = self.rate_limiter.scoped_key(bucket, key_id)
+            waiting = self.response_queue.depth(key)
+            if waiting:
+                # Don't let new requests overtake interactions already waiting;
+                # this one gets a request after each of them has had theirs
+                wait = self.rate_limiter.scoped_wait(bucket, key_id, policy.limit, policy.per)
+                retry_after = wait + waiting * policy.per / policy.limit
+            else:
+                retry_after = check()
+            if retry_after and retry_after <= self.response_queue.timeout:
+                try:
+                    allowed = await self.defer_until_allowed(interaction, key, check, ephemeral)
+                except QueueFull:
+                    pass
+                else:
+                    if allowed:
+                        interaction.extras["reservation"] = reservation
+                    return allowed
+        else:
+            retry_after = check()
         
         if retry_after:
+            self.metrics.command(bucket).rate_limited += 1
+            interaction.extras["rate_limited"] = True
             embed = discord.Embed(
                 title="Rate Limited",
                 description=f"Please wait {retry_after:.1f} seconds before using this command again.",
                 color=discord.Color.red()
             )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await self.respond(interaction, embed=embed, ephemeral=True)
             return False
-            
+
+        # Settled when the command completes or fails, see _settle_reservation
+        interaction.extras["reservation"] = reservation
         return True
+
+    async def defer_until_allowed(self, interaction: discord.Interaction, key: int, check, ephemeral: bool = False) -> bool:
+        """
+        Defer the interaction and wait in the bucket's queue for a request
+        Returns: True once allowed, False if the wait timed out
+        """
+        if self.response_queue.depth(key) >= self.response_queue.max_depth:
+            raise QueueFull(key)
+        if interaction.type is discord.InteractionType.component:
+            # Buttons and menus edit their own message once allowed
+            await interaction.response.defer()
+        else:
+            await interaction.response.defer(ephemeral=ephemeral, thinking=True)
+        if await self.response_queue.wait_for_turn(key, check):
+            return True
+        if interaction.command is not None:
+            self.metrics.command(interaction.command.qualified_name).rate_limited += 1
+        interaction.extras["rate_limited"] = True
+
+        embed = discord.Embed(
+            title="Rate Limited",
+            description="This command is busy right now, please try again shortly.",
+            color=discord.Color.red()
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        return False
+
+    async def respond(self, interaction: discord.Interaction, **kwargs) -> Any:
+        """Send the command's response, as a followup if the interaction was deferred"""
+        if interaction.response.is_done():
+            return await interaction.followup.send(**kwargs)
+        return await interaction.response.send_message(**kwargs)
         
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # discord.py runs this before every app command bound to the cog: start its timer
+        interaction.extras["started"] = self.metrics.clock()
+        return True
+
+    def _settle_reservation(self, interaction: discord.Interaction, sent: bool, include_global: bool = True) -> None:
+        """Keep the command's request if its response was sent, otherwise give it back"""
+        reservation = interaction.extras.pop("reservation", None)
+        if reservation is None:
+            return
+        if sent:
+            reservation.commit()
+        else:
+            reservation.refund(include_global)
+
+    def _observe(self, interaction: discord.Interaction, command: Any, error: bool) -> None:
+        started = interaction.extras.get("started")
+        if started is not None and getattr(command, "binding", None) is self:
+            error = error or interaction.extras.get("failed", False)
+            self.metrics.observe(command.qualified_name, self.metrics.clock() - started, error)
+            if self.analytics is not None:
+                if error:
+                    outcome = ERROR
+                elif interaction.extras.get("rate_limited"):
+                    outcome = RATE_LIMITED
+                else:
+                    outcome = OK
+                self.analytics.record(command.qualified_name, interaction.guild_id, outcome)
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command: Any) -> None:
+        # Dispatched to every cog; _observe only records this cog's commands
+        self._observe(interaction, command, error=False)
+        if getattr(command, "binding", None) is self:
+            self._settle_reservation(interaction, sent=not interaction.extras.get("failed", False))
+
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: Exception) -> None:
+        self._observe(interaction, interaction.command, error=True)
+
     async def handle_command_error(self, interaction: discord.Interaction, error: Exception):
-        """Handle command errors and track invalid requests"""
+        """Handle command errors, give back the command's request and track invalid requests"""
+        interaction.extras["failed"] = True
+        # An HTTP error means Discord saw the request, so it still counts against the global limit
+        self._settle_reservation(interaction, sent=False, include_global=not isinstance(error, discord.HTTPException))
         if isinstance(error, (discord.Forbidden, discord.NotFound)):
             # Track 403 and 404 responses
-            if self.rate_limiter.track_invalid_request():
-                # We're approaching Cloudflare ban threshold
-                print("WARNING: Approaching invalid request limit!")
-                
-        await interaction.response.send_message(
-            "An error occurred processing your command.", 
-            ephemeral=True
-        )
\ No newline at end of file
+            if interaction.command is not None:
+                self.metrics.command(interaction.command.qualified_name).invalid_requests += 1
+            if not self.rate_limiter.traced:
+                # Without the HTTP trace, nothing else counts them for the circuit breaker
+                self.rate_limiter.track_invalid_request()
+
+        if isinstance(error, discord.NotFound) and error.code == UNKNOWN_INTERACTION:
+            return  # The interaction expired, so the error message would be another 404
+        if self.rate_limiter.allow_request() is not None:
+            return  # Near the invalid request limit the error message is shed
+        try:
+            # A failed followup must not be answered with a second initial response
+            if interaction.response.is_done():
+                await interaction.followup.send("An error occurred processing your command.", ephemeral=True)
+            else:
+                await interaction.response.send_message("An error occurred processing your command.", ephemeral=True)
+        except discord.HTTPException as e:
+            print(f"Could not report command error: {e}")
\ No newline at end of file
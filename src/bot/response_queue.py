@@ -0,0 +1,71 @@
+from typing import Callable, Dict, Hashable, Optional
+import asyncio
+
+class QueueFull(Exception):
+    """Raised when a bucket already has `max_depth` interactions waiting"""
+
+class DeferredResponseQueue:
+    """
+    Per-bucket queues for deferred, rate limited interactions.
+
+    Each bucket with waiters gets one drain task, which takes the waiters
+    first come, first served, repeatedly calls the next waiter's own rate
+    limit check and wakes it as soon as a request is allowed. The drain
+    task stops when its queue is empty.
+    """
+    def __init__(self, max_depth: int = 25, timeout: float = 10.0):
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self.queues: Dict[Hashable, asyncio.Queue] = {}
+        self.drainers: Dict[Hashable, asyncio.Task] = {}
+        self.released = 0
+        self.timed_out = 0
+        self.rejected = 0
+
+    def depth(self, key: Hashable) -> int:
+        queue = self.queues.get(key)
+        return queue.qsize() if queue is not None else 0
+
+    async def wait_for_turn(self, key: Hashable, check: Callable[[], Optional[float]]) -> bool:
+        """
+        Wait until `check` allows a request for this waiter.
+        `check` must consume the request when it returns None, like
+        RateLimitManager.check_rate_limit. It is only called for this waiter,
+        so anything it takes (such as a Reservation) belongs to this waiter.
+        Returns: True when allowed, False if `timeout` passed first
+        """
+        queue = self.queues.get(key)
+        if queue is None:
+            queue = self.queues[key] = asyncio.Queue()
+        if queue.qsize() >= self.max_depth:
+            self.rejected += 1
+            raise QueueFull(key)
+
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((future, check))
+        if key not in self.drainers:
+            self.drainers[key] = asyncio.create_task(self._drain(key, queue))
+
+        try:
+            await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            return False
+        self.released += 1
+        return True
+
+    async def _drain(self, key: Hashable, queue: asyncio.Queue) -> None:
+        try:
+            while not queue.empty():
+                future, check = queue.get_nowait()
+                # Skip waiters that timed out while queued
+                while not future.done():
+                    retry_after = check()
+                    if not retry_after:
+                        future.set_result(True)
+                        break
+                    await asyncio.sleep(retry_after)
+        finally:
+            del self.drainers[key]
+            if queue.empty():
+                self.queues.pop(key, None)
@@ -0,0 +1,177 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import heapq
+import math
+import re
+from .snapshot import Snapshot, SnapshotList
+
+TOKEN = re.compile(r"[a-z0-9]+")
+INDEX_VERSION = 2
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2  # title terms count this many times
+# Posting lists at least this long in a snapshot (about 600 entries) are decoded
+# when it is loaded: they belong to the most common terms, and decoding one
+# during a query takes milliseconds
+WARM_POSTINGS_BYTES = 16_384
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+def collect_documents(docs_data: Dict[str, Any], pages: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Flatten docs.json into searchable documents: one per docs entry (found
+    through its command) and one per distinct link. `pages` is crawled page
+    data by URL (see ingest.ContentStore); its titles and summaries are
+    searchable under the link.
+    """
+    documents: List[Dict[str, Any]] = []
+    seen_links = {}
+    pages = pages or {}
+
+    def add_link(name: str, url: str, context: str) -> None:
+        key = (name, url)
+        if key in seen_links:
+            seen_links[key]["text"] += " " + context
+            return
+        page = pages.get(url)
+        if page is not None:
+            context = " ".join((context, page.get("title") or "", page.get("summary") or ""))
+        seen_links[key] = document = {"title": name, "url": url, "command": None, "text": context}
+        documents.append(document)
+
+    for name, doc in docs_data["docs"].items():
+        documents.append({
+            "title": doc["title"],
+            "url": None,
+            "command": name,
+            "text": " ".join((doc.get("description", ""), doc["content"], " ".join(doc.get("links", {})))),
+        })
+        for link_name, url in doc.get("links", {}).items():
+            add_link(link_name, url, doc["title"])
+
+    for category in docs_data["categories"].values():
+        for link_name, url in category["links"].items():
+            add_link(link_name, url, category["title"])
+
+    return documents
+
+class DocsIndex:
+    """
+    Inverted index over docs.json with BM25 ranking.
+
+    BM25 term weights do not depend on the query, so they are computed at
+    build time and each posting list is stored sorted by weight. Queries
+    then use the threshold algorithm: walk the lists in parallel and stop as
+    soon as no unseen document can beat the current top results.
+
+    Documents and postings may be snapshot tables, decoded only for the
+    terms and results a query touches, except the long posting lists of
+    common terms (see WARM_POSTINGS_BYTES).
+
+    Queries take well under a millisecond at the median over 10k documents
+    (benchmarks/bench_search.py), but the 99th percentile is 1-2 ms: when
+    every term is common, their weights are close together and the walk has
+    to go deep into each list before the top results are settled.
+    """
+    def __init__(self, documents: Sequence[Dict[str, Any]], postings: Mapping[str, List[List[float]]]):
+        self.documents = documents
+        # term -> [[document ID, BM25 weight], ...], highest weight first
+        self.postings = postings
+        # Filled per queried term: decoded posting lists, and term -> {document ID: weight}
+        # for scoring documents found via another term
+        self.lists: Dict[str, List[List[float]]] = {}
+        self.weights: Dict[str, Dict[int, float]] = {}
+
+    @classmethod
+    def build(cls, docs_data: Dict[str, Any], pages: Optional[Dict[str, Dict[str, Any]]] = None) -> "DocsIndex":
+        documents = collect_documents(docs_data, pages)
+        frequencies: Dict[str, List[Tuple[int, int]]] = {}
+        lengths: List[int] = []
+        for doc_id, document in enumerate(documents):
+            terms = tokenize(document["title"]) * TITLE_WEIGHT + tokenize(document["text"])
+            lengths.append(len(terms))
+            counts: Dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                frequencies.setdefault(term, []).append((doc_id, count))
+
+        total = len(documents)
+        average = (sum(lengths) / total) if total else 1.0
+        norms = [K1 * (1 - B + B * length / average) for length in lengths]
+        postings: Dict[str, List[List[float]]] = {}
+        for term, entries in frequencies.items():
+            idf = math.log(1 + (total - len(entries) + 0.5) / (len(entries) + 0.5))
+            weighted = [[doc_id, idf * tf * (K1 + 1) / (tf + norms[doc_id])] for doc_id, tf in entries]
+            weighted.sort(key=lambda entry: (-entry[1], entry[0]))
+            postings[term] = weighted
+        return cls(documents, postings)
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        """Best matching documents for the query, highest score first"""
+        terms = [term for term in set(tokenize(query)) if term in self.postings]
+        if not terms:
+            return []
+        lists = [self._postings(term) for term in terms]
+        if len(lists) == 1:
+            return [(weight, self.documents[int(doc_id)]) for doc_id, weight in lists[0][:limit]]
+
+        lookups = [self._weights(term) for term in terms]
+        best: List[Tuple[float, int]] = []  # min-heap of (score, -document ID)
+        seen = set()
+        depth = 0
+        while True:
+            threshold = 0.0
+            exhausted = True
+            for entries in lists:
+                if depth >= len(entries):
+                    continue
+                exhausted = False
+                doc_id, weight = entries[depth]
+                threshold += weight
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                score = sum(lookup.get(doc_id, 0.0) for lookup in lookups)
+                item = (score, -doc_id)
+                if len(best) < limit:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+            # No unseen document can score more than the weights at this depth
+            if exhausted or (len(best) == limit and best[0][0] >= threshold):
+                break
+            depth += 1
+
+        best.sort(reverse=True)
+        return [(score, self.documents[-doc_id]) for score, doc_id in best]
+
+    def _postings(self, term: str) -> List[List[float]]:
+        entries = self.lists.get(term)
+        if entries is None:
+            entries = self.lists[term] = self.postings[term]
+        return entries
+
+    def _weights(self, term: str) -> Dict[int, float]:
+        weights = self.weights.get(term)
+        if weights is None:
+            weights = self.weights[term] = {int(doc_id): weight for doc_id, weight in self._postings(term)}
+        return weights
+
+    def tables(self) -> Dict[str, Dict[str, Any]]:
+        """The index as snapshot tables (see from_snapshot)"""
+        return {
+            "documents": {str(doc_id): document for doc_id, document in enumerate(self.documents)},
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Snapshot) -> "DocsIndex":
+        postings = snapshot["postings"]
+        index = cls(SnapshotList(snapshot["documents"]), postings)
+        for term, size in postings.sizes():
+            if size >= WARM_POSTINGS_BYTES:
+                index._weights(term)
+        return index
@@ -0,0 +1,55 @@
+from typing import Any, Dict, List
+
+class ShardStats:
+    """Health of one gateway shard run by this process"""
+    __slots__ = ("shard_id", "latency", "guilds", "closed")
+
+    def __init__(self, shard_id: int, latency: float, guilds: int, closed: bool):
+        self.shard_id = shard_id
+        self.latency = latency
+        self.guilds = guilds
+        self.closed = closed
+
+def shard_options(config: Any) -> Dict[str, Any]:
+    """
+    AutoShardedBot keyword arguments from the "sharding" config, e.g.
+    "sharding": {"shard_count": 8, "shard_range": [0, 4]}
+    runs shards 0-3 of 8 in this process; "shard_ids": [0, 1, 2, 3] is the
+    same. Without a shard_count discord.py asks the gateway for the
+    recommended number and runs all of them.
+    """
+    options = config.get("sharding") if isinstance(config, dict) else None
+    if not options:
+        return {}
+
+    shard_count = options.get("shard_count")
+    if "shard_range" in options:
+        start, stop = options["shard_range"]
+        shard_ids = list(range(int(start), int(stop)))
+    else:
+        shard_ids = options.get("shard_ids")
+    if shard_ids is not None:
+        if shard_count is None:
+            raise ValueError("sharding: shard_ids and shard_range need an explicit shard_count")
+        shard_ids = [int(shard_id) for shard_id in shard_ids]
+        if not shard_ids or not all(0 <= shard_id < int(shard_count) for shard_id in shard_ids):
+            raise ValueError(f"sharding: shard IDs must be between 0 and {int(shard_count) - 1}")
+
+    kwargs: Dict[str, Any] = {}
+    if shard_count is not None:
+        kwargs["shard_count"] = int(shard_count)
+    if shard_ids is not None:
+        kwargs["shard_ids"] = shard_ids
+    return kwargs
+
+def shard_stats(bot) -> List[ShardStats]:
+    """Latency and guild count of every shard this process runs, by shard ID"""
+    guilds: Dict[int, int] = {}
+    for guild in bot.guilds:
+        guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+    shards = bot.shards
+    return [
+        ShardStats(shard_id, latency, guilds.get(shard_id, 0), shards[shard_id].is_closed())
+        for shard_id, latency in sorted(bot.latencies)
+        if shard_id in shards
+    ]
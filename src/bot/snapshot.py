@@ -0,0 +1,215 @@
+"""
+Compiled, memory-mapped snapshots of JSON tables.
+
+A snapshot holds named tables of JSON values keyed by string. Values are
+stored back to back and found through a fixed-size offset index, so
+opening a snapshot only parses its header; each value is decoded when it
+is looked up. The digest of the sources the snapshot was compiled from is
+stored in the header, and a snapshot with another digest or format
+version is ignored.
+
+Layout (little endian):
+    header     magic, format version (u32), table count (u32), digest length (u32), digest
+    directory  per table: name length (u16), name, record count (u32), index offset (u64)
+    data       keys (UTF-8) and values (compact JSON)
+    index      per table: one record entry per key in insertion order
+               (key offset u64, key length u32, value offset u64, value length u32),
+               then the entry positions sorted by key (u32 each)
+"""
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+MAGIC = b"TRMNLSNP"
+SNAPSHOT_VERSION = 1
+
+HEADER = struct.Struct("<8sIII")
+NAME_LENGTH = struct.Struct("<H")
+TABLE = struct.Struct("<IQ")
+RECORD = struct.Struct("<QIQI")
+POSITION = struct.Struct("<I")
+
+class SnapshotTable(Mapping):
+    """Read-only mapping over one table; values are decoded on every lookup"""
+    def __init__(self, buffer: mmap.mmap, count: int, index_offset: int):
+        self._buffer = buffer
+        self._count = count
+        self._index_offset = index_offset
+        self._sorted_offset = index_offset + count * RECORD.size
+
+    def _record(self, position: int):
+        return RECORD.unpack_from(self._buffer, self._index_offset + position * RECORD.size)
+
+    def _find(self, key: str) -> Optional[int]:
+        """Position of the key's record, by binary search over the sorted positions"""
+        wanted = key.encode()
+        buffer = self._buffer
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            position = POSITION.unpack_from(buffer, self._sorted_offset + middle * POSITION.size)[0]
+            key_offset, key_length, _, _ = self._record(position)
+            found = buffer[key_offset:key_offset + key_length]
+            if found < wanted:
+                low = middle + 1
+            elif found > wanted:
+                high = middle
+            else:
+                return position
+        return None
+
+    def value_at(self, position: int) -> Any:
+        """The value of the record at an insertion position"""
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        _, _, value_offset, value_length = self._record(position)
+        return json.loads(self._buffer[value_offset:value_offset + value_length])
+
+    def __getitem__(self, key: str) -> Any:
+        position = self._find(key) if isinstance(key, str) else None
+        if position is None:
+            raise KeyError(key)
+        return self.value_at(position)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._find(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        buffer = self._buffer
+        for position in range(self._count):
+            key_offset, key_length, _, _ = self._record(position)
+            yield buffer[key_offset:key_offset + key_length].decode()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def records(self) -> Iterator[Tuple[str, Any]]:
+        """Every (key, value) in insertion order; cheaper than a lookup per key"""
+        buffer = self._buffer
+        for position in range(self._count):
+            key_offset, key_length, value_offset, value_length = self._record(position)
+            yield buffer[key_offset:key_offset + key_length].decode(), json.loads(buffer[value_offset:value_offset + value_length])
+
+    def sizes(self) -> Iterator[Tuple[str, int]]:
+        """Every (key, encoded value length) in insertion order, without decoding the values"""
+        buffer = self._buffer
+        for position in range(self._count):
+            key_offset, key_length, _, value_length = self._record(position)
+            yield buffer[key_offset:key_offset + key_length].decode(), value_length
+
+class SnapshotList(Sequence):
+    """A table's values by insertion position, for tables written from a list"""
+    def __init__(self, table: SnapshotTable):
+        self._table = table
+
+    def __getitem__(self, position: int) -> Any:
+        if position < 0:
+            position += len(self._table)
+        return self._table.value_at(position)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+class Snapshot:
+    """An open snapshot file; its tables stay readable while any of them is referenced"""
+    def __init__(self, path: Path):
+        with open(path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.version, self.digest, self.tables = self._read_header()
+        except (struct.error, UnicodeDecodeError, ValueError):
+            self._buffer.close()
+            raise ValueError(f"{path} is not a docs snapshot")
+
+    def _read_header(self):
+        buffer = self._buffer
+        magic, version, table_count, digest_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("bad magic")
+        offset = HEADER.size
+        digest = buffer[offset:offset + digest_length].decode()
+        offset += digest_length
+        tables: Dict[str, SnapshotTable] = {}
+        for _ in range(table_count):
+            (name_length,) = NAME_LENGTH.unpack_from(buffer, offset)
+            offset += NAME_LENGTH.size
+            name = buffer[offset:offset + name_length].decode()
+            offset += name_length
+            count, index_offset = TABLE.unpack_from(buffer, offset)
+            offset += TABLE.size
+            if index_offset + count * (RECORD.size + POSITION.size) > len(buffer):
+                raise ValueError("truncated index")
+            tables[name] = SnapshotTable(buffer, count, index_offset)
+        return version, digest, tables
+
+    def __getitem__(self, name: str) -> SnapshotTable:
+        return self.tables[name]
+
+    def close(self) -> None:
+        self._buffer.close()
+
+def write_snapshot(path: Path, digest: str, tables: Mapping) -> None:
+    """
+    Compile tables ({name: {key: JSON value}}) into a snapshot file, atomically.
+    Safe to call from several threads at once; the last write wins.
+    Blocking; run it in an executor when called from the event loop.
+    """
+    encoded_digest = digest.encode()
+    names = [name.encode() for name in tables]
+    directory_size = sum(NAME_LENGTH.size + len(name) + TABLE.size for name in names)
+    data_start = HEADER.size + len(encoded_digest) + directory_size
+
+    data = bytearray()
+    records = []
+    for table in tables.values():
+        entries = []
+        for key, value in table.items():
+            encoded_key = key.encode()
+            encoded_value = json.dumps(value, separators=(",", ":")).encode()
+            key_offset = data_start + len(data)
+            data += encoded_key
+            entries.append((encoded_key, key_offset, len(encoded_key), data_start + len(data), len(encoded_value)))
+            data += encoded_value
+        records.append(entries)
+
+    parts = [HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(names), len(encoded_digest)), encoded_digest]
+    index = bytearray()
+    index_offset = data_start + len(data)
+    for name, entries in zip(names, records):
+        parts.append(NAME_LENGTH.pack(len(name)) + name + TABLE.pack(len(entries), index_offset + len(index)))
+        for _, key_offset, key_length, value_offset, value_length in entries:
+            index += RECORD.pack(key_offset, key_length, value_offset, value_length)
+        for position in sorted(range(len(entries)), key=lambda position: entries[position][0]):
+            index += POSITION.pack(position)
+    parts += [data, index]
+
+    # A temporary file of its own, so concurrent writers never share one
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for part in parts:
+                f.write(part)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def open_snapshot(path: Path, digest: Optional[str]) -> Optional[Snapshot]:
+    """
+    The snapshot at path if it was compiled from sources with this digest
+    (any digest if None), else None
+    """
+    try:
+        snapshot = Snapshot(path)
+    except (OSError, ValueError):  # missing, empty (mmap refuses) or corrupt
+        return None
+    if snapshot.version != SNAPSHOT_VERSION or digest is not None and snapshot.digest != digest:
+        snapshot.close()
+        return None
+    return snapshot
@@ -0,0 +1,45 @@
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+import time
+
+class StartupTimer:
+    """
+    Durations of the startup phases (config, login, each extension, ...)
+    and the time from process start until the bot was ready.
+    """
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.phases: Dict[str, float] = {}
+        self.ready_after = None
+        self._open: Dict[str, float] = {}
+
+    def begin(self, name: str) -> None:
+        self._open[name] = self.clock()
+
+    def end(self, name: str) -> None:
+        """Close a phase opened with begin(); ignored if it is not open"""
+        start = self._open.pop(name, None)
+        if start is not None:
+            self.phases[name] = self.clock() - start
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def mark_ready(self) -> bool:
+        """Record the time to ready; False if it was already recorded (e.g. after a reconnect)"""
+        if self.ready_after is not None:
+            return False
+        self.ready_after = self.clock() - self.started
+        return True
+
+    def report(self) -> str:
+        parts = [f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items()]
+        if self.ready_after is not None:
+            parts.append(f"ready after {self.ready_after * 1000:.0f} ms")
+        return "Startup: " + ", ".join(parts)
@@ -1,236 +1,956 @@
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 from pathlib import Path
-import json
+import asyncio
+import hashlib
+import time
+from types import MappingProxyType
+from typing import Any, Dict, List, Literal, Mapping, Optional, Sequence, Tuple
+from .analytics import DAY, DIRECT_MESSAGES
+from .autocomplete import TopicIndex
+from .browser import CATEGORY, DOC, CategoryMenu, PageButton, browser_view
+from .coalescer import ResponseCoalescer
+from .command_sync import CommandSyncer
+from .docs_loader import DocsSnapshot, docs_digest, file_stat, parse_docs
+from .ingest import ContentStore
+from .locales import DEFAULT_LOCALE, LocalePreferences, command_localizations, localize_docs
 from .rate_limiter import RateLimitedCog
+from .search import INDEX_VERSION, DocsIndex
+from .snapshot import Snapshot, open_snapshot, write_snapshot
+from .sharding import shard_stats
+
+DOCS_PATH = Path(__file__).parents[2] / "docs.json"
+SYNC_MANIFEST_PATH = Path(__file__).parents[2] / "sync_manifest.json"
+SNAPSHOT_PATH = Path(__file__).parents[2] / "docs_snapshot.bin"
+CONTENT_STORE_PATH = Path(__file__).parents[2] / "content_store.json"
+LOCALE_PREFERENCES_PATH = Path(__file__).parents[2] / "locale_preferences.json"
+DOCS_WATCH_INTERVAL = 5.0  # seconds between docs.json change checks
+COALESCE_WINDOW = 30.0  # seconds a posted doc embed answers repeats in its channel
+EMBED_COLOR = 0xBEBEFE
+SEARCH_RESULTS = 5
+STATS_COMMANDS = 15  # busiest commands listed by /stats
+SHARDS_LISTED = 40  # keeps /shards inside one embed description
+PAGE_LINKS = 10  # links per doc embed page; Discord allows 25 fields per embed
+FIELD_VALUE_LIMIT = 1024  # Discord's limit for one embed field value
+
+def _make_embed(title: str, description: str, links: Mapping[str, str]) -> discord.Embed:
+    embed = discord.Embed(title=title, description=description, color=EMBED_COLOR)
+    for name, url in links.items():
+        embed.add_field(name=name, value=url, inline=False)
+    return embed
+
+def name_list(names: Sequence[str], limit: int = FIELD_VALUE_LIMIT) -> str:
+    """Command names for an embed field, cut short with "…and N more" to fit `limit`"""
+    shown: List[str] = []
+    length = 0
+    for i, name in enumerate(names):
+        length += len(name) + (4 if shown else 2)
+        more = len(names) - i - 1
+        if length + (len(f", …and {more} more") if more else 0) > limit:
+            break
+        shown.append(f"`{name}`")
+    hidden = len(names) - len(shown)
+    if hidden:
+        shown.append(f"…and {hidden} more")
+    return ", ".join(shown)
+
+def resolve_doc(docs_data: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """
+    Return the docs entry for a command name.
+    Entries may borrow their links from a category via a "category" key, and
+    commands listed in a category without a docs entry fall back to the category.
+    """
+    categories = docs_data["categories"]
+    doc = docs_data["docs"].get(name)
+    if doc is None:
+        for category in categories.values():
+            if name in category.get("commands", ()):
+                return {"title": category["title"], "content": "", "links": category["links"]}
+        raise KeyError(name)
+    if "links" not in doc:
+        doc = dict(doc, links=categories[doc["category"]]["links"])
+    return doc
+
+def command_specs(docs_data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Return the doc commands defined by docs.json as {name: description}.
+    Commands listed under categories come first, in file order, followed by
+    any remaining docs entries.
+    """
+    names = [
+        name
+        for category in docs_data["categories"].values()
+        for name in category.get("commands", ())
+    ]
+    names.extend(docs_data["docs"])
+
+    specs: Dict[str, str] = {}
+    for name in names:
+        if name not in specs:
+            doc = resolve_doc(docs_data, name)
+            specs[name] = (doc.get("description") or doc["title"])[:100]
+    return specs
+
+def _make_pages(title: str, description: str, links: Mapping[str, str]) -> Tuple[discord.Embed, ...]:
+    """One embed per PAGE_LINKS links, numbered in the footer when there are several"""
+    items = list(links.items())
+    if len(items) <= PAGE_LINKS:
+        return (_make_embed(title, description, links),)
+    count = -(-len(items) // PAGE_LINKS)
+    pages = []
+    for number in range(count):
+        embed = _make_embed(title, description, dict(items[number * PAGE_LINKS:(number + 1) * PAGE_LINKS]))
+        embed.set_footer(text=f"Page {number + 1}/{count}")
+        pages.append(embed)
+    return tuple(pages)
+
+class DocPages:
+    """
+    Ready-to-send embed pages of every doc command and every category in one
+    language, and the options of the category menu. Read-only once built.
+    """
+    __slots__ = ("docs", "categories", "menu")
+
+    def __init__(
+        self,
+        docs: Dict[str, Tuple[discord.Embed, ...]],
+        categories: Dict[str, Tuple[discord.Embed, ...]],
+        menu: Tuple[discord.SelectOption, ...]
+    ):
+        self.docs: Mapping[str, Tuple[discord.Embed, ...]] = MappingProxyType(docs)
+        self.categories: Mapping[str, Tuple[discord.Embed, ...]] = MappingProxyType(categories)
+        self.menu = menu
+
+    def first_pages(self) -> Mapping[str, discord.Embed]:
+        """The embed each doc command answers with, keyed by command name"""
+        return MappingProxyType({name: pages[0] for name, pages in self.docs.items()})
+
+def build_pages(docs_data: Dict[str, Any], base: Optional[DocPages] = None, base_data: Optional[Dict[str, Any]] = None) -> DocPages:
+    """
+    Compile every doc command and category into embed pages. With a base
+    (the English pages and data), entries whose text and links match it share
+    its embed objects, so a locale only adds the pages it translates.
+    """
+    docs: Dict[str, Tuple[discord.Embed, ...]] = {}
+    for name in command_specs(docs_data):
+        doc = resolve_doc(docs_data, name)
+        content = (doc["title"], doc["content"], doc["links"])
+        if base is not None:
+            original = resolve_doc(base_data, name)
+            if content == (original["title"], original["content"], original["links"]):
+                docs[name] = base.docs[name]
+                continue
+        docs[name] = _make_pages(*content)
+
+    categories: Dict[str, Tuple[discord.Embed, ...]] = {}
+    for key, category in docs_data["categories"].items():
+        if base is not None and category == base_data["categories"][key]:
+            categories[key] = base.categories[key]
+        else:
+            categories[key] = _make_pages(category["title"], "", category["links"])
+    menu = tuple(
+        discord.SelectOption(label=category["title"][:100], value=key)
+        for key, category in docs_data["categories"].items()
+    )
+    return DocPages(docs, categories, menu)
+
+def build_embeds(docs_data: Dict[str, Any]) -> Mapping[str, discord.Embed]:
+    """
+    Compile every doc command into a ready-to-send embed (its first page), keyed by command name.
+    The returned table is read-only and must not be mutated once published.
+    """
+    return build_pages(docs_data).first_pages()
+
+def build_localized_pages(docs_data: Dict[str, Any], pages: DocPages) -> Mapping[str, DocPages]:
+    """
+    Compile the doc pages of every locale in docs.json, keyed by locale.
+    Commands and categories a locale leaves untranslated share the English
+    embed objects, so each locale only adds the pages it changes.
+    """
+    tables: Dict[str, DocPages] = {DEFAULT_LOCALE: pages}
+    for locale in docs_data.get("locales", {}):
+        tables[locale] = build_pages(localize_docs(docs_data, locale), pages, docs_data)
+    return MappingProxyType(tables)
+
+def merge_links(docs_data: Dict[str, Any], extra_links: Mapping[str, Mapping[str, str]]) -> Dict[str, Any]:
+    """
+    Return docs.json data with extra links (such as new blog posts) listed
+    first in their categories. Links whose URL is already listed are skipped.
+    """
+    if not extra_links:
+        return docs_data
+    categories = dict(docs_data["categories"])
+    for key, links in extra_links.items():
+        category = categories.get(key)
+        if category is None:
+            continue
+        existing = set(category["links"].values())
+        merged = {name: url for name, url in links.items() if url not in existing}
+        merged.update(category["links"])
+        categories[key] = dict(category, links=merged)
+    return dict(docs_data, categories=categories)
+
+class DocsSources:
+    """The bytes of docs.json and the content store as read from disk, with their digests"""
+    __slots__ = ("docs", "stat", "content", "docs_digest", "content_digest")
+
+    def __init__(self, docs: bytes, stat: Tuple[int, int], content: bytes):
+        self.docs = docs
+        self.stat = stat
+        self.content = content
+        self.docs_digest = docs_digest(docs)
+        self.content_digest = hashlib.sha256(content).hexdigest()
+
+def read_sources() -> DocsSources:
+    """Read docs.json and the content store without parsing them (blocking)"""
+    stat = file_stat(DOCS_PATH)
+    with open(DOCS_PATH, 'rb') as f:
+        docs = f.read()
+    try:
+        with open(CONTENT_STORE_PATH, 'rb') as f:
+            content = f.read()
+    except FileNotFoundError:
+        content = b""
+    except OSError as e:
+        print(f"Ignoring unreadable content store: {e}")
+        content = b""
+    return DocsSources(docs, stat, content)
+
+class PreparedDocs:
+    """Tables derived from one docs.json snapshot, ready to be published together"""
+    __slots__ = (
+        "snapshot", "docs_data", "content", "content_digest", "specs", "localizations",
+        "embeds", "localized_embeds", "localized_pages", "search_index", "topic_index"
+    )
+
+    def __init__(
+        self,
+        snapshot: DocsSnapshot,
+        docs_data: Dict[str, Any],
+        content: ContentStore,
+        content_digest: str,
+        specs: Dict[str, str],
+        localizations: Dict[str, Dict[str, Dict[str, str]]],
+        embeds: Mapping[str, discord.Embed],
+        localized_embeds: Mapping[str, Mapping[str, discord.Embed]],
+        localized_pages: Mapping[str, DocPages],
+        search_index: DocsIndex,
+        topic_index: TopicIndex
+    ):
+        self.snapshot = snapshot
+        self.docs_data = docs_data
+        self.content = content
+        self.content_digest = content_digest
+        self.specs = specs
+        self.localizations = localizations
+        self.embeds = embeds
+        self.localized_embeds = localized_embeds
+        self.localized_pages = localized_pages
+        self.search_index = search_index
+        self.topic_index = topic_index
+
+def read_compiled_docs(compiled: Snapshot) -> Tuple[Dict[str, Any], ContentStore, DocsIndex]:
+    """docs.json, the content store and the search index from a compiled snapshot"""
+    docs_data = dict(compiled["root"].records())
+    docs_data["categories"] = dict(compiled["categories"].records())
+    docs_data["docs"] = dict(compiled["docs"].records())
+    return docs_data, ContentStore(compiled["pages"]), DocsIndex.from_snapshot(compiled)
+
+def derive_docs(
+    snapshot: DocsSnapshot,
+    content: ContentStore,
+    content_digest: Optional[str],
+    search_index: DocsIndex,
+    extra_links: Optional[Mapping[str, Mapping[str, str]]] = None
+) -> PreparedDocs:
+    """Build the embeds, commands and autocomplete index of loaded docs (blocking)"""
+    docs_data = merge_links(snapshot.data, extra_links or {})
+    snapshot = DocsSnapshot(docs_data, snapshot.digest, snapshot.stat)
+    specs = command_specs(docs_data)
+    localized_pages = build_localized_pages(docs_data, build_pages(docs_data))
+    localized_embeds = MappingProxyType({locale: pages.first_pages() for locale, pages in localized_pages.items()})
+    return PreparedDocs(
+        snapshot=snapshot,
+        docs_data=docs_data,
+        content=content,
+        content_digest=content_digest,
+        specs=specs,
+        localizations=command_localizations(docs_data, specs),
+        embeds=localized_embeds[DEFAULT_LOCALE],
+        localized_embeds=localized_embeds,
+        localized_pages=localized_pages,
+        search_index=search_index,
+        topic_index=TopicIndex.build(docs_data),
+    )
+
+def load_prepared_docs(extra_links: Optional[Mapping[str, Mapping[str, str]]] = None) -> PreparedDocs:
+    """Read and prepare docs.json and the content store (blocking)"""
+    return trmnl._prepare_docs(read_sources(), extra_links)
+
+def load_fallback_docs() -> PreparedDocs:
+    """
+    Docs to start with when docs.json cannot be loaded (blocking): the last
+    compiled snapshot, whatever docs.json it was compiled from, or else no
+    docs at all. The docs watcher loads docs.json once the file changes.
+    """
+    try:
+        stat = file_stat(DOCS_PATH)
+    except OSError:
+        stat = None
+    compiled = open_snapshot(SNAPSHOT_PATH, None)
+    if compiled is not None:
+        version, docs_hash, content_hash = (compiled.digest.split(":", 2) + ["", ""])[:3]
+        if version == str(INDEX_VERSION):
+            try:
+                docs_data, content, search_index = read_compiled_docs(compiled)
+                return derive_docs(DocsSnapshot(docs_data, docs_hash, stat), content, content_hash, search_index)
+            except Exception as e:
+                print(f"Could not read docs snapshot: {e}")
+    docs_data = {"categories": {}, "docs": {}}
+    return derive_docs(DocsSnapshot(docs_data, None, stat), ContentStore(), None, DocsIndex.build(docs_data))
 
 class trmnl(RateLimitedCog):
-    def __init__(self, bot) -> None:
+    def __init__(self, bot, prepared: Optional[PreparedDocs] = None) -> None:
         super().__init__(bot)  # Initialize the rate limiter
         self.bot = bot
-        self.reload_docs()
+        self.command_syncer = CommandSyncer(bot.tree, SYNC_MANIFEST_PATH)
+        config = getattr(bot, "config", None)
+        coalesce_window = config.get("coalesce_window", COALESCE_WINDOW) if isinstance(config, dict) else COALESCE_WINDOW
+        self.coalescer = ResponseCoalescer(window=float(coalesce_window))
+        self.docs_digest = None
+        self.content_digest = None
+        # category -> {name: url} shown on top of docs.json, e.g. by the feed poller
+        self.extra_links: Dict[str, Dict[str, str]] = {}
+        self.docs_stat = None
+        self.docs_reloads = 0
+        self.docs_reload_failures = 0
+        self.locale_preferences = LocalePreferences.load(LOCALE_PREFERENCES_PATH)
+        self._preferences_saving = asyncio.Lock()
+        if prepared is None:
+            self.reload_docs()
+        else:
+            self._apply_docs(prepared)
     
     def reload_docs(self) -> None:
-        """Reload the docs.json file"""
-        docs_path = Path(__file__).parents[2] / "docs.json"
-        with open(docs_path, 'r') as f:
-            self.docs_data = json.load(f)
+        """Reload docs.json and the content store, and rebuild the embed cache and search index"""
+        self._apply_docs(load_prepared_docs(self.extra_links))
 
-    @app_commands.command(
-        name="sync",
-        description="Sync all slash commands"
-    )
-    @app_commands.default_permissions(administrator=True)
-    async def sync(self, interaction: discord.Interaction) -> None:
+    async def reload_docs_async(self) -> bool:
         """
-        Sync all slash commands.
-        Only administrators can use this command.
+        Reload docs.json and the content store without blocking the event loop.
+        Returns True if new content was published, False if both were unchanged.
         """
+        loop = asyncio.get_running_loop()
         try:
-            if not await self.handle_rate_limit(interaction, "sync"):
+            sources = await loop.run_in_executor(None, read_sources)
+            self.docs_stat = sources.stat
+            if sources.docs_digest == self.docs_digest and sources.content_digest == self.content_digest:
+                return False
+            prepared = await loop.run_in_executor(None, self._prepare_docs, sources, self.extra_links)
+            self._apply_docs(prepared)
+        except Exception:
+            self.docs_reload_failures += 1
+            raise
+        self.docs_reloads += 1
+        return True
+
+    async def set_extra_links(self, category: str, links: Dict[str, str]) -> None:
+        """Show `links` first in a docs.json category (not written to docs.json) and republish the docs"""
+        self.extra_links = dict(self.extra_links, **{category: dict(links)})
+        loop = asyncio.get_running_loop()
+        prepared = await loop.run_in_executor(None, load_prepared_docs, self.extra_links)
+        self._apply_docs(prepared)
+
+    @staticmethod
+    def _prepare_docs(
+        sources: DocsSources,
+        extra_links: Optional[Mapping[str, Mapping[str, str]]] = None
+    ) -> PreparedDocs:
+        """
+        Build every table derived from docs.json (blocking, safe to run in an executor).
+
+        docs.json, the crawled pages and the search index are compiled into a
+        snapshot keyed by the digests of the source files. While those are
+        unchanged, the snapshot is memory-mapped instead of parsing and
+        indexing the JSON again: docs entries and categories are decoded up
+        front for the embeds and autocomplete, crawled pages and the search
+        index only as they are used. A snapshot that fails to decode is
+        rebuilt from the JSON.
+
+        Extra links change while the bot runs, so they are merged after
+        loading and never compiled into the snapshot.
+        """
+        digest = f"{INDEX_VERSION}:{sources.docs_digest}:{sources.content_digest}"
+        docs_data = None
+        compiled = open_snapshot(SNAPSHOT_PATH, digest)
+        if compiled is not None:
+            try:
+                docs_data, content, search_index = read_compiled_docs(compiled)
+            except Exception as e:
+                print(f"Could not read docs snapshot, rebuilding it: {e}")
+                docs_data = None
+        if docs_data is None:
+            docs_data = parse_docs(sources.docs, sources.stat).data
+            content = ContentStore.parse(sources.content)
+            search_index = DocsIndex.build(docs_data, content.pages)
+            tables = {
+                "root": {key: value for key, value in docs_data.items() if key not in ("categories", "docs")},
+                "categories": docs_data["categories"],
+                "docs": docs_data["docs"],
+                "pages": content.pages,
+                **search_index.tables(),
+            }
+            try:
+                write_snapshot(SNAPSHOT_PATH, digest, tables)
+            except OSError as e:
+                print(f"Could not write docs snapshot: {e}")
+
+        return derive_docs(
+            DocsSnapshot(docs_data, sources.docs_digest, sources.stat),
+            content,
+            sources.content_digest,
+            search_index,
+            extra_links
+        )
+
+    def _apply_docs(self, prepared: PreparedDocs) -> None:
+        # Everything was built first so a bad file leaves the previous state
+        # intact; publish each table with a single assignment.
+        snapshot = prepared.snapshot
+        self.docs_data = prepared.docs_data
+        self.embeds = prepared.embeds
+        self.localized_embeds = prepared.localized_embeds
+        self.localized_pages = prepared.localized_pages
+        self.search_index = prepared.search_index
+        self.topic_index = prepared.topic_index
+        self.pages = prepared.content.pages
+        self.docs_snapshot = snapshot
+        self.content_store = prepared.content
+        self.docs_digest = snapshot.digest
+        self.content_digest = prepared.content_digest
+        self.docs_stat = snapshot.stat
+        self._register_doc_commands(prepared.specs, prepared.localizations)
+
+    async def cog_load(self) -> None:
+        # Browser buttons and menus are routed by custom_id, also on messages sent before a restart
+        self.bot.add_dynamic_items(PageButton, CategoryMenu)
+        self.watch_docs.start()
+
+    @tasks.loop(seconds=DOCS_WATCH_INTERVAL)
+    async def watch_docs(self) -> None:
+        """Reload docs.json in the background whenever the file changes"""
+        try:
+            stat = file_stat(DOCS_PATH)
+        except OSError:
+            return
+        if stat == self.docs_stat:
+            return
+
+        # Remember the attempt so a broken file is reported once, not every tick
+        self.docs_stat = stat
+        try:
+            if await self.reload_docs_async():
+                print("Reloaded docs.json after file change")
+        except Exception as e:
+            print(f"Failed to reload docs.json, keeping previous version: {e}")
+
+    def _register_doc_commands(
+        self,
+        specs: Dict[str, str],
+        localizations: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None
+    ) -> None:
+        """
+        Add, replace and remove generated doc commands on the command tree.
+        Localized names and descriptions are kept in the command's extras for DocsTranslator.
+        """
+        localizations = localizations or {}
+        reserved = {command.name for command in self.__cog_app_commands__}
+        current = getattr(self, "doc_commands", {})
+        registered: Dict[str, app_commands.Command] = {}
+
+        for name, description in specs.items():
+            if name in reserved:
+                print(f"Skipping doc command '{name}': name is reserved")
+                continue
+            command = current.get(name)
+            localized = localizations.get(name)
+            if command is None or command.description != description or command.extras.get("localizations") != localized:
+                command = app_commands.Command(
+                    name=app_commands.locale_str(name),
+                    description=app_commands.locale_str(description),
+                    callback=type(self)._doc_command_callback,
+                    extras={"localizations": localized} if localized else {},
+                )
+                command.binding = self
+                self.bot.tree.add_command(command, override=True)
+            registered[name] = command
+
+        for name in current.keys() - registered.keys():
+            self.bot.tree.remove_command(name)
+
+        self.doc_commands = registered
+
+    async def cog_unload(self) -> None:
+        self.watch_docs.cancel()
+        self.bot.remove_dynamic_items(PageButton, CategoryMenu)
+        for name in self.doc_commands:
+            self.bot.tree.remove_command(name)
+
+    async def _doc_command_callback(self, interaction: discord.Interaction) -> None:
+        # Shared by every generated doc command; the command name selects the embed
+        await self.send_doc(interaction, interaction.command.name)
+
+    def pages_for(self, interaction: discord.Interaction) -> DocPages:
+        """The prebuilt doc pages in the interaction's language"""
+        return self.localized_pages[self.locale_preferences.resolve(interaction, self.localized_pages)]
+
+    @staticmethod
+    def page_message(pages: DocPages, kind: str, key: str, page: int = 0, menu: bool = False) -> Dict[str, Any]:
+        """
+        The message for one page of a doc command (DOC) or category (CATEGORY):
+        its embed, plus paging buttons if there are several pages and the
+        category menu if asked for. Pages past the end show the last one.
+        """
+        embeds = (pages.docs if kind == DOC else pages.categories)[key]
+        page = min(page, len(embeds) - 1)
+        message: Dict[str, Any] = {"embed": embeds[page]}
+        if len(embeds) > 1 or menu:
+            message["view"] = browser_view(kind, key, page, len(embeds), pages.menu)
+        return message
+
+    async def send_doc(self, interaction: discord.Interaction, name: str) -> None:
+        """Send the prebuilt embed for a doc command"""
+        try:
+            if not await self.handle_rate_limit(interaction, name):
                 return
 
-            synced = await self.bot.tree.sync()
-            embed = discord.Embed(
-                title="Slash Commands Synced",
-                description=f"Successfully synced {len(synced)} commands.",
-                color=0x00FF00
-            )
-            await interaction.response.send_message(embed=embed)
+            pages = self.pages_for(interaction)
+            embed = pages.docs[name][0]
+            channel_id = interaction.channel_id
+            posted = self.coalescer.lookup(channel_id, name, embed)
+            if posted is not None:
+                # Point at the identical embed posted moments ago instead of repeating it
+                url = await self.coalescer.resolve_url(posted)
+                where = f"here: {url}" if url else "in this channel."
+                await self.respond(interaction, content=f"**{embed.title}** was just posted {where}", ephemeral=True)
+                return
+
+            result = await self.respond(interaction, **self.page_message(pages, DOC, name))
+            self.coalescer.record(channel_id, name, embed, result, interaction)
         except Exception as e:
             await self.handle_command_error(interaction, e)
 
-    @app_commands.command(
-        name="reload_docs",
-        description="Reload the docs.json file"
-    )
-    @app_commands.default_permissions(administrator=True)
-    async def reload_docs_command(self, interaction: discord.Interaction) -> None:
+    async def show_page(self, interaction: discord.Interaction, kind: str, key: str, page: int) -> None:
         """
-        Reload the docs.json file.
-        Only administrators can use this command.
+        Turn a browser message to another page; called for its buttons and menu (see browser.py).
+        Only the user the message answered turns its pages; anyone else gets
+        their own copy of the page, in their language.
         """
         try:
-            if not await self.handle_rate_limit(interaction, "reload_docs"):
+            metadata = getattr(interaction.message, "interaction_metadata", None)
+            shared = metadata is not None and metadata.user.id != interaction.user.id
+            if not await self.handle_rate_limit(interaction, "browse"):
                 return
 
-            self.reload_docs()
-            embed = discord.Embed(
-                title="Docs Reloaded",
-                description="Successfully reloaded docs.json",
-                color=0x00FF00
-            )
-            await interaction.response.send_message(embed=embed)
+            pages = self.pages_for(interaction)
+            if key not in (pages.docs if kind == DOC else pages.categories):
+                # docs.json was reloaded without it since the message was sent
+                await self.respond(interaction, content="This page is no longer available.", ephemeral=True)
+                return
+            message = self.page_message(pages, kind, key, page, menu=True)
+            if shared:
+                await self.respond(interaction, **message, ephemeral=True)
+            elif interaction.response.is_done():
+                await interaction.edit_original_response(**message)
+            else:
+                await interaction.response.edit_message(**message)
+            # Component clicks have no completion event to settle the request
+            self._settle_reservation(interaction, sent=True)
         except Exception as e:
             await self.handle_command_error(interaction, e)
 
     @app_commands.command(
-        name="home",
-        description="Get main TRMNL resources and information"
+        name="browse",
+        description="Page through the TRMNL docs by category"
     )
-    async def home(self, interaction: discord.Interaction) -> None:
+    @app_commands.describe(category="The category to open first")
+    async def browse(self, interaction: discord.Interaction, category: Optional[str] = None) -> None:
         try:
-            if not await self.handle_rate_limit(interaction, "home"):
+            if not await self.handle_rate_limit(interaction, "browse", ephemeral=True):
                 return
 
-            doc = self.docs_data["docs"]["home"]
-            embed = discord.Embed(
-                title=doc["title"],
-                description=doc["content"],
-                color=0xBEBEFE
-            )
-            for name, url in doc["links"].items():
-                embed.add_field(name=name, value=url, inline=False)
-            await interaction.response.send_message(embed=embed)
+            pages = self.pages_for(interaction)
+            if category not in pages.categories:
+                category = next(iter(pages.categories), None)
+            if category is None:
+                await self.respond(interaction, content="The docs have no categories.", ephemeral=True)
+                return
+            await self.respond(interaction, **self.page_message(pages, CATEGORY, category, menu=True), ephemeral=True)
         except Exception as e:
             await self.handle_command_error(interaction, e)
 
+    @browse.autocomplete("category")
+    async def browse_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        current = current.lower()
+        return [
+            app_commands.Choice(name=option.label, value=option.value)
+            for option in self.pages_for(interaction).menu
+            if current in option.label.lower()
+        ][:25]
+
     @app_commands.command(
-        name="docs",
-        description="Get TRMNL documentation links"
+        name="search",
+        description="Search the TRMNL documentation"
     )
-    async def docs(self, interaction: discord.Interaction) -> None:
+    @app_commands.describe(query="What to look for")
+    async def search(self, interaction: discord.Interaction, query: app_commands.Range[str, 1, 100]) -> None:
         try:
-            if not await self.handle_rate_limit(interaction, "docs"):
+            if not await self.handle_rate_limit(interaction, "search", ephemeral=True):
                 return
 
-            main_links = self.docs_data["categories"]["main"]["links"]
-            embed = discord.Embed(
-                title="TRMNL Documentation",
-                description="Documentation and resource links:",
-                color=0xBEBEFE
-            )
-            for name, url in main_links.items():
-                embed.add_field(name=name, value=url, inline=False)
-            await interaction.response.send_message(embed=embed)
+            results = self.search_index.search(query, limit=SEARCH_RESULTS)
+            if not results:
+                embed = discord.Embed(
+                    title="No Results",
+                    description=f"Nothing in the docs matches **{query}**.",
+                    color=EMBED_COLOR
+                )
+            else:
+                embed = discord.Embed(
+                    title="Search Results",
+                    description=f"Top matches for **{query}**:",
+                    color=EMBED_COLOR
+                )
+                for _, document in results:
+                    value = document["url"] or f"Use `/{document['command']}`"
+                    embed.add_field(name=document["title"], value=value, inline=False)
+            await self.respond(interaction, embed=embed, ephemeral=True)
         except Exception as e:
             await self.handle_command_error(interaction, e)
 
     @app_commands.command(
-        name="framework",
-        description="Get TRMNL framework documentation"
+        name="doc",
+        description="Look up a TRMNL docs page or link"
     )
-    async def framework(self, interaction: discord.Interaction) -> None:
+    @app_commands.describe(topic="Start typing a page or link name")
+    async def doc(self, interaction: discord.Interaction, topic: app_commands.Range[str, 1, 100]) -> None:
         try:
-            if not await self.handle_rate_limit(interaction, "framework"):
+            if not await self.handle_rate_limit(interaction, "doc"):
                 return
 
-            doc = self.docs_data["docs"]["framework"]
-            embed = discord.Embed(
-                title=doc["title"],
-                description=doc["content"],
-                color=0xBEBEFE
-            )
-            for name, url in doc["links"].items():
-                embed.add_field(name=name, value=url, inline=False)
-            await interaction.response.send_message(embed=embed)
+            found = self.topic_index.resolve(topic)
+            if found is None:
+                embed = discord.Embed(
+                    title="Not Found",
+                    description=f"No docs page or link matches **{topic}**.",
+                    color=EMBED_COLOR
+                )
+                await self.respond(interaction, embed=embed, ephemeral=True)
+            elif found.command is not None:
+                await self.respond(interaction, **self.page_message(self.pages_for(interaction), DOC, found.command))
+            else:
+                # Crawled pages (see ingest.py) provide a summary for the link
+                page = self.pages.get(found.url) or {}
+                description = page.get("summary") or found.url
+                embed = discord.Embed(title=found.name, url=found.url, description=description, color=EMBED_COLOR)
+                await self.respond(interaction, embed=embed)
         except Exception as e:
             await self.handle_command_error(interaction, e)
 
+    @doc.autocomplete("topic")
+    async def doc_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        # Runs on every keystroke: answer from the prebuilt index only
+        return [
+            app_commands.Choice(name=topic.name[:100], value=topic.key)
+            for topic in self.topic_index.suggest(current)
+        ]
+
     @app_commands.command(
-        name="news",
-        description="Get latest TRMNL news and updates"
+        name="language",
+        description="Choose the language of the doc commands"
     )
-    async def news(self, interaction: discord.Interaction) -> None:
+    @app_commands.describe(
+        language="A docs language, or auto to follow your Discord language",
+        server="Set the default for everyone in this server (needs Manage Server)"
+    )
+    async def language(self, interaction: discord.Interaction, language: str, server: bool = False) -> None:
         try:
-            if not await self.handle_rate_limit(interaction, "news"):
+            if not await self.handle_rate_limit(interaction, "language", ephemeral=True):
                 return
 
-            doc = self.docs_data["docs"]["news"]
-            embed = discord.Embed(
-                title=doc["title"],
-                description=doc["content"],
-                color=0xBEBEFE
-            )
-            for name, url in doc["links"].items():
-                embed.add_field(name=name, value=url, inline=False)
-            await interaction.response.send_message(embed=embed)
+            locale = None if language == "auto" else language
+            if locale is not None and locale not in self.localized_embeds:
+                available = ", ".join(f"`{name}`" for name in self.localized_embeds)
+                embed = discord.Embed(
+                    title="Unknown Language",
+                    description=f"The docs are available in {available}.",
+                    color=EMBED_COLOR
+                )
+                await self.respond(interaction, embed=embed, ephemeral=True)
+                return
+
+            preferences = self.locale_preferences
+            if server:
+                if interaction.guild_id is None or not interaction.permissions.manage_guild:
+                    embed = discord.Embed(
+                        title="Not Allowed",
+                        description="Only members who can manage this server can set its language.",
+                        color=EMBED_COLOR
+                    )
+                    await self.respond(interaction, embed=embed, ephemeral=True)
+                    return
+                preferences.set(preferences.guilds, interaction.guild_id, locale)
+                target = "this server"
+            else:
+                preferences.set(preferences.users, interaction.user.id, locale)
+                target = "you"
+
+            # Write a copy, so the file never sees a preference set while it is being saved
+            async with self._preferences_saving:
+                saved = LocalePreferences(dict(preferences.users), dict(preferences.guilds))
+                await asyncio.get_running_loop().run_in_executor(None, saved.save, LOCALE_PREFERENCES_PATH)
+
+            if locale is None:
+                description = f"Doc commands follow the Discord language for {target}."
+            else:
+                description = f"Doc commands are now shown in `{locale}` for {target}."
+            embed = discord.Embed(title="Language Updated", description=description, color=EMBED_COLOR)
+            await self.respond(interaction, embed=embed, ephemeral=True)
         except Exception as e:
             await self.handle_command_error(interaction, e)
 
+    @language.autocomplete("language")
+    async def language_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        current = current.lower()
+        choices = [app_commands.Choice(name="Auto (your Discord language)", value="auto")]
+        choices.extend(
+            app_commands.Choice(name=f"{discord.Locale(locale).name.replace('_', ' ').title()} ({locale})", value=locale)
+            for locale in self.localized_embeds
+        )
+        return [choice for choice in choices if current in choice.name.lower()][:25]
+
     @app_commands.command(
-        name="updates",
-        description="Get all TRMNL blog posts and updates"
+        name="sync",
+        description="Sync all slash commands"
+    )
+    @app_commands.describe(
+        scope="Sync global commands or only this server's commands",
+        force="Push even if no command changed since the last sync"
     )
-    async def updates(self, interaction: discord.Interaction) -> None:
+    @app_commands.default_permissions(administrator=True)
+    async def sync(
+        self,
+        interaction: discord.Interaction,
+        scope: Literal["global", "guild"] = "global",
+        force: bool = False
+    ) -> None:
+        """
+        Sync all slash commands.
+        Only administrators can use this command.
+        """
         try:
-            if not await self.handle_rate_limit(interaction, "updates"):
+            guild = interaction.guild if scope == "guild" else None
+            if scope == "guild" and guild is None:
+                # Checked first, as a deferred response could no longer be made ephemeral
+                embed = discord.Embed(
+                    title="Not Allowed",
+                    description="The guild scope syncs a server's commands, so use it in a server.",
+                    color=EMBED_COLOR
+                )
+                await self.respond(interaction, embed=embed, ephemeral=True)
+                return
+            if not await self.handle_rate_limit(interaction, "sync"):
                 return
 
-            blog_links = self.docs_data["categories"]["blog"]["links"]
+            result = await self.command_syncer.sync(guild=guild, force=force)
+            if result.pushed:
+                embed = discord.Embed(
+                    title="Slash Commands Synced",
+                    description=f"Successfully synced {len(result.synced)} commands.",
+                    color=0x00FF00
+                )
+            else:
+                embed = discord.Embed(
+                    title="Slash Commands Up To Date",
+                    description=f"No changes since the last sync, skipped uploading {result.total} commands.",
+                    color=0x00FF00
+                )
+            diff = result.diff
+            for label, names in (("Added", diff.added), ("Changed", diff.changed), ("Removed", diff.removed)):
+                if names:
+                    embed.add_field(name=label, value=name_list(names), inline=False)
+            if guild is not None:
+                embed.set_footer(text="Only commands registered for this server were compared; "
+                                      "sync the global scope for all other commands.")
+            await self.respond(interaction, embed=embed)
+        except Exception as e:
+            await self.handle_command_error(interaction, e)
+
+    @app_commands.command(
+        name="reload_docs",
+        description="Reload the docs.json file"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def reload_docs_command(self, interaction: discord.Interaction) -> None:
+        """
+        Reload the docs.json file.
+        Only administrators can use this command.
+        """
+        try:
+            if not await self.handle_rate_limit(interaction, "reload_docs"):
+                return
+
+            changed = await self.reload_docs_async()
             embed = discord.Embed(
-                title="TRMNL Updates",
-                description="All blog posts and updates:",
-                color=0xBEBEFE
+                title="Docs Reloaded",
+                description="Successfully reloaded docs.json" + ("" if changed else " (no changes)"),
+                color=0x00FF00
             )
-            for name, url in blog_links.items():
-                embed.add_field(name=name, value=url, inline=False)
-            await interaction.response.send_message(embed=embed)
+            embed.set_footer(text=f"Reloads: {self.docs_reloads} | Failures: {self.docs_reload_failures}")
+            await self.respond(interaction, embed=embed)
         except Exception as e:
             await self.handle_command_error(interaction, e)
 
     @app_commands.command(
-        name="privacy",
-        description="Get TRMNL privacy policy information"
+        name="stats",
+        description="Show command latency and rate limit statistics"
     )
-    async def privacy(self, interaction: discord.Interaction) -> None:
+    @app_commands.default_permissions(administrator=True)
+    async def stats(self, interaction: discord.Interaction) -> None:
+        """
+        Show per-command metrics.
+        Only administrators can use this command.
+        """
         try:
-            if not await self.handle_rate_limit(interaction, "privacy"):
+            if not await self.handle_rate_limit(interaction, "stats", ephemeral=True):
                 return
 
-            doc = self.docs_data["docs"]["privacy"]
+            metrics = self.metrics
+            busiest = sorted(metrics.commands.items(), key=lambda item: item[1].calls, reverse=True)[:STATS_COMMANDS]
+            lines = [
+                f"`/{name}` {command.calls} calls, p50 {command.latency.percentile(0.5) * 1000:.1f} ms, "
+                f"p99 {command.latency.percentile(0.99) * 1000:.1f} ms, "
+                f"{command.rate_limited} rate limited, {command.errors} errors"
+                for name, command in busiest
+            ]
             embed = discord.Embed(
-                title=doc["title"],
-                description=doc["content"],
-                color=0xBEBEFE
+                title="Command Stats",
+                description="\n".join(lines) or "No commands handled yet.",
+                color=EMBED_COLOR
             )
-            for name, url in doc["links"].items():
-                embed.add_field(name=name, value=url, inline=False)
-            await interaction.response.send_message(embed=embed)
+            embed.add_field(name="Invalid Requests", value=str(self.rate_limiter.invalid_requests))
+            embed.add_field(name="Circuit", value=self.rate_limiter.circuit_state.name.lower().replace("_", "-"))
+            embed.add_field(name="Global Remaining", value=str(self.rate_limiter.global_remaining))
+            embed.set_footer(text=f"Uptime: {time.monotonic() - metrics.started_at:.0f}s")
+            await self.respond(interaction, embed=embed, ephemeral=True)
         except Exception as e:
             await self.handle_command_error(interaction, e)
 
     @app_commands.command(
-        name="terms",
-        description="Get TRMNL terms of service"
+        name="usage",
+        description="Show which commands are used most, per day"
     )
-    async def terms(self, interaction: discord.Interaction) -> None:
+    @app_commands.describe(
+        days="How many days back to count, including today",
+        all_servers="Count every server instead of this one (bot owner only)"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def usage(
+        self,
+        interaction: discord.Interaction,
+        days: app_commands.Range[int, 1, 90] = 7,
+        all_servers: bool = False
+    ) -> None:
+        """
+        Show command usage from the daily rollups.
+        Only administrators can use this command.
+        """
         try:
-            if not await self.handle_rate_limit(interaction, "terms"):
+            if not await self.handle_rate_limit(interaction, "usage", ephemeral=True):
+                return
+
+            if self.analytics is None:
+                await self.respond(interaction, content="Usage analytics are disabled.", ephemeral=True)
                 return
+            if all_servers and not await self.bot.is_owner(interaction.user):
+                await self.respond(interaction, content="Only the bot owner can see every server's usage.", ephemeral=True)
+                return
+
+            # Writing the buffer and querying can outlast Discord's 3 second deadline
+            if not interaction.response.is_done():
+                await interaction.response.defer(ephemeral=True, thinking=True)
+            # Write what is still buffered so the answer includes the latest commands
+            await self.analytics.flush()
+            guild_id = None if all_servers else interaction.guild_id or DIRECT_MESSAGES
+            since_day = int(self.analytics.clock() // DAY) - days + 1
+            loop = asyncio.get_running_loop()
+            store = self.analytics.store
+            commands_used = await loop.run_in_executor(None, store.usage, since_day, guild_id, STATS_COMMANDS)
+            daily = await loop.run_in_executor(None, store.daily_calls, since_day, guild_id)
 
-            legal_links = self.docs_data["categories"]["legal"]["links"]
+            lines = [
+                f"`/{usage.command}` {usage.calls} calls, {usage.errors} errors, {usage.rate_limited} rate limited"
+                for usage in commands_used
+            ]
             embed = discord.Embed(
-                title="Terms of Service",
-                description="TRMNL Terms of Service:",
-                color=0xBEBEFE
+                title=f"Command Usage, Last {days} Day{'s' if days != 1 else ''}",
+                description="\n".join(lines) or "No commands used yet.",
+                color=EMBED_COLOR
             )
-            embed.add_field(name="Terms of Service", value=legal_links["Terms of Service"], inline=False)
-            await interaction.response.send_message(embed=embed)
+            embed.add_field(name="Total Calls", value=str(sum(daily.values())))
+            if daily:
+                day, calls = max(daily.items(), key=lambda item: item[1])
+                embed.add_field(name="Busiest Day", value=f"{time.strftime('%Y-%m-%d', time.gmtime(day * DAY))} ({calls})")
+            embed.set_footer(text=f"{'All servers' if all_servers else 'This server'} | Dropped events: {self.analytics.dropped}")
+            await self.respond(interaction, embed=embed, ephemeral=True)
         except Exception as e:
             await self.handle_command_error(interaction, e)
 
     @app_commands.command(
-        name="diy",
-        description="Get information about DIY TRMNL options"
+        name="shards",
+        description="Show gateway latency and guild count per shard"
     )
-    async def diy(self, interaction: discord.Interaction) -> None:
+    @app_commands.default_permissions(administrator=True)
+    async def shards(self, interaction: discord.Interaction) -> None:
+        """
+        Show the shards run by this process.
+        Only administrators can use this command.
+        """
         try:
-            if not await self.handle_rate_limit(interaction, "diy"):
+            if not await self.handle_rate_limit(interaction, "shards", ephemeral=True):
                 return
 
-            doc = self.docs_data["docs"]["diy"]
+            stats = shard_stats(self.bot) if hasattr(self.bot, "latencies") else []
+            lines = [
+                f"`#{shard.shard_id}` {shard.latency * 1000:.0f} ms, {shard.guilds} guilds"
+                + (" (disconnected)" if shard.closed else "")
+                for shard in stats[:SHARDS_LISTED]
+            ]
+            if len(stats) > SHARDS_LISTED:
+                lines.append(f"...and {len(stats) - SHARDS_LISTED} more")
             embed = discord.Embed(
-                title=doc["title"],
-                description=doc["content"],
-                color=0xBEBEFE
+                title="Shards",
+                description="\n".join(lines) or "This bot is not sharded.",
+                color=EMBED_COLOR
             )
-            for name, url in doc["links"].items():
-                embed.add_field(name=name, value=url, inline=False)
-            await interaction.response.send_message(embed=embed)
+            embed.set_footer(text=f"Shard count: {getattr(self.bot, 'shard_count', None) or 1} | Guilds: {len(self.bot.guilds)}")
+            await self.respond(interaction, embed=embed, ephemeral=True)
         except Exception as e:
             await self.handle_command_error(interaction, e)
 
 async def setup(bot) -> None:
-    await bot.add_cog(trmnl(bot))
\ No newline at end of file
+    # Use the docs the bot started preparing during login, or prepare them off the event loop
+    loop = asyncio.get_running_loop()
+    pending = getattr(bot, "preloaded_docs", None)
+    if isinstance(pending, asyncio.Future):
+        bot.preloaded_docs = None
+    else:
+        pending = loop.run_in_executor(None, load_prepared_docs)
+    try:
+        prepared = await pending
+    except Exception as e:
+        # Load anyway, so the commands stay up and the watcher picks up a fixed docs.json
+        print(f"Failed to load docs.json, starting with the last compiled docs: {e}")
+        prepared = await loop.run_in_executor(None, load_fallback_docs)
+    await bot.add_cog(trmnl(bot, prepared))
\ No newline at end of file
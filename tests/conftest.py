@@ -0,0 +1,24 @@
+import pytest
+
+class FakeClock:
+    """Stands in for time.monotonic or time.time; tests move time by setting `now`"""
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def state_paths(tmp_path, monkeypatch):
+    """Keep the state files the bot writes next to docs.json in tmp_path instead"""
+    monkeypatch.setattr("src.bot.trmnl.SYNC_MANIFEST_PATH", tmp_path / "sync_manifest.json")
+    monkeypatch.setattr("src.bot.trmnl.SNAPSHOT_PATH", tmp_path / "docs_snapshot.bin")
+    monkeypatch.setattr("src.bot.trmnl.CONTENT_STORE_PATH", tmp_path / "content_store.json")
+    monkeypatch.setattr("src.bot.trmnl.LOCALE_PREFERENCES_PATH", tmp_path / "locale_preferences.json")
+    monkeypatch.setattr("src.bot.feeds.FEED_STATE_PATH", tmp_path / "feed_state.json")
+    monkeypatch.setattr("src.bot.analytics.ANALYTICS_PATH", tmp_path / "analytics.db")
+    return tmp_path
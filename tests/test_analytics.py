@@ -0,0 +1,175 @@
+import pytest
+import asyncio
+from unittest.mock import MagicMock
+from src.bot.analytics import (
+    ANALYTICS_PATH,
+    DAY,
+    DIRECT_MESSAGES,
+    ERROR,
+    OK,
+    RATE_LIMITED,
+    AnalyticsSink,
+    AnalyticsStore,
+    UsageEvent,
+    create_analytics,
+)
+from src.bot.metrics import MetricsRegistry
+from src.bot.rate_limiter import RateLimitedCog
+
+class FailingStore:
+    """Raises on write until told otherwise"""
+    def __init__(self):
+        self.failing = True
+        self.batches = []
+
+    def write(self, events):
+        if self.failing:
+            raise OSError("disk full")
+        self.batches.append(list(events))
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def clock(clock):
+    # An hour into day 100, where the tests' events fall
+    clock.now = 100 * DAY + 3600.0
+    return clock
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = AnalyticsStore(tmp_path / "analytics.db", clock=clock)
+    yield store
+    store.close()
+
+def test_store_rolls_up_per_day_guild_and_command(store):
+    today = 100 * DAY
+    store.write([
+        UsageEvent(today + 10, "home", 1, OK),
+        UsageEvent(today + 20, "home", 1, ERROR),
+        UsageEvent(today + 30, "home", 2, RATE_LIMITED),
+        UsageEvent(today - DAY, "search", 1, OK),
+    ])
+    store.write([UsageEvent(today + 40, "home", 1, OK)])
+
+    guild = store.usage(since_day=99, guild_id=1)
+    assert [(usage.command, usage.calls, usage.errors, usage.rate_limited) for usage in guild] == [
+        ("home", 3, 1, 0),
+        ("search", 1, 0, 0),
+    ]
+    everywhere = store.usage(since_day=100)
+    assert [(usage.command, usage.calls, usage.rate_limited) for usage in everywhere] == [("home", 4, 1)]
+    assert store.daily_calls(since_day=0, guild_id=1) == {99: 1, 100: 3}
+
+def test_store_prunes_expired_raw_events_but_keeps_rollups(tmp_path, clock):
+    store = AnalyticsStore(tmp_path / "analytics.db", retention_days=7, clock=clock)
+    store.write([UsageEvent(clock.now - 10 * DAY, "home", 1, OK)])
+    clock.now += 3600.0
+
+    store.write([UsageEvent(clock.now, "home", 1, OK)])
+
+    conn = store._connection()
+    assert conn.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 1
+    assert store.usage(since_day=0)[0].calls == 2
+    store.close()
+
+@pytest.mark.asyncio
+async def test_sink_writes_in_batches(store, clock):
+    sink = AnalyticsSink(store, batch_size=3, clock=clock)
+    for i in range(7):
+        assert sink.record("home", i % 2 or None)
+
+    assert await sink.flush() == 7
+
+    assert not sink.pending
+    assert sink.written == 7
+    assert store.daily_calls(since_day=0, guild_id=DIRECT_MESSAGES) == {100: 4}
+    assert store._connection().execute("SELECT COUNT(*) FROM events").fetchone()[0] == 7
+
+@pytest.mark.asyncio
+async def test_full_buffer_drops_new_events(store, clock):
+    sink = AnalyticsSink(store, batch_size=2, max_pending=4, clock=clock)
+
+    recorded = [sink.record("home", 1) for _ in range(6)]
+
+    assert recorded == [True] * 4 + [False] * 2
+    assert (sink.recorded, sink.dropped, len(sink.pending)) == (4, 2, 4)
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_kept_for_the_next_flush(clock):
+    store = FailingStore()
+    sink = AnalyticsSink(store, batch_size=2, max_pending=3, clock=clock)
+    for command in ("a", "b", "c"):
+        sink.record(command, 1)
+
+    assert await sink.flush() == 0
+
+    # The failed batch went back in front of the buffer
+    assert sink.failed_batches == 1
+    assert [event.command for event in sink.pending] == ["a", "b", "c"]
+    assert not sink.record("d", 1)
+    assert sink.dropped == 1
+
+    store.failing = False
+    assert await sink.flush() == 3
+    assert [[event.command for event in batch] for batch in store.batches] == [["a", "b"], ["c"]]
+
+def test_requeue_keeps_the_newest_events_that_fit(clock):
+    sink = AnalyticsSink(FailingStore(), batch_size=2, max_pending=3, clock=clock)
+    sink.record("c", 1)
+    sink.record("d", 1)
+
+    sink._requeue([UsageEvent(0.0, "a", 1, OK), UsageEvent(0.0, "b", 1, OK)])
+
+    assert [event.command for event in sink.pending] == ["b", "c", "d"]
+    assert sink.dropped == 1
+
+@pytest.mark.asyncio
+async def test_background_task_flushes_full_batches_and_close_writes_the_rest(store, clock):
+    sink = AnalyticsSink(store, batch_size=2, flush_interval=60.0, clock=clock)
+    sink.start()
+    sink.record("home", 1)
+    sink.record("home", 1)
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+        if sink.written:
+            break
+    assert sink.written == 2
+
+    sink.record("search", 1)
+    await sink.close()
+
+    assert sink.written == 3
+    reopened = AnalyticsStore(store.path)
+    assert [usage.command for usage in reopened.usage(since_day=0)] == ["home", "search"]
+    reopened.close()
+
+def test_create_analytics(tmp_path):
+    sink = create_analytics({"analytics": {"path": str(tmp_path / "usage.db"), "batch_size": 50, "max_pending": 10}})
+    assert sink.batch_size == 50
+    assert sink.max_pending == 50  # never below one batch
+    assert create_analytics({"analytics": {"enabled": False}}) is None
+    assert create_analytics({}).store.path == str(ANALYTICS_PATH)
+
+@pytest.mark.asyncio
+async def test_cog_records_outcomes(store, clock):
+    bot = MagicMock()
+    bot.metrics = MetricsRegistry()
+    bot.analytics = AnalyticsSink(store, clock=clock)
+    cog = RateLimitedCog(bot)
+    command = MagicMock(qualified_name="home", binding=cog)
+
+    for extras in ({}, {"failed": True}, {"rate_limited": True}):
+        interaction = MagicMock(guild_id=5)
+        interaction.extras = dict(extras)
+        await cog.interaction_check(interaction)
+        await cog.on_app_command_completion(interaction, command)
+    # Commands of other cogs are not recorded
+    await RateLimitedCog(bot).on_app_command_completion(interaction, command)
+
+    assert [(event.command, event.guild_id, event.outcome) for event in bot.analytics.pending] == [
+        ("home", 5, OK),
+        ("home", 5, ERROR),
+        ("home", 5, RATE_LIMITED),
+    ]
+    assert "trmnl_analytics_dropped_events 0" in bot.metrics.render_prometheus()
@@ -0,0 +1,49 @@
+import pytest
+import json
+from src.bot.autocomplete import TopicIndex
+from src.bot.trmnl import DOCS_PATH
+
+@pytest.fixture
+def index():
+    return TopicIndex.build(json.loads(DOCS_PATH.read_text()))
+
+def names(topics):
+    return [topic.name for topic in topics]
+
+def test_prefix_of_name(index):
+    assert "Privacy Policy" in names(index.suggest("priv"))
+
+def test_prefix_of_later_word(index):
+    assert "Design System" in names(index.suggest("sys"))
+
+def test_case_and_whitespace_are_ignored(index):
+    assert names(index.suggest("  TRMNL   fram")) == ["TRMNL Framework"]
+
+def test_fuzzy_fallback(index):
+    assert "Privacy Policy" in names(index.suggest("privcy policy"))
+
+def test_limit_and_empty_prefix(index):
+    assert len(index.suggest("", limit=3)) == 3
+    assert len(index.suggest("b", limit=2)) == 2
+
+def test_links_are_deduplicated(index):
+    assert names(index.suggest("byos")) == ["BYOS"]
+
+def test_resolve(index):
+    assert index.resolve("d:home").command == "home"
+    assert index.resolve("byos").url == "https://docs.usetrmnl.com/go/diy/byos"
+    assert index.resolve("Terms of Service").command == "terms"
+    assert index.resolve("qqqqqq") is None
+
+def test_fuzzy_fallback_needs_a_few_characters(index):
+    assert index.suggest("pz") == []
+
+def test_link_values_survive_a_reload():
+    docs = json.loads(DOCS_PATH.read_text())
+    before = TopicIndex.build(docs)
+    value = before.resolve("byos").key
+    # A new link earlier in the docs shifts every later link's position
+    first_doc = next(iter(docs["docs"].values()))
+    first_doc["links"] = {"Brand New Link": "https://docs.usetrmnl.com/new", **first_doc.get("links", {})}
+    after = TopicIndex.build(docs)
+    assert after.resolve(value).url == "https://docs.usetrmnl.com/go/diy/byos"
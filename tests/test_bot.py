@@ -0,0 +1,133 @@
+import pytest
+import asyncio
+import discord
+import gc
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+import bot as bot_module
+
+GATEWAY = (4, "wss://gateway.discord.gg", {"total": 1000, "remaining": 1000, "reset_after": 0, "max_concurrency": 1})
+
+@pytest.mark.asyncio
+async def test_auto_sharding_uses_gateway_shard_count():
+    # Setup
+    bot = bot_module.DiscordBot({})
+    bot.http.get_bot_gateway = AsyncMock(return_value=GATEWAY)
+
+    # Execute
+    with patch.object(bot, "launch_shard", AsyncMock()) as launch_shard:
+        await bot.launch_shards()
+
+    # Verify
+    assert bot.shard_count == 4
+    assert [call.args[1] for call in launch_shard.call_args_list] == [0, 1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_configured_shard_range_launches_only_its_slice():
+    # Setup
+    bot = bot_module.DiscordBot({"sharding": {"shard_count": 8, "shard_range": [2, 4]}})
+    bot.http.get_bot_gateway = AsyncMock(return_value=GATEWAY)
+
+    # Execute
+    with patch.object(bot, "launch_shard", AsyncMock()) as launch_shard:
+        await bot.launch_shards()
+
+    # Verify
+    bot.http.get_bot_gateway.assert_not_called()
+    assert bot.shard_count == 8
+    assert [call.args[1] for call in launch_shard.call_args_list] == [2, 3]
+
+@pytest.mark.asyncio
+async def test_lean_gateway_settings():
+    bot = bot_module.DiscordBot({})
+
+    assert bot.intents.guilds
+    assert not bot.intents.message_content
+    assert not bot.intents.guild_messages
+    assert bot._connection.max_messages is None
+    assert not bot._connection.member_cache_flags.value
+    assert not bot._connection._chunk_guilds
+
+@pytest.mark.asyncio
+async def test_default_gateway_profile():
+    bot = bot_module.DiscordBot({"gateway": {"profile": "default"}})
+
+    assert bot.intents == bot_module.discord.Intents.default()
+    assert bot._connection.max_messages == 1000
+    assert bot._connection.member_cache_flags.voice
+
+def test_load_config(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"prefix": "!"}))
+    assert bot_module.load_config(str(path)) == {"prefix": "!"}
+    assert bot_module.load_config(str(tmp_path / "missing.json")) == {}
+    path.write_text("{broken")
+    with pytest.raises(SystemExit):
+        bot_module.load_config(str(path))
+
+USER = {"id": "1", "username": "trmnl", "discriminator": "0", "avatar": None, "global_name": None}
+
+@pytest.fixture
+def offline_bot(state_paths):
+    bot = bot_module.DiscordBot({})
+    bot.http.static_login = AsyncMock(return_value=USER)
+    bot.application_info = AsyncMock(return_value=MagicMock(id=1, interactions_endpoint_url=None))
+    bot.connect = AsyncMock()
+    return bot
+
+@pytest.mark.asyncio
+async def test_startup_loads_extensions_and_records_phases(offline_bot):
+    # Execute
+    await offline_bot.start("token")
+
+    # Verify
+    assert offline_bot.get_cog("trmnl").embeds["home"].title
+    assert offline_bot.get_cog("feeds") is not None
+    assert offline_bot.preloaded_docs is None  # consumed by the trmnl extension
+    assert {"login", "extensions", "src.bot.trmnl", "src.bot.feeds"} <= set(offline_bot.startup.phases)
+    assert offline_bot.startup.mark_ready()
+    assert "ready after" in offline_bot.startup.report()
+
+@pytest.mark.asyncio
+async def test_failing_extension_does_not_stop_startup(offline_bot, monkeypatch, capsys):
+    # Setup
+    monkeypatch.setattr(bot_module, "EXTENSIONS", ("src.bot.missing_extension", "src.bot.trmnl"))
+
+    # Execute
+    await offline_bot.start("token")
+
+    # Verify
+    assert offline_bot.get_cog("trmnl") is not None
+    assert "Failed to load extension src.bot.missing_extension" in capsys.readouterr().out
+
+@pytest.mark.asyncio
+async def test_failed_login_retrieves_the_preloaded_docs(offline_bot, monkeypatch):
+    # Setup
+    def broken_docs():
+        raise ValueError("docs.json is broken")
+    monkeypatch.setattr(bot_module, "load_prepared_docs", broken_docs)
+    offline_bot.http.static_login = AsyncMock(side_effect=discord.LoginFailure("bad token"))
+    loop = asyncio.get_running_loop()
+    errors = []
+    loop.set_exception_handler(lambda loop, context: errors.append(context["message"]))
+
+    # Execute
+    with pytest.raises(discord.LoginFailure):
+        await offline_bot.start("token")
+    await asyncio.sleep(0.05)
+    gc.collect()
+
+    # Verify
+    assert offline_bot.preloaded_docs is None
+    assert errors == []
+
+@pytest.mark.parametrize("config", [
+    {"rate_limits": {"search": {"limit": 0, "per": 10}}},
+    {"rate_limits": {"search": {"scope": "server", "limit": 1, "per": 10}}},
+    {"rate_limits": {"search": {"per": 10}}},
+    {"rate_limit_queue": {"max_depth": 0}},
+    {"rate_limit_queue": {"timeout": "soon"}},
+])
+def test_invalid_rate_limit_options_fail_startup(config):
+    with pytest.raises(ValueError):
+        bot_module.DiscordBot(config)
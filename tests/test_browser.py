@@ -0,0 +1,107 @@
+import pytest
+import discord
+from unittest.mock import AsyncMock, MagicMock
+from src.bot.browser import CATEGORY, CATEGORY_MENU_ID, DOC, MENU_CHUNK, MENU_OPTIONS, CategoryMenu, PageButton, browser_view, menu_options
+
+MENU = tuple(discord.SelectOption(label=f"Category {i}", value=f"category-{i}") for i in range(30))
+
+def custom_ids(view):
+    return [item.custom_id for item in view.children]
+
+async def route(custom_id, interaction):
+    """Rebuild the button from its custom_id, as discord.py does for a click"""
+    match = PageButton.__discord_ui_compiled_template__.fullmatch(custom_id)
+    assert match is not None
+    button = await PageButton.from_custom_id(interaction, MagicMock(), match)
+    await button.callback(interaction)
+
+@pytest.mark.asyncio
+async def test_view_encodes_neighbouring_pages():
+    view = browser_view(DOC, "updates", 2, 5, MENU)
+
+    assert custom_ids(view) == ["trmnl:page:d:updates:1:p", "trmnl:page:d:updates:3:n", CATEGORY_MENU_ID]
+    assert all(len(custom_id) <= 100 for custom_id in custom_ids(view))
+    assert not any(item.item.disabled for item in view.children[:2])
+    # Discord allows 25 options per select menu; the rest are a "more" option away
+    options = view.children[2].item.options
+    assert len(options) <= MENU_OPTIONS
+    assert options[-1].label == "More categories…"
+
+def test_menu_reaches_every_category():
+    first = menu_options(MENU)
+    second = menu_options(MENU, first[-1].value)
+
+    assert [option.value for option in first[:-1]] == [option.value for option in MENU[:MENU_CHUNK]]
+    assert first[-1].value == "category-23"
+    # The next chunk holds the rest, and leads back to the first one
+    assert [option.value for option in second] == ["category-0"] + [option.value for option in MENU[MENU_CHUNK:]]
+    assert second[0].label == "Previous categories…"
+    assert menu_options(MENU[:MENU_OPTIONS]) == list(MENU[:MENU_OPTIONS])
+
+@pytest.mark.asyncio
+async def test_buttons_are_disabled_at_the_ends():
+    first = browser_view(CATEGORY, "blog", 0, 3)
+    last = browser_view(CATEGORY, "blog", 2, 3)
+
+    assert [item.item.disabled for item in first.children] == [True, False]
+    assert [item.item.disabled for item in last.children] == [False, True]
+    # Custom ids stay unique even where both buttons point at the same page
+    assert len(set(custom_ids(browser_view(CATEGORY, "blog", 0, 2)))) == 2
+
+@pytest.mark.asyncio
+async def test_single_page_has_only_the_menu():
+    assert custom_ids(browser_view(DOC, "home", 0, 1, MENU)) == [CATEGORY_MENU_ID]
+    assert custom_ids(browser_view(DOC, "home", 0, 1)) == []
+
+@pytest.mark.asyncio
+async def test_clicks_are_routed_from_the_custom_id_alone():
+    cog = MagicMock()
+    cog.show_page = AsyncMock()
+    interaction = MagicMock()
+    interaction.client.get_cog.return_value = cog
+
+    await route("trmnl:page:c:blog:3:n", interaction)
+
+    interaction.client.get_cog.assert_called_with("trmnl")
+    cog.show_page.assert_awaited_once_with(interaction, CATEGORY, "blog", 3)
+
+@pytest.mark.asyncio
+async def test_menu_opens_the_chosen_category():
+    cog = MagicMock()
+    cog.show_page = AsyncMock()
+    interaction = MagicMock()
+    interaction.client.get_cog.return_value = cog
+    menu = await CategoryMenu.from_custom_id(interaction, discord.ui.Select(options=list(MENU[:3])), None)
+    menu.item._values = ["category-1"]
+
+    await menu.callback(interaction)
+
+    cog.show_page.assert_awaited_once_with(interaction, CATEGORY, "category-1", 0)
+
+@pytest.mark.asyncio
+async def test_click_without_the_docs_cog():
+    interaction = AsyncMock()
+    interaction.client = MagicMock()
+    interaction.client.get_cog.return_value = None
+
+    await route("trmnl:page:d:home:1:n", interaction)
+
+    assert interaction.response.send_message.call_args[1]["ephemeral"]
+
+def test_template_rejects_malformed_ids():
+    template = PageButton.__discord_ui_compiled_template__
+    assert template.fullmatch("trmnl:page:x:blog:1:n") is None
+    assert template.fullmatch("trmnl:page:c:Blog:1:n") is None
+    assert template.fullmatch("trmnl:page:c:blog:-1:n") is None
+
+@pytest.mark.asyncio
+async def test_sent_views_leave_no_state_per_message():
+    store = discord.ui.view.ViewStore(MagicMock())
+
+    # What discord.py does with the view of every message sent
+    for message_id in range(100):
+        store.add_view(browser_view(DOC, "updates", message_id % 5, 5, MENU), message_id)
+
+    assert store._views == {}
+    assert store._synced_message_views == {}
+    assert set(store._dynamic_items.values()) == {PageButton, CategoryMenu}
@@ -0,0 +1,130 @@
+import pytest
+from src.bot.circuit_breaker import CircuitState, InvalidRequestBreaker, SlidingWindowCounter, create_breaker
+
+def make_breaker(clock, **options):
+    # 100 invalid requests per 60 seconds: shed from 50, open at 80
+    options.setdefault("cooldown", 10.0)
+    options.setdefault("probes", 2)
+    return InvalidRequestBreaker(limit=100, window=60.0, clock=clock, **options)
+
+def record(breaker, count):
+    for _ in range(count):
+        breaker.record_invalid()
+
+def test_sliding_window_weights_the_previous_window():
+    counter = SlidingWindowCounter(60.0, now=0.0)
+    counter.add(10.0, 40)
+    assert counter.count(59.0) == 40
+    # A quarter into the next window, three quarters of the old count still overlap
+    counter.add(75.0, 5)
+    assert counter.count(75.0) == pytest.approx(40 * 0.75 + 5)
+    # Two windows later everything has slid out
+    assert counter.count(200.0) == 0
+
+def test_closed_below_shed_threshold(clock):
+    breaker = make_breaker(clock)
+    record(breaker, 49)
+    assert breaker.state is CircuitState.CLOSED
+    assert all(breaker.allow() is None for _ in range(100))
+    assert breaker.shed == 0
+
+def test_sheds_a_growing_share_when_approaching_the_limit(clock):
+    breaker = make_breaker(clock)
+    record(breaker, 65)  # halfway between shedding and opening
+
+    allowed = sum(breaker.allow() is None for _ in range(100))
+
+    assert allowed == 50
+    assert breaker.shed == 50
+    assert breaker.state is CircuitState.CLOSED
+
+def test_critical_calls_always_pass(clock):
+    breaker = make_breaker(clock)
+    record(breaker, 80)
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.allow(critical=True) is None
+    assert breaker.shed == 0
+
+def test_opens_then_half_opens_after_cooldown(clock):
+    breaker = make_breaker(clock)
+    record(breaker, 79)
+    assert breaker.record_invalid() is CircuitState.OPEN
+    assert breaker.opened == 1
+
+    clock.now += 4.0
+    assert breaker.allow() == pytest.approx(6.0)
+
+    clock.now += 6.0
+    assert breaker.state is CircuitState.HALF_OPEN
+    # Only the probes are let through
+    assert breaker.allow() is None
+    assert breaker.allow() is None
+    assert breaker.allow() == breaker.retry_after
+
+def test_invalid_probe_reopens(clock):
+    breaker = make_breaker(clock)
+    record(breaker, 80)
+    clock.now += 10.0
+    assert breaker.state is CircuitState.HALF_OPEN
+
+    assert breaker.record_invalid() is CircuitState.OPEN
+    assert breaker.opened == 2
+    assert breaker.allow() == pytest.approx(10.0)
+
+def test_successful_probes_close_once_the_window_drains(clock):
+    breaker = make_breaker(clock)
+    record(breaker, 80)
+    clock.now += 10.0
+    breaker.allow()
+    breaker.allow()
+
+    # The errors are still in the window: start another round of probes
+    breaker.record_success(probe=True)
+    breaker.record_success(probe=True)
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.probes_left == 2
+
+    # The next window only overlaps a quarter of the old one (20 errors)
+    clock.now += 95.0
+    breaker.record_success(probe=True)
+    breaker.record_success(probe=True)
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.allow() is None
+
+def test_only_probe_successes_close(clock):
+    breaker = make_breaker(clock)
+    record(breaker, 80)
+    clock.now += 95.0
+    assert breaker.admit() == (None, True)
+    # Responses to critical calls, which bypass the probes, do not count
+    breaker.record_success()
+    breaker.record_success()
+    assert breaker.state is CircuitState.HALF_OPEN
+    breaker.record_success(probe=True)
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.admit() == (None, True)
+    breaker.record_success(probe=True)
+    assert breaker.state is CircuitState.CLOSED
+
+def test_inconclusive_probe_frees_its_slot(clock):
+    breaker = make_breaker(clock, probes=1)
+    record(breaker, 80)
+    clock.now += 10.0
+    assert breaker.admit() == (None, True)
+    assert breaker.admit() == (breaker.retry_after, False)
+    breaker.record_inconclusive_probe()
+    assert breaker.admit() == (None, True)
+
+def test_successes_do_not_affect_a_closed_circuit(clock):
+    breaker = make_breaker(clock)
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+
+def test_create_breaker():
+    breaker = create_breaker({"circuit_breaker": {"shed_at": 0.2, "open_at": 0.4, "cooldown": 5, "probes": 1}})
+    assert breaker.shed_threshold == 2000
+    assert breaker.open_threshold == 4000
+    assert breaker.cooldown == 5.0
+    assert create_breaker(None).open_threshold == 8000
+    with pytest.raises(ValueError):
+        create_breaker({"circuit_breaker": {"shed_at": 0.9, "open_at": 0.8}})
@@ -0,0 +1,40 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.bot.coalescer import ResponseCoalescer
+
+@pytest.fixture
+def coalescer(clock):
+    return ResponseCoalescer(window=30.0, clock=clock)
+
+def test_lookup_within_window(coalescer, clock):
+    content = object()
+    coalescer.record(1, "news", content, None, None)
+
+    clock.now += 29.0
+    assert coalescer.lookup(1, "news", content) is not None
+    clock.now += 1.0
+    assert coalescer.lookup(1, "news", content) is None
+    assert coalescer.posted == {}
+
+def test_changed_content_is_not_coalesced(coalescer):
+    coalescer.record(1, "news", object(), None, None)
+    assert coalescer.lookup(1, "news", object()) is None
+
+def test_disabled_window(clock):
+    coalescer = ResponseCoalescer(window=0, clock=clock)
+    content = object()
+    coalescer.record(1, "news", content, None, None)
+    assert coalescer.lookup(1, "news", content) is None
+    assert coalescer.sent == 1
+
+@pytest.mark.asyncio
+async def test_resolve_url_fetches_once(coalescer):
+    content = object()
+    interaction = MagicMock()
+    interaction.original_response = AsyncMock(return_value=MagicMock(jump_url="https://discord.com/channels/1/2/3"))
+    coalescer.record(1, "news", content, None, interaction)
+    entry = coalescer.lookup(1, "news", content)
+
+    assert await coalescer.resolve_url(entry) == "https://discord.com/channels/1/2/3"
+    assert await coalescer.resolve_url(entry) == "https://discord.com/channels/1/2/3"
+    interaction.original_response.assert_awaited_once()
@@ -0,0 +1,99 @@
+import pytest
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock
+from src.bot.command_sync import CommandSyncer, command_hash
+
+def make_command(name, description="A command"):
+    command = MagicMock()
+    command.name = name
+    command.to_dict = MagicMock(return_value={"name": name, "description": description})
+    return command
+
+@pytest.fixture
+def tree():
+    tree = MagicMock()
+    tree.commands = [make_command("home"), make_command("news")]
+    tree.get_commands = MagicMock(side_effect=lambda guild=None: list(tree.commands))
+    tree.sync = AsyncMock(side_effect=lambda guild=None: list(tree.commands))
+    return tree
+
+@pytest.fixture
+def syncer(tree, tmp_path):
+    return CommandSyncer(tree, tmp_path / "sync_manifest.json")
+
+def test_command_hash_is_stable(tree):
+    first = make_command("home")
+    second = make_command("home")
+    assert command_hash(first, tree) == command_hash(second, tree)
+    assert command_hash(first, tree) != command_hash(make_command("home", "Other"), tree)
+
+@pytest.mark.asyncio
+async def test_first_sync_pushes_and_writes_manifest(syncer, tree):
+    result = await syncer.sync()
+
+    assert result.pushed
+    assert result.diff.added == ["home", "news"]
+    tree.sync.assert_awaited_once_with(guild=None)
+    manifest = json.loads(syncer.manifest_path.read_text())
+    assert set(manifest["global"]) == {"home", "news"}
+
+@pytest.mark.asyncio
+async def test_unchanged_tree_is_not_pushed(syncer, tree):
+    await syncer.sync()
+    result = await syncer.sync()
+
+    assert not result.pushed
+    assert not result.diff.has_changes
+    assert tree.sync.await_count == 1
+
+@pytest.mark.asyncio
+async def test_diff_reports_changes(syncer, tree):
+    await syncer.sync()
+    tree.commands = [make_command("home", "New description"), make_command("faq")]
+
+    result = await syncer.sync()
+
+    assert result.pushed
+    assert result.diff.added == ["faq"]
+    assert result.diff.removed == ["news"]
+    assert result.diff.changed == ["home"]
+
+@pytest.mark.asyncio
+async def test_scopes_are_tracked_separately(syncer, tree):
+    guild = MagicMock()
+    guild.id = 1234
+    await syncer.sync()
+
+    result = await syncer.sync(guild=guild)
+
+    assert result.pushed
+    assert result.scope == "1234"
+    tree.sync.assert_awaited_with(guild=guild)
+
+@pytest.mark.asyncio
+async def test_concurrent_syncs_keep_every_scope(syncer, tree):
+    guild = MagicMock()
+    guild.id = 1234
+
+    await asyncio.gather(syncer.sync(), syncer.sync(guild=guild))
+
+    manifest = json.loads(syncer.manifest_path.read_text())
+    assert set(manifest) == {"global", "1234"}
+
+@pytest.mark.asyncio
+async def test_force_pushes_unchanged_tree(syncer, tree):
+    await syncer.sync()
+    result = await syncer.sync(force=True)
+
+    assert result.pushed
+    assert tree.sync.await_count == 2
+
+@pytest.mark.asyncio
+async def test_failed_sync_keeps_manifest(syncer, tree):
+    tree.sync.side_effect = RuntimeError("HTTP error")
+
+    with pytest.raises(RuntimeError):
+        await syncer.sync()
+
+    assert not syncer.manifest_path.exists()
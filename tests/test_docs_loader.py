@@ -0,0 +1,54 @@
+import pytest
+import json
+from src.bot.docs_loader import DocsValidationError, load_docs, validate_docs
+from src.bot.trmnl import DOCS_PATH
+
+@pytest.fixture
+def docs():
+    return json.loads(DOCS_PATH.read_text())
+
+def test_repository_docs_are_valid():
+    snapshot = load_docs(DOCS_PATH)
+    assert "home" in snapshot.data["docs"]
+    assert len(snapshot.digest) == 64
+
+def test_digest_tracks_content(tmp_path, docs):
+    path = tmp_path / "docs.json"
+    path.write_text(json.dumps(docs))
+    first = load_docs(path)
+    docs["docs"]["home"]["title"] = "Changed"
+    path.write_text(json.dumps(docs))
+    assert load_docs(path).digest != first.digest
+
+def test_invalid_json_raises_validation_error(tmp_path):
+    path = tmp_path / "docs.json"
+    path.write_text("{")
+    with pytest.raises(DocsValidationError):
+        load_docs(path)
+
+@pytest.mark.parametrize("mutate", [
+    lambda d: d.pop("docs"),
+    lambda d: d["docs"]["home"].pop("title"),
+    lambda d: d["docs"]["home"]["links"].update({"Broken": 5}),
+    lambda d: d["docs"]["docs"].update({"category": "missing"}),
+    lambda d: d["docs"].update({"Bad Name": d["docs"]["home"]}),
+    lambda d: d["categories"]["main"]["commands"].append("UPPER"),
+    lambda d: d["categories"].update({"a:b": d["categories"]["main"]}),
+    lambda d: d["docs"]["home"].update({"description": "x" * 101}),
+    lambda d: d.update({"locales": {"klingon": {}}}),
+    lambda d: d.update({"locales": {"de": {"docs": {"missing": {"title": "Fehlt"}}}}}),
+    lambda d: d.update({"locales": {"de": {"docs": {"home": {"title": 5}}}}}),
+    lambda d: d.update({"locales": {"de": {"docs": {"home": {"name": "Start Seite"}}}}}),
+    lambda d: d.update({"locales": {"de": {"categories": {"missing": {"title": "Fehlt"}}}}}),
+])
+def test_schema_errors(docs, mutate):
+    mutate(docs)
+    with pytest.raises(DocsValidationError):
+        validate_docs(docs)
+
+def test_locales_are_optional_overrides(docs):
+    docs["locales"] = {
+        "de": {"docs": {"home": {"name": "startseite", "title": "Ressourcen"}, "privacy": {"title": "Datenschutz"}}},
+        "ja": {"categories": {"main": {"title": "メイン"}}, "docs": {"home": {"name": "ホーム"}}},
+    }
+    validate_docs(docs)
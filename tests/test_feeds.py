@@ -0,0 +1,209 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import AsyncMock, MagicMock
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.bot.feeds import FeedEntry, FeedError, FeedState, feeds, parse_feed
+from src.bot.trmnl import trmnl
+
+def rss(*posts):
+    items = "".join(
+        f"<item><title>{title}</title><link>https://usetrmnl.com/blog/{slug}</link><guid>{slug}</guid></item>"
+        for slug, title in posts
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>TRMNL</title>{items}</channel></rss>'
+
+ATOM_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>TRMNL Blog</title>
+  <entry>
+    <title>Batch 2</title>
+    <id>tag:usetrmnl.com,2025:batch-2</id>
+    <link rel="alternate" href="https://usetrmnl.com/blog/batch-2"/>
+    <updated>2025-01-02T00:00:00Z</updated>
+  </entry>
+</feed>"""
+
+class FakeBlog:
+    """Local stand-in for the blog feed with ETag support"""
+    def __init__(self):
+        self.posts = [("town-hall", "Town Hall")]
+        self.status = 200
+        self.broken = False
+        self.requests = 0
+        self.not_modified = 0
+
+    @property
+    def etag(self):
+        return f'"{len(self.posts)}"'
+
+    async def feed(self, request):
+        self.requests += 1
+        if self.status != 200:
+            return web.Response(status=self.status)
+        if request.headers.get("If-None-Match") == self.etag:
+            self.not_modified += 1
+            return web.Response(status=304)
+        if self.broken:
+            return web.Response(text="<html>", content_type="text/html", headers={"ETag": self.etag})
+        return web.Response(text=rss(*self.posts), content_type="application/rss+xml", headers={"ETag": self.etag})
+
+@pytest_asyncio.fixture
+async def blog():
+    fake = FakeBlog()
+    app = web.Application()
+    app.router.add_get("/feed", fake.feed)
+    server = TestServer(app)
+    await server.start_server()
+    yield fake, server
+    await server.close()
+
+@pytest.fixture
+def bot(state_paths):
+    bot = MagicMock()
+    bot.channel = MagicMock()
+    bot.channel.send = AsyncMock()
+    bot.get_channel = MagicMock(return_value=bot.channel)
+    docs_cog = trmnl(bot)
+    bot.get_cog = MagicMock(return_value=docs_cog)
+    return bot
+
+@pytest_asyncio.fixture
+async def poller(bot, blog, clock):
+    fake, server = blog
+    bot.config = {"feeds": {"url": str(server.make_url("/feed")), "channels": [42], "interval": 60}}
+    cog = feeds(bot, clock=clock)
+    yield cog
+    await cog.cog_unload()
+
+def test_parse_rss_and_atom():
+    entries = parse_feed(rss(("a", "First"), ("b", "Second")).encode())
+    assert [(entry.id, entry.title) for entry in entries] == [("a", "First"), ("b", "Second")]
+    entry, = parse_feed(ATOM_FEED)
+    assert (entry.title, entry.url) == ("Batch 2", "https://usetrmnl.com/blog/batch-2")
+    with pytest.raises(FeedError):
+        parse_feed(b"<html>")
+
+@pytest.mark.asyncio
+async def test_first_poll_seeds_without_posting(poller, bot):
+    new = await poller.poll()
+
+    assert new == []
+    assert not bot.channel.send.called
+    assert "Town Hall" in bot.get_cog().docs_data["categories"]["blog"]["links"]
+
+@pytest.mark.asyncio
+async def test_new_posts_are_announced_once(poller, bot, blog):
+    fake, server = blog
+    await poller.poll()
+    fake.posts.insert(0, ("batch-2", "Batch 2 Ships"))
+
+    new = await poller.poll()
+    again = await poller.poll()
+
+    assert [entry.title for entry in new] == ["Batch 2 Ships"]
+    assert again == [] and fake.not_modified == 1
+    bot.channel.send.assert_called_once()
+    assert bot.channel.send.call_args[1]["embed"].url == "https://usetrmnl.com/blog/batch-2"
+    docs_cog = bot.get_cog()
+    assert list(docs_cog.docs_data["categories"]["blog"]["links"])[0] == "Batch 2 Ships"
+    assert docs_cog.embeds["updates"].fields[0].name == "Batch 2 Ships"
+
+@pytest.mark.asyncio
+async def test_announcements_take_one_global_request(poller, bot):
+    entry = FeedEntry("batch-2", "Batch 2 Ships", "https://usetrmnl.com/blog/batch-2")
+    rate_limiter = poller.rate_limiter
+    rate_limiter.backend.acquire = MagicMock(return_value=0.0)
+
+    await poller.announce(entry)
+    assert rate_limiter.backend.acquire.call_count == 1
+
+    # The HTTP trace charges the send itself, so the channel check must not
+    rate_limiter.traced = True
+    await poller.announce(entry)
+    assert rate_limiter.backend.acquire.call_count == 1
+    assert bot.channel.send.call_count == 2
+
+@pytest.mark.asyncio
+async def test_seen_set_survives_restart(poller, bot, blog):
+    fake, server = blog
+    await poller.poll()
+    fake.posts.insert(0, ("batch-2", "Batch 2 Ships"))
+    await poller.poll()
+
+    restarted = feeds(bot)
+    restarted.state.etag = None  # force a full fetch
+    new = await restarted.poll()
+    await restarted.cog_unload()
+
+    assert new == []
+    assert bot.channel.send.call_count == 1
+
+@pytest.mark.asyncio
+async def test_posts_are_announced_when_the_docs_cannot_be_updated(poller, bot, blog, tmp_path):
+    fake, server = blog
+    await poller.poll()
+    fake.posts.insert(0, ("batch-2", "Batch 2 Ships"))
+    bot.get_cog().set_extra_links = AsyncMock(side_effect=ValueError("docs.json is invalid"))
+
+    new = await poller.poll()
+
+    assert [entry.title for entry in new] == ["Batch 2 Ships"]
+    bot.channel.send.assert_called_once()
+    assert "batch-2" in FeedState.load(tmp_path / "feed_state.json").seen
+
+@pytest.mark.asyncio
+async def test_unparsable_feed_is_fetched_again(poller, bot, blog):
+    fake, server = blog
+    await poller.poll()
+    fake.posts.insert(0, ("batch-2", "Batch 2 Ships"))
+    fake.broken = True
+    await poller.poll_feed()
+    assert poller.failures == 1
+
+    # The ETag of the broken body was not kept, so the fixed feed is not a 304
+    fake.broken = False
+    new = await poller.poll()
+
+    assert [entry.title for entry in new] == ["Batch 2 Ships"]
+    assert fake.not_modified == 0
+
+@pytest.mark.asyncio
+async def test_failures_back_off_exponentially(poller, blog):
+    fake, server = blog
+    fake.status = 500
+
+    await poller.poll_feed()
+    first_retry = poller.retry_at - poller.clock()
+    await poller.poll_feed()  # still backing off: no request
+    poller.clock.now = poller.retry_at
+    await poller.poll_feed()
+    second_retry = poller.retry_at - poller.clock()
+
+    assert fake.requests == 2
+    assert (first_retry, second_retry) == (120, 240)
+
+    fake.status = 200
+    poller.clock.now = poller.retry_at
+    await poller.poll_feed()
+    assert poller.failures == 0
+
+@pytest.mark.asyncio
+async def test_local_feed_file(bot, tmp_path):
+    feed_path = tmp_path / "feed.xml"
+    feed_path.write_bytes(ATOM_FEED)
+    bot.config = {"feeds": {"url": str(feed_path), "channels": [42]}}
+    cog = feeds(bot)
+
+    await cog.poll()
+
+    assert cog.state.latest == {"Batch 2": "https://usetrmnl.com/blog/batch-2"}
+
+def test_feed_state_is_bounded(tmp_path):
+    state = FeedState()
+    state.mark_seen(str(i) for i in range(600))
+    state.save(tmp_path / "state.json")
+
+    loaded = FeedState.load(tmp_path / "state.json")
+    assert len(loaded.seen) == 500
+    assert "599" in loaded.seen and "0" not in loaded.seen
@@ -0,0 +1,28 @@
+import pytest
+import discord
+from src.bot.gateway import gateway_options
+
+def test_lean_profile_by_default():
+    options = gateway_options({})
+
+    assert options["intents"] == discord.Intents(guilds=True)
+    assert options["max_messages"] is None
+    assert options["member_cache_flags"] == discord.MemberCacheFlags.none()
+    assert options["chunk_guilds_at_startup"] is False
+
+def test_overrides():
+    options = gateway_options({"gateway": {
+        "intents": {"voice_states": True},
+        "max_messages": 200,
+        "member_cache": True,
+    }})
+
+    assert options["intents"].voice_states and options["intents"].guilds
+    assert options["max_messages"] == 200
+    assert options["member_cache_flags"].voice
+    assert not options["member_cache_flags"].joined
+
+@pytest.mark.parametrize("gateway", [{"profile": "huge"}, {"intents": {"telepathy": True}}])
+def test_invalid_config(gateway):
+    with pytest.raises(ValueError):
+        gateway_options({"gateway": gateway})
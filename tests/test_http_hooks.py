@@ -0,0 +1,218 @@
+import pytest
+import pytest_asyncio
+import aiohttp
+import time
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.bot.circuit_breaker import CircuitState, InvalidRequestBreaker
+from src.bot.http_hooks import RateLimitTrace, is_api_route, is_interaction_route, major_parameters, route_key
+from src.bot.rate_limiter import RateLimitManager
+
+class FakeDiscord:
+    """Local stand-in for the Discord API returning rate limit headers"""
+    def __init__(self):
+        self.remaining = 2
+        self.reset_after = 0.3
+        self.reset_at = 0.0
+        self.request_times = []
+
+    async def messages(self, request):
+        now = time.monotonic()
+        self.request_times.append(now)
+        if now >= self.reset_at:
+            self.remaining = 2
+            self.reset_at = now + self.reset_after
+        if self.remaining <= 0:
+            return web.json_response({"message": "You are being rate limited."}, status=429, headers=self.headers(now))
+        self.remaining -= 1
+        return web.json_response({"id": "1"}, headers=self.headers(now))
+
+    def headers(self, now):
+        return {
+            "X-RateLimit-Limit": "2",
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset-After": f"{max(self.reset_at - now, 0.001):.3f}",
+            "X-RateLimit-Bucket": "abcd1234",
+        }
+
+    async def missing(self, request):
+        return web.json_response({"message": "Unknown Channel"}, status=404)
+
+    async def last_message(self, request):
+        # Uses up the bucket of this channel only; other channels share its hash
+        return web.json_response({"id": "1"}, headers={
+            "X-RateLimit-Limit": "5",
+            "X-RateLimit-Remaining": "0" if request.match_info["channel_id"] == "1" else "4",
+            "X-RateLimit-Reset-After": "3.000",
+            "X-RateLimit-Bucket": "abcd1234",
+        })
+
+    async def callback(self, request):
+        return web.Response(status=204)
+
+@pytest_asyncio.fixture
+async def discord_api():
+    fake = FakeDiscord()
+    app = web.Application()
+    app.router.add_post("/api/v10/channels/{channel_id}/messages", fake.messages)
+    app.router.add_get("/api/v10/channels/{channel_id}", fake.missing)
+    app.router.add_put("/api/v10/channels/{channel_id}/pins/{message_id}", fake.last_message)
+    app.router.add_post("/api/v10/interactions/{interaction_id}/{token}/callback", fake.callback)
+    app.router.add_get("/attachments/{channel_id}/{attachment_id}/{name}", fake.missing)
+    server = TestServer(app)
+    await server.start_server()
+    yield fake, server
+    await server.close()
+
+@pytest_asyncio.fixture
+async def session_and_trace():
+    trace = RateLimitTrace(RateLimitManager())
+    session = aiohttp.ClientSession(trace_configs=[trace.trace_config()])
+    yield session, trace
+    await session.close()
+
+def test_route_key():
+    assert route_key("GET", "/api/v10/channels/1/messages/2") == "GET /api/v10/channels/1/messages/:id"
+    assert route_key("PUT", "/api/v10/guilds/5/members/6/roles/7") == "PUT /api/v10/guilds/5/members/:id/roles/:id"
+    assert route_key("POST", "/api/v10/interactions/9/tok3n/callback") == "POST /api/v10/interactions/:id/:token/callback"
+
+def test_is_interaction_route():
+    assert is_interaction_route("/api/v10/interactions/9/tok3n/callback")
+    assert is_interaction_route("/api/v10/webhooks/1/tok3n/messages/@original")
+    assert not is_interaction_route("/api/v10/webhooks/1")
+    assert not is_interaction_route("/api/v10/channels/1/messages")
+
+def test_major_parameters():
+    assert major_parameters("/api/v10/channels/1/messages/2") == "channels/1"
+    assert major_parameters("/api/v10/guilds/5/members/6") == "guilds/5"
+    assert major_parameters("/api/v10/webhooks/1/tok3n/messages/@original") == "webhooks/1/tok3n"
+    assert major_parameters("/api/v10/interactions/9/tok3n/callback") == "interactions/9/tok3n"
+    assert major_parameters("/api/v10/users/@me") == ""
+
+def test_is_api_route():
+    assert is_api_route("/api/v10/channels/1/messages")
+    assert is_api_route("/api/v9/gateway/bot")
+    assert not is_api_route("/")
+    assert not is_api_route("/attachments/1/2/image.png")
+    assert not is_api_route("/apiv10/channels")
+
+@pytest.mark.asyncio
+async def test_headers_update_manager(discord_api, session_and_trace):
+    fake, server = discord_api
+    session, trace = session_and_trace
+
+    async with session.post(server.make_url("/api/v10/channels/1/messages")) as response:
+        assert response.status == 200
+
+    assert "abcd1234:channels/1" in trace.manager.buckets
+    assert trace.manager.buckets["abcd1234:channels/1"].limit == 2
+    assert trace.routes["POST /api/v10/channels/1/messages"] == "abcd1234"
+
+@pytest.mark.asyncio
+async def test_requests_are_scheduled_without_429(discord_api, session_and_trace):
+    fake, server = discord_api
+    session, trace = session_and_trace
+
+    statuses = []
+    for _ in range(5):
+        async with session.post(server.make_url("/api/v10/channels/1/messages")) as response:
+            statuses.append(response.status)
+
+    assert statuses == [200] * 5
+    assert trace.delayed_requests > 0
+    assert trace.manager.invalid_requests == 0
+
+@pytest.mark.asyncio
+async def test_invalid_responses_are_tracked(discord_api, session_and_trace):
+    fake, server = discord_api
+    session, trace = session_and_trace
+
+    async with session.get(server.make_url("/api/v10/channels/1")) as response:
+        assert response.status == 404
+
+    assert trace.manager.invalid_requests == 1
+
+@pytest.mark.asyncio
+async def test_open_circuit_holds_back_bot_requests(discord_api):
+    fake, server = discord_api
+    breaker = InvalidRequestBreaker(limit=10, window=60.0, cooldown=0.2, probes=1)
+    trace = RateLimitTrace(RateLimitManager(breaker=breaker))
+    for _ in range(8):
+        trace.manager.track_invalid_request()
+    assert trace.manager.circuit_state is CircuitState.OPEN
+
+    async with aiohttp.ClientSession(trace_configs=[trace.trace_config()]) as session:
+
+        # Interaction responses are critical and go straight through
+        async with session.post(server.make_url("/api/v10/interactions/1/tok3n/callback")) as response:
+            assert response.status == 204
+        assert trace.held_requests == 0
+
+        started = time.monotonic()
+        async with session.post(server.make_url("/api/v10/channels/1/messages")) as response:
+            assert response.status == 200
+
+    # The post waited for the cooldown and went out as a probe. It succeeded,
+    # but the errors are still in the window, so another round of probes starts.
+    assert time.monotonic() - started >= 0.15
+    assert trace.held_requests == 1
+    assert trace.manager.circuit_state is CircuitState.HALF_OPEN
+    assert breaker.probes_left == 1
+
+@pytest.mark.asyncio
+async def test_only_probe_responses_close_the_circuit(discord_api):
+    fake, server = discord_api
+    breaker = InvalidRequestBreaker(limit=10, window=0.1, cooldown=0.2, probes=1)
+    trace = RateLimitTrace(RateLimitManager(breaker=breaker))
+    for _ in range(8):
+        trace.manager.track_invalid_request()
+    time.sleep(0.3)  # cool down and let the errors slide out of the window
+    assert trace.manager.circuit_state is CircuitState.HALF_OPEN
+
+    async with aiohttp.ClientSession(trace_configs=[trace.trace_config()]) as session:
+        # Interaction responses bypass the probes, so they cannot close it
+        async with session.post(server.make_url("/api/v10/interactions/1/tok3n/callback")) as response:
+            assert response.status == 204
+        assert trace.manager.circuit_state is CircuitState.HALF_OPEN
+
+        async with session.post(server.make_url("/api/v10/channels/1/messages")) as response:
+            assert response.status == 200
+    assert trace.manager.circuit_state is CircuitState.CLOSED
+
+@pytest.mark.asyncio
+async def test_other_requests_are_not_limited(discord_api):
+    fake, server = discord_api
+    breaker = InvalidRequestBreaker(limit=10, window=60.0, cooldown=5.0, probes=1)
+    trace = RateLimitTrace(RateLimitManager(breaker=breaker))
+    for _ in range(8):
+        trace.manager.track_invalid_request()
+
+    async with aiohttp.ClientSession(trace_configs=[trace.trace_config()]) as session:
+        started = time.monotonic()
+        async with session.get(server.make_url("/attachments/1/2/image.png")) as response:
+            assert response.status == 404
+
+    # CDN (and gateway) requests are neither held by the open circuit,
+    # charged to the global limit nor counted as invalid requests
+    assert time.monotonic() - started < 1.0
+    assert trace.held_requests == 0
+    assert trace.manager.global_remaining == 50
+    assert trace.manager.invalid_requests == 8
+
+@pytest.mark.asyncio
+async def test_channels_sharing_a_bucket_do_not_block_each_other(discord_api, session_and_trace):
+    fake, server = discord_api
+    session, trace = session_and_trace
+    for channel_id in (2, 1):
+        async with session.put(server.make_url(f"/api/v10/channels/{channel_id}/pins/{channel_id}")) as response:
+            assert response.status == 200
+    assert trace.routes["PUT /api/v10/channels/2/pins/:id"] == "abcd1234"
+
+    # Channel 1 used up its bucket, channel 2 still has requests left
+    started = time.monotonic()
+    async with session.put(server.make_url("/api/v10/channels/2/pins/3")) as response:
+        assert response.status == 200
+
+    assert time.monotonic() - started < 1.0
+    assert trace.delayed_requests == 0
+    assert isinstance(trace.manager.check_rate_limit("abcd1234:channels/1"), float)
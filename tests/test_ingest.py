@@ -0,0 +1,148 @@
+import pytest
+import pytest_asyncio
+import asyncio
+import json
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.bot.ingest import ContentStore, collect_urls, crawl, extract_page, ingest
+
+PAGE = """<html><head><title>BYOS | TRMNL</title>
+<meta name="description" content="Run your own  server for TRMNL devices.">
+</head><body><p>Ignored paragraph</p></body></html>"""
+
+class FakeDocsSite:
+    """Local stand-in for docs.usetrmnl.com with conditional GET support"""
+    def __init__(self):
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.body = PAGE
+
+    async def _track(self, request):
+        self.requests.append((request.path, dict(request.headers)))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+
+    async def etag_page(self, request):
+        await self._track(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.Response(text=self.body, content_type="text/html", headers={"ETag": '"v1"'})
+
+    async def dated_page(self, request):
+        await self._track(request)
+        modified = "Wed, 01 Jan 2025 00:00:00 GMT"
+        if request.headers.get("If-Modified-Since") == modified:
+            return web.Response(status=304)
+        html = "<html><head><title>Updates</title></head><body><p></p><p>Batch 1 has shipped.</p></body></html>"
+        return web.Response(text=html, content_type="text/html", headers={"Last-Modified": modified})
+
+    async def plain_page(self, request):
+        await self._track(request)
+        return web.Response(text=f"<title>Page {request.match_info['n']}</title>", content_type="text/html")
+
+    async def missing(self, request):
+        await self._track(request)
+        return web.Response(status=404)
+
+@pytest_asyncio.fixture
+async def site():
+    fake = FakeDocsSite()
+    app = web.Application()
+    app.router.add_get("/byos", fake.etag_page)
+    app.router.add_get("/updates", fake.dated_page)
+    app.router.add_get("/plain/{n}", fake.plain_page)
+    app.router.add_get("/missing", fake.missing)
+    server = TestServer(app)
+    await server.start_server()
+    yield fake, server
+    await server.close()
+
+def test_extract_page():
+    assert extract_page(PAGE) == ("BYOS | TRMNL", "Run your own server for TRMNL devices.")
+    title, summary = extract_page("<title>Long</title><p>" + "word " * 200 + "</p>")
+    assert title == "Long"
+    assert len(summary) <= 300 and summary.endswith("…")
+
+def test_collect_urls():
+    docs = {
+        "categories": {"main": {"title": "Main", "links": {"A": "https://a.example", "Mail": "mailto:x@y.z"}}},
+        "docs": {"one": {"title": "One", "content": "", "links": {"A again": "https://a.example", "B": "https://b.example"}}},
+    }
+    assert collect_urls(docs) == ["https://a.example", "https://b.example"]
+
+@pytest.mark.asyncio
+async def test_recrawl_skips_unchanged_pages(site):
+    fake, server = site
+    urls = [str(server.make_url("/byos")), str(server.make_url("/updates"))]
+    store = ContentStore()
+
+    first = await crawl(urls, store)
+    second = await crawl(urls, store)
+
+    assert sorted(first.fetched) == sorted(urls)
+    assert sorted(second.unchanged) == sorted(urls) and not second.fetched
+    assert store.pages[urls[0]]["summary"] == "Run your own server for TRMNL devices."
+    assert store.pages[urls[1]]["summary"] == "Batch 1 has shipped."
+    conditional = [headers for path, headers in fake.requests[2:]]
+    assert any(headers.get("If-None-Match") == '"v1"' for headers in conditional)
+    assert any("If-Modified-Since" in headers for headers in conditional)
+
+@pytest.mark.asyncio
+async def test_changed_page_is_refetched(site):
+    fake, server = site
+    url = str(server.make_url("/byos"))
+    store = ContentStore()
+    await crawl([url], store)
+
+    fake.body = PAGE.replace("Run your own", "Host your own")
+    store.pages[url]["etag"] = '"stale"'
+    result = await crawl([url], store)
+
+    assert result.fetched == [url]
+    assert store.pages[url]["summary"].startswith("Host your own")
+
+@pytest.mark.asyncio
+async def test_failures_keep_previous_entry_and_removed_links_are_pruned(site):
+    fake, server = site
+    missing = str(server.make_url("/missing"))
+    store = ContentStore({missing: {"title": "Old", "summary": "Kept"}, "https://gone.example": {"title": "Gone"}})
+
+    result = await crawl([missing], store)
+
+    assert result.failed == [missing]
+    assert result.removed == ["https://gone.example"]
+    assert store.pages == {missing: {"title": "Old", "summary": "Kept"}}
+
+@pytest.mark.asyncio
+async def test_concurrency_limit(site):
+    fake, server = site
+    urls = [str(server.make_url(f"/plain/{n}")) for n in range(12)]
+
+    result = await crawl(urls, ContentStore(), concurrency=3)
+
+    assert len(result.fetched) == 12
+    assert fake.max_active <= 3
+
+@pytest.mark.asyncio
+async def test_ingest_writes_store(site, tmp_path):
+    fake, server = site
+    docs_path = tmp_path / "docs.json"
+    store_path = tmp_path / "content_store.json"
+    docs_path.write_text(json.dumps({
+        "categories": {},
+        "docs": {"byos": {"title": "BYOS", "content": "", "links": {"BYOS": str(server.make_url("/byos"))}}},
+    }))
+
+    result = await ingest(docs_path, store_path)
+
+    assert len(result.fetched) == 1
+    assert list(ContentStore.load(store_path).pages) == [str(server.make_url("/byos"))]
+
+def test_unreadable_store_is_empty(tmp_path):
+    path = tmp_path / "content_store.json"
+    path.write_text("{not json")
+    assert ContentStore.load(path).pages == {}
+    assert ContentStore.load(tmp_path / "missing.json").pages == {}
@@ -0,0 +1,20 @@
+import pytest
+from benchmarks.load_test import SCENARIOS, main, run_scenario
+
+@pytest.mark.parametrize("scenario", SCENARIOS)
+def test_every_interaction_is_answered(scenario):
+    report = run_scenario(scenario, interactions=600)
+
+    assert report.count == 600
+    assert report.unanswered == 0
+    assert report.failed == 0
+
+def test_global_limit_sheds_load():
+    report = run_scenario("many-guild", interactions=600, global_limit=50)
+
+    assert report.unanswered == 0
+    assert report.rate_limited >= 500
+
+def test_regression_gate_exit_code():
+    assert main(["--scenario", "hot-key", "--interactions", "200", "--no-memory"]) == 0
+    assert main(["--scenario", "hot-key", "--interactions", "200", "--no-memory", "--min-throughput", "1e12"]) == 1
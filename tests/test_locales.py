@@ -0,0 +1,100 @@
+import pytest
+import discord
+from discord import app_commands
+from types import SimpleNamespace
+from src.bot.locales import (
+    DEFAULT_LOCALE,
+    DocsTranslator,
+    LocalePreferences,
+    command_localizations,
+    localize_docs,
+)
+from src.bot.trmnl import command_specs, resolve_doc
+
+DOCS = {
+    "categories": {
+        "legal": {"title": "Legal", "commands": ["privacy"], "links": {"Privacy": "https://usetrmnl.com/privacy"}},
+    },
+    "docs": {
+        "home": {"title": "Resources", "description": "Main resources", "content": "Start here", "links": {"Site": "https://usetrmnl.com"}},
+        "news": {"title": "News", "content": "Updates", "links": {"Blog": "https://usetrmnl.com/blog"}},
+    },
+    "locales": {
+        "de": {
+            "categories": {"legal": {"title": "Rechtliches"}},
+            "docs": {
+                "home": {"name": "start", "title": "Ressourcen", "description": "Wichtige Ressourcen"},
+                "privacy": {"title": "Datenschutz"},
+            },
+        },
+        "fr": {"docs": {"news": {"content": "Nouveautés"}}},
+    },
+}
+
+def test_localize_docs_overrides_fields():
+    german = localize_docs(DOCS, "de")
+    home = resolve_doc(german, "home")
+    assert (home["title"], home["content"]) == ("Ressourcen", "Start here")
+    assert home["links"] == {"Site": "https://usetrmnl.com"}
+    assert german["categories"]["legal"]["title"] == "Rechtliches"
+    # English data is left alone
+    assert DOCS["docs"]["home"]["title"] == "Resources"
+    assert localize_docs(DOCS, "ja") is DOCS
+
+def test_category_commands_can_be_localized():
+    privacy = resolve_doc(localize_docs(DOCS, "de"), "privacy")
+    assert privacy["title"] == "Datenschutz"
+    assert privacy["links"] == {"Privacy": "https://usetrmnl.com/privacy"}
+
+def test_command_localizations_list_only_changes():
+    localizations = command_localizations(DOCS, command_specs(DOCS))
+    assert localizations["home"] == {"name": {"de": "start"}, "description": {"de": "Wichtige Ressourcen"}}
+    # privacy has no description, so its title is the description
+    assert localizations["privacy"] == {"name": {}, "description": {"de": "Datenschutz"}}
+    # Only the French content changed
+    assert "news" not in localizations
+
+@pytest.mark.asyncio
+async def test_translator_reads_command_extras():
+    async def callback(interaction):
+        pass
+
+    command = app_commands.Command(
+        name=app_commands.locale_str("home"),
+        description=app_commands.locale_str("Main resources"),
+        callback=callback,
+        extras={"localizations": {"name": {"de": "start"}, "description": {"de": "Wichtige Ressourcen"}}},
+    )
+    tree = app_commands.CommandTree(discord.Client(intents=discord.Intents.none()))
+
+    payload = await command.get_translated_payload(tree, DocsTranslator())
+
+    assert payload["name_localizations"] == {"de": "start"}
+    assert payload["description_localizations"] == {"de": "Wichtige Ressourcen"}
+
+def make_interaction(user_id=1, guild_id=10, locale=discord.Locale.american_english):
+    return SimpleNamespace(user=SimpleNamespace(id=user_id), guild_id=guild_id, locale=locale)
+
+def test_resolve_prefers_user_then_guild_then_discord_language():
+    available = {DEFAULT_LOCALE: {}, "de": {}, "fr": {}}
+    preferences = LocalePreferences(users={1: "fr"}, guilds={10: "de"})
+
+    assert preferences.resolve(make_interaction(), available) == "fr"
+    assert preferences.resolve(make_interaction(user_id=2), available) == "de"
+    assert preferences.resolve(make_interaction(user_id=2, guild_id=None, locale=discord.Locale.french), available) == "fr"
+    # A language without docs falls back to English
+    assert preferences.resolve(make_interaction(user_id=2, guild_id=None, locale=discord.Locale.japanese), available) == DEFAULT_LOCALE
+
+def test_preferences_round_trip(tmp_path):
+    path = tmp_path / "locale_preferences.json"
+    preferences = LocalePreferences()
+    preferences.set(preferences.users, 2**63 - 1, "de")
+    preferences.set(preferences.guilds, 10, "fr")
+    preferences.set(preferences.guilds, 10, None)
+    preferences.save(path)
+
+    loaded = LocalePreferences.load(path)
+
+    assert loaded.users == {2**63 - 1: "de"}
+    assert loaded.guilds == {}
+    assert LocalePreferences.load(tmp_path / "missing.json").users == {}
@@ -0,0 +1,99 @@
+import pytest
+import aiohttp
+import random
+from unittest.mock import AsyncMock, MagicMock
+from src.bot.metrics import LatencyHistogram, MetricsRegistry, MetricsServer
+from src.bot.rate_limiter import RateLimitedCog
+
+def test_bucket_bounds_cover_every_value():
+    for micros in list(range(2000)) + [10 ** 6, 10 ** 9, 2 ** 40 + 12345]:
+        index = LatencyHistogram.bucket_index(micros)
+        assert micros <= LatencyHistogram.bucket_upper(index)
+        assert index == 0 or micros > LatencyHistogram.bucket_upper(index - 1)
+
+def test_percentiles_within_precision():
+    rng = random.Random(7)
+    values = sorted(rng.expovariate(1 / 0.02) for _ in range(10_000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    for quantile in (0.5, 0.9, 0.99):
+        exact = values[int(quantile * len(values)) - 1]
+        assert exact <= histogram.percentile(quantile) <= exact * 1.07 + 1e-6
+    assert histogram.count == 10_000
+    assert histogram.percentile(1.0) == max(values)
+
+def test_large_values_extend_histogram():
+    histogram = LatencyHistogram()
+    histogram.record(5000.0)
+    assert histogram.percentile(0.5) == 5000.0
+
+def test_render_prometheus():
+    registry = MetricsRegistry()
+    registry.observe("search", 0.004)
+    registry.observe("search", 0.010, error=True)
+    registry.command("home").rate_limited += 2
+    registry.add_gauge("trmnl_invalid_requests", "Invalid responses", lambda: 3)
+
+    text = registry.render_prometheus()
+
+    assert 'trmnl_command_duration_seconds_count{command="search"} 2' in text
+    assert 'trmnl_command_errors_total{command="search"} 1' in text
+    assert 'trmnl_command_rate_limited_total{command="home"} 2' in text
+    assert "trmnl_invalid_requests 3" in text
+
+@pytest.mark.asyncio
+async def test_metrics_server():
+    registry = MetricsRegistry()
+    registry.observe("home", 0.001)
+    server = MetricsServer(registry, port=0)
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{server.port}/metrics") as response:
+                body = await response.text()
+    finally:
+        await server.close()
+
+    assert response.status == 200
+    assert 'trmnl_command_calls_total{command="home"} 1' in body
+
+@pytest.mark.asyncio
+async def test_cog_times_only_its_own_commands(clock):
+    bot = MagicMock()
+    bot.metrics = MetricsRegistry(clock=clock)
+    cog = RateLimitedCog(bot)
+    other = RateLimitedCog(bot)
+    interaction = MagicMock()
+    interaction.extras = {}
+    command = MagicMock(qualified_name="home", binding=cog)
+
+    await cog.interaction_check(interaction)
+    clock.now += 0.25
+    await cog.on_app_command_completion(interaction, command)
+    await other.on_app_command_completion(interaction, command)
+
+    home = bot.metrics.commands["home"]
+    assert home.calls == 1
+    assert home.latency.percentile(0.5) == 0.25
+
+@pytest.mark.asyncio
+async def test_handled_errors_and_rejections_are_counted():
+    bot = MagicMock()
+    bot.metrics = MetricsRegistry()
+    cog = RateLimitedCog(bot)
+    interaction = AsyncMock()
+    interaction.extras = {}
+    interaction.user.id = 1
+    interaction.response.is_done = MagicMock(return_value=False)
+    interaction.command = MagicMock(qualified_name="home", binding=cog)
+
+    await cog.interaction_check(interaction)
+    await cog.handle_command_error(interaction, ValueError("boom"))
+    await cog.on_app_command_completion(interaction, interaction.command)
+    for _ in range(6):
+        await cog.handle_rate_limit(interaction, "home")
+
+    home = bot.metrics.commands["home"]
+    assert (home.calls, home.errors, home.rate_limited) == (1, 1, 1)
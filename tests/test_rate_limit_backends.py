@@ -0,0 +1,120 @@
+import pytest
+import multiprocessing
+import sqlite3
+import time
+from src.bot.rate_limit_backends import BUSY_WAIT, RATE_LIMITS_PATH, MemoryBackend, SQLiteBackend, create_backend
+from src.bot.rate_limiter import RateLimitManager
+
+LIMIT = 50
+PER = 1.0
+SLOW = 60.0  # long period so refills during a test are negligible
+
+def hammer(path, duration, results):
+    # Runs in a child process: take as many global requests as allowed
+    backend = SQLiteBackend(path, lease_size=5)
+    granted = 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        wait = backend.acquire("global", LIMIT, PER)
+        if wait:
+            time.sleep(min(wait, 0.01))
+        else:
+            granted += 1
+    backend.close()
+    results.put(granted)
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryBackend()
+    else:
+        backend = SQLiteBackend(tmp_path / "ratelimits.db", lease_size=1)
+        yield backend
+        backend.close()
+
+def test_burst_then_wait(backend):
+    for _ in range(LIMIT):
+        assert backend.acquire("global", LIMIT, SLOW) == 0.0
+    wait = backend.acquire("global", LIMIT, SLOW)
+    assert 0 < wait <= SLOW / LIMIT
+
+def test_remaining(backend):
+    assert backend.remaining("global", LIMIT, SLOW) == LIMIT
+    backend.acquire("global", LIMIT, SLOW)
+    assert backend.remaining("global", LIMIT, SLOW) == LIMIT - 1
+
+def test_sqlite_state_is_shared(tmp_path):
+    first = SQLiteBackend(tmp_path / "ratelimits.db", lease_size=1)
+    second = SQLiteBackend(tmp_path / "ratelimits.db", lease_size=1)
+    for _ in range(LIMIT):
+        assert first.acquire("global", LIMIT, SLOW) == 0.0
+    assert second.acquire("global", LIMIT, SLOW) > 0
+
+def test_sqlite_leases_requests_in_batches(tmp_path):
+    backend = SQLiteBackend(tmp_path / "ratelimits.db", lease_size=10)
+    backend.acquire("global", LIMIT, SLOW)
+    # One transaction took ten requests from the shared budget
+    other = SQLiteBackend(tmp_path / "ratelimits.db", lease_size=LIMIT)
+    other.acquire("global", LIMIT, SLOW)
+    assert other.remaining("global", LIMIT, SLOW) == LIMIT - 10 - 1
+
+def test_sqlite_refills_lease_in_background(tmp_path):
+    backend = SQLiteBackend(tmp_path / "ratelimits.db", lease_size=4)
+    backend.acquire("global", LIMIT, SLOW)
+    backend.acquire("global", LIMIT, SLOW)
+    # Half the lease is used, so the next one is leased before it runs out
+    backend._refiller.shutdown(wait=True)
+    assert backend._leases["global"][0] == 2 + 4
+    backend.close()
+
+def test_sqlite_does_not_wait_for_other_processes(tmp_path):
+    backend = SQLiteBackend(tmp_path / "ratelimits.db", lease_size=1)
+    backend.acquire("global", LIMIT, SLOW)
+    holder = sqlite3.connect(tmp_path / "ratelimits.db", isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    start = time.monotonic()
+    assert backend.acquire("global", LIMIT, SLOW) == BUSY_WAIT
+    assert time.monotonic() - start < 1.0
+    holder.execute("COMMIT")
+    holder.close()
+    backend.close()
+
+def test_sqlite_remaining_does_not_query(tmp_path, monkeypatch):
+    backend = SQLiteBackend(tmp_path / "ratelimits.db", lease_size=5)
+    backend.acquire("global", LIMIT, SLOW)
+    monkeypatch.setattr(backend, "_lease", None)
+    monkeypatch.setattr(backend, "_connection", None)
+    assert backend.remaining("global", LIMIT, SLOW) == LIMIT - 1
+    backend.close()
+
+def test_manager_uses_backend(tmp_path):
+    manager = RateLimitManager(global_limit=3, backend=SQLiteBackend(tmp_path / "ratelimits.db", lease_size=1))
+    other = RateLimitManager(global_limit=3, backend=SQLiteBackend(tmp_path / "ratelimits.db", lease_size=1))
+    for _ in range(3):
+        assert manager.check_rate_limit("any") is None
+    assert isinstance(other.check_rate_limit("any"), float)
+
+def test_create_backend(tmp_path):
+    assert isinstance(create_backend(None), MemoryBackend)
+    assert isinstance(create_backend({"rate_limit_backend": {"type": "sqlite", "path": str(tmp_path / "r.db")}}), SQLiteBackend)
+    with pytest.raises(ValueError):
+        create_backend({"rate_limit_backend": {"type": "carrier-pigeon"}})
+    # Without a path the database is kept next to the other state files
+    assert create_backend({"rate_limit_backend": {"type": "sqlite"}}).path == str(RATE_LIMITS_PATH)
+
+def test_processes_share_one_budget(tmp_path):
+    path = tmp_path / "ratelimits.db"
+    duration = 1.0
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=hammer, args=(path, duration, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    totals = [results.get(timeout=30) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+
+    # GCRA allows the initial burst plus LIMIT per second, across all processes.
+    # Processes start at different times, so allow for the spread in deadlines.
+    assert sum(totals) <= LIMIT + LIMIT * (duration + 0.5)
+    assert all(total > 0 for total in totals)
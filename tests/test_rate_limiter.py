@@ -1,6 +1,24 @@
 import pytest
+import asyncio
+import discord
+import random
+import sys
+import threading
 import time
-from src.bot.rate_limiter import RateLimitManager, DiscordRateLimit
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from src.bot import rate_limit_backends as backends_module
+from src.bot.circuit_breaker import CircuitState
+from src.bot import rate_limiter as rate_limiter_module
+from src.bot.rate_limiter import (
+    CommandRateLimit,
+    DiscordRateLimit,
+    RateLimitedCog,
+    RateLimitManager,
+    RateLimitScope,
+    scope_id,
+)
 
 @pytest.fixture
 def rate_limiter():
@@ -82,4 +100,391 @@ def test_rate_limit_reset(rate_limiter):
     time.sleep(0.2)
     
     # Should be able to make request again
-    assert rate_limiter.check_rate_limit('test_bucket') is None
\ No newline at end of file
+    assert rate_limiter.check_rate_limit('test_bucket') is None
+
+def test_no_double_burst_at_window_edge():
+    # Two per second: a burst followed by requests just after the old window
+    # boundary must still be spaced by the emission interval
+    bucket = DiscordRateLimit(limit=2, remaining=2, reset_after=1.0, bucket='edge', now=0.0)
+    assert bucket.wait_time(0.99) == 0.0
+    bucket.consume(0.99)
+    bucket.consume(0.99)
+    assert bucket.wait_time(1.01) > 0
+    assert bucket.wait_time(1.49) == 0.0
+
+def test_exhausted_headers_wait_for_reset():
+    bucket = DiscordRateLimit(limit=5, remaining=0, reset_after=2.0, bucket='spent', now=0.0)
+    assert bucket.wait_time(0.0) == pytest.approx(2.0)
+    assert bucket.wait_time(2.0) == 0.0
+
+def test_global_limit(rate_limiter):
+    for _ in range(50):
+        assert rate_limiter.check_rate_limit('any') is None
+    assert isinstance(rate_limiter.check_rate_limit('any'), float)
+
+def test_idle_buckets_are_evicted():
+    rate_limiter = RateLimitManager(bucket_ttl=0.0)
+    for i in range(3):
+        rate_limiter.update_rate_limits({
+            'X-RateLimit-Limit': '1',
+            'X-RateLimit-Remaining': '1',
+            'X-RateLimit-Reset-After': '0.01',
+            'X-RateLimit-Bucket': f'bucket_{i}'
+        })
+    time.sleep(0.02)
+    
+    rate_limiter.check_rate_limit('other')
+    
+    assert rate_limiter.buckets == {}
+
+def test_bucket_records_use_slots():
+    bucket = DiscordRateLimit(limit=1, remaining=1, reset_after=1.0, bucket='slots')
+    assert not hasattr(bucket, '__dict__')
+
+def make_interaction(user_id, channel_id=10, guild_id=100):
+    interaction = MagicMock()
+    interaction.user.id = user_id
+    interaction.channel_id = channel_id
+    interaction.guild_id = guild_id
+    interaction.response.is_done = MagicMock(return_value=False)
+    interaction.response.send_message = AsyncMock()
+    interaction.response.defer = AsyncMock()
+    interaction.followup.send = AsyncMock()
+    return interaction
+
+def test_scoped_limits_are_per_key(rate_limiter):
+    # One user exhausting their budget does not affect another user
+    assert rate_limiter.check_scoped_rate_limit('home', 1, 1, 10.0) is None
+    assert isinstance(rate_limiter.check_scoped_rate_limit('home', 1, 1, 10.0), float)
+    assert rate_limiter.check_scoped_rate_limit('home', 2, 1, 10.0) is None
+    # ... nor the same user on another command
+    assert rate_limiter.check_scoped_rate_limit('news', 1, 1, 10.0) is None
+
+def test_scoped_keys_are_compact_ints(rate_limiter):
+    key = rate_limiter.scoped_key('home', 2**63 - 1)
+    assert isinstance(key, int)
+    assert key != rate_limiter.scoped_key('news', 2**63 - 1)
+    assert rate_limiter.scoped_key('home', 5) == rate_limiter.scoped_key('home', 5)
+
+@pytest.mark.parametrize("scope, expected", [
+    (RateLimitScope.USER, 1),
+    (RateLimitScope.CHANNEL, 10),
+    (RateLimitScope.GUILD, 100),
+    (RateLimitScope.GLOBAL, 0),
+])
+def test_scope_id(scope, expected):
+    assert scope_id(make_interaction(1), scope) == expected
+
+def test_guild_scope_falls_back_to_user_in_dms():
+    assert scope_id(make_interaction(1, guild_id=None), RateLimitScope.GUILD) == 1
+
+def test_rate_limits_from_config():
+    bot = MagicMock()
+    bot.config = {"rate_limits": {
+        "default": {"scope": "channel", "limit": 3, "per": 5},
+        "sync": {"scope": "guild", "limit": 1, "per": 30},
+    }}
+    cog = RateLimitedCog(bot)
+    assert cog.default_rate_limit.scope is RateLimitScope.CHANNEL
+    assert cog.rate_limits["sync"].limit == 1
+    with pytest.raises(ValueError):
+        CommandRateLimit.from_config({"scope": "planet", "limit": 1, "per": 1})
+
+@pytest.mark.asyncio
+async def test_handle_rate_limit_guild_scope():
+    bot = MagicMock()
+    bot.config = {"rate_limits": {"home": {"scope": "guild", "limit": 1, "per": 60}}}
+    cog = RateLimitedCog(bot)
+    
+    assert await cog.handle_rate_limit(make_interaction(1), "home")
+    # Another user in the same guild shares the budget
+    blocked = make_interaction(2)
+    assert not await cog.handle_rate_limit(blocked, "home")
+    assert blocked.response.send_message.call_args[1]["ephemeral"] is True
+    # A different guild is unaffected
+    assert await cog.handle_rate_limit(make_interaction(2, guild_id=200), "home")
+
+def make_queued_cog(limit=1, per=0.2, max_depth=25, timeout=2.0):
+    bot = MagicMock()
+    bot.config = {
+        "rate_limits": {"home": {"scope": "global", "limit": limit, "per": per}},
+        "rate_limit_queue": {"enabled": True, "max_depth": max_depth, "timeout": timeout},
+    }
+    return RateLimitedCog(bot)
+
+@pytest.mark.asyncio
+async def test_queue_mode_defers_and_releases():
+    cog = make_queued_cog()
+    first, second = make_interaction(1), make_interaction(2)
+    
+    assert await cog.handle_rate_limit(first, "home")
+    started = time.monotonic()
+    assert await cog.handle_rate_limit(second, "home")
+    
+    # The second interaction was deferred and released once a request was free
+    assert time.monotonic() - started >= 0.15
+    second.response.defer.assert_awaited_once_with(ephemeral=False, thinking=True)
+    assert not second.response.send_message.called
+    assert cog.response_queue.released == 1
+
+@pytest.mark.asyncio
+async def test_queue_mode_defers_with_the_response_visibility():
+    cog = make_queued_cog(per=0.05)
+    assert await cog.handle_rate_limit(make_interaction(0), "home")
+    private, click = make_interaction(1), make_interaction(2)
+    click.type = discord.InteractionType.component
+
+    assert await cog.handle_rate_limit(private, "home", ephemeral=True)
+    assert await cog.handle_rate_limit(click, "home", ephemeral=True)
+
+    # Discord fixes the visibility when deferring; clicks edit their message instead
+    private.response.defer.assert_awaited_once_with(ephemeral=True, thinking=True)
+    click.response.defer.assert_awaited_once_with()
+
+@pytest.mark.asyncio
+async def test_queue_mode_releases_in_order():
+    cog = make_queued_cog(per=0.05)
+    assert await cog.handle_rate_limit(make_interaction(0), "home")
+    order = []
+    
+    async def run(user_id):
+        await cog.handle_rate_limit(make_interaction(user_id), "home")
+        order.append(user_id)
+    
+    await asyncio.gather(*(run(i) for i in range(1, 5)))
+    
+    assert order == [1, 2, 3, 4]
+
+@pytest.mark.asyncio
+async def test_queue_mode_keeps_each_reservation():
+    cog = make_queued_cog(per=0.05)
+    interactions = [make_interaction(i) for i in range(4)]
+    for interaction in interactions:
+        interaction.extras = {}
+
+    results = await asyncio.gather(*(cog.handle_rate_limit(i, "home") for i in interactions))
+
+    assert all(results)
+    reservations = [interaction.extras["reservation"] for interaction in interactions]
+    assert all(reservation is not None for reservation in reservations)
+    assert len({id(reservation) for reservation in reservations}) == 4
+
+    # Queued requests are settled like any other: failed sends give them back
+    cog._settle_reservation(interactions[0], sent=True)
+    for interaction in interactions[1:]:
+        cog._settle_reservation(interaction, sent=False)
+    assert all(reservation.settled for reservation in reservations)
+    assert not any(reservation.refund() for reservation in reservations)
+    # The last refund freed the command's request again
+    assert await cog.handle_rate_limit(make_interaction(5), "home")
+
+@pytest.mark.asyncio
+async def test_queue_mode_rejects_when_full():
+    cog = make_queued_cog(per=1.0, max_depth=1)
+    assert await cog.handle_rate_limit(make_interaction(0), "home")
+    waiting = asyncio.create_task(cog.handle_rate_limit(make_interaction(1), "home"))
+    await asyncio.sleep(0)
+    
+    rejected = make_interaction(2)
+    assert not await cog.handle_rate_limit(rejected, "home")
+    
+    assert rejected.response.send_message.call_args[1]["ephemeral"] is True
+    # One request per second, and one interaction is already waiting for the next
+    description = rejected.response.send_message.call_args[1]["embed"].description
+    assert "Please wait 2.0 seconds" in description
+    assert not rejected.response.defer.called
+    assert await waiting
+
+@pytest.mark.asyncio
+async def test_queue_mode_times_out():
+    cog = make_queued_cog(per=5.0, timeout=0.05)
+    assert await cog.handle_rate_limit(make_interaction(0), "home")
+    
+    # Retry is further away than the queue timeout, so reject straight away
+    late = make_interaction(1)
+    assert not await cog.handle_rate_limit(late, "home")
+    assert late.response.send_message.called
+
+@pytest.mark.asyncio
+async def test_queue_mode_rejects_waits_past_the_timeout():
+    cog = make_queued_cog(per=1.0, timeout=1.5)
+    assert await cog.handle_rate_limit(make_interaction(0), "home")
+    waiting = asyncio.create_task(cog.handle_rate_limit(make_interaction(1), "home"))
+    await asyncio.sleep(0)
+
+    # Its turn would come after the waiting interaction's, in about 2 seconds
+    late = make_interaction(2)
+    assert not await cog.handle_rate_limit(late, "home")
+    assert not late.response.defer.called
+    assert cog.response_queue.timed_out == 0
+    assert await waiting
+
+def test_refund_gives_the_request_back(rate_limiter):
+    reservation, wait = rate_limiter.reserve('home', 1, 1, 60.0)
+    assert reservation is not None and wait == 0.0
+    assert rate_limiter.reserve('home', 1, 1, 60.0)[0] is None
+    assert rate_limiter.global_remaining == 49
+
+    assert reservation.refund()
+
+    assert rate_limiter.global_remaining == 50
+    assert rate_limiter.reserve('home', 1, 1, 60.0)[0] is not None
+
+def test_refund_can_keep_the_global_request(rate_limiter):
+    reservation, _ = rate_limiter.reserve('home', 1, 1, 60.0)
+    reservation.refund(include_global=False)
+    assert rate_limiter.global_remaining == 49
+    assert rate_limiter.reserve('home', 1, 1, 60.0)[0] is not None
+
+def test_reservations_settle_once(rate_limiter):
+    committed, _ = rate_limiter.reserve('home', 1, 2, 60.0)
+    committed.commit()
+    assert not committed.refund()
+
+    refunded, _ = rate_limiter.reserve('home', 1, 2, 60.0)
+    assert refunded.refund()
+    assert not refunded.refund()
+    assert rate_limiter.global_remaining == 49
+
+@pytest.mark.asyncio
+async def test_failed_command_refunds_its_request():
+    bot = MagicMock()
+    bot.config = {"rate_limits": {"home": {"scope": "user", "limit": 1, "per": 60}}}
+    cog = RateLimitedCog(bot)
+    interaction = make_interaction(1)
+    interaction.extras = {}
+
+    assert await cog.handle_rate_limit(interaction, "home")
+    await cog.handle_command_error(interaction, Exception("send failed"))
+
+    assert "reservation" not in interaction.extras
+    assert cog.rate_limiter.global_remaining == 50
+    assert await cog.handle_rate_limit(make_interaction(1), "home")
+
+@pytest.mark.asyncio
+async def test_reservations_never_oversubscribe_under_contention(monkeypatch):
+    # Freeze time so no budget refills while the workers race for it. Reading
+    # the clock yields to other threads, to widen any race window.
+    now = 1000.0
+
+    def monotonic():
+        time.sleep(0)
+        return now
+
+    clock = SimpleNamespace(monotonic=monotonic)
+    monkeypatch.setattr(rate_limiter_module, "time", clock)
+    monkeypatch.setattr(backends_module, "time", clock)
+    rate_limiter = RateLimitManager(global_limit=200)
+    scopes, limit, per = 50, 5, 60.0
+    # Requests still counted: committed, or refunded to the command's limit only
+    scoped_used = [0] * scopes
+    global_used = [0]
+    tally = threading.Lock()
+
+    def reserve(rng):
+        scope = rng.randrange(scopes)
+        reservation, wait = rate_limiter.reserve('home', scope, limit, per)
+        assert (reservation is None) == (wait > 0)
+        return scope, reservation
+
+    def settle(scope, reservation, outcome):
+        # Mostly refunds, so the budgets keep changing hands
+        if outcome < 0.8:
+            assert reservation.refund()
+        elif outcome < 0.85:
+            assert reservation.refund(include_global=False)
+            with tally:
+                global_used[0] += 1
+        else:
+            reservation.commit()
+            with tally:
+                scoped_used[scope] += 1
+                global_used[0] += 1
+
+    def thread_worker(seed):
+        rng = random.Random(seed)
+        for _ in range(300):
+            scope, reservation = reserve(rng)
+            if reservation is not None:
+                time.sleep(0)
+                settle(scope, reservation, rng.random())
+
+    async def task_worker(seed):
+        # Reserve on the event loop, "send" across an await, settle from a worker thread
+        rng = random.Random(seed)
+        loop = asyncio.get_running_loop()
+        for _ in range(300):
+            scope, reservation = reserve(rng)
+            await asyncio.sleep(0)
+            if reservation is not None:
+                await loop.run_in_executor(None, settle, scope, reservation, rng.random())
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            threads = [loop.run_in_executor(pool, thread_worker, seed) for seed in range(8)]
+            await asyncio.gather(*threads, *(task_worker(seed) for seed in range(100, 108)))
+    finally:
+        sys.setswitchinterval(interval)
+
+    # Every granted request is accounted for exactly once
+    assert global_used[0] <= 200
+    assert rate_limiter.global_remaining == 200 - global_used[0]
+    for scope in range(scopes):
+        assert scoped_used[scope] <= limit
+        tat = rate_limiter.scoped.get(rate_limiter.scoped_key('home', scope), now)
+        assert max(tat, now) - now == scoped_used[scope] * per / limit
+
+def make_error_cog():
+    bot = MagicMock()
+    bot.config = {}
+    return RateLimitedCog(bot)
+
+def not_found(code):
+    return discord.NotFound(MagicMock(status=404, reason="Not Found"), {"code": code, "message": "Unknown"})
+
+@pytest.mark.asyncio
+async def test_error_after_response_uses_followup():
+    cog = make_error_cog()
+    interaction = make_interaction(1)
+    interaction.response.is_done = MagicMock(return_value=True)
+
+    await cog.handle_command_error(interaction, Exception("Test error"))
+
+    assert not interaction.response.send_message.called
+    assert interaction.followup.send.call_args[1]["ephemeral"] is True
+
+@pytest.mark.asyncio
+async def test_error_on_expired_interaction_is_not_answered():
+    cog = make_error_cog()
+    interaction = make_interaction(1)
+
+    await cog.handle_command_error(interaction, not_found(rate_limiter_module.UNKNOWN_INTERACTION))
+
+    assert not interaction.response.send_message.called
+    assert not interaction.followup.send.called
+    assert cog.rate_limiter.invalid_requests == 1
+
+@pytest.mark.asyncio
+async def test_error_message_is_shed_while_circuit_is_open():
+    cog = make_error_cog()
+    for _ in range(8000):
+        cog.rate_limiter.track_invalid_request()
+    assert cog.rate_limiter.circuit_state is CircuitState.OPEN
+
+    interaction = make_interaction(1)
+    await cog.handle_command_error(interaction, not_found(10003))
+
+    assert not interaction.response.send_message.called
+    assert cog.rate_limiter.breaker.shed == 1
+
+@pytest.mark.asyncio
+async def test_traced_invalid_requests_are_not_counted_twice():
+    cog = make_error_cog()
+    cog.rate_limiter.traced = True
+
+    await cog.handle_command_error(make_interaction(1), not_found(10003))
+
+    assert cog.rate_limiter.invalid_requests == 0
@@ -0,0 +1,59 @@
+import pytest
+import asyncio
+import time
+from src.bot.response_queue import DeferredResponseQueue, QueueFull
+
+class Budget:
+    """One request every `interval` seconds"""
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_at = time.monotonic()
+
+    def check(self):
+        now = time.monotonic()
+        if now < self.next_at:
+            return self.next_at - now
+        self.next_at = now + self.interval
+        return None
+
+@pytest.mark.asyncio
+async def test_first_come_first_served():
+    queue = DeferredResponseQueue()
+    budget = Budget(0.02)
+    budget.check()
+    order = []
+
+    async def wait(name):
+        await queue.wait_for_turn("bucket", budget.check)
+        order.append(name)
+
+    await asyncio.gather(wait("first"), wait("second"), wait("third"))
+
+    assert order == ["first", "second", "third"]
+    assert queue.queues == {} and queue.drainers == {}
+
+@pytest.mark.asyncio
+async def test_timed_out_waiters_do_not_consume_requests():
+    queue = DeferredResponseQueue(timeout=0.05)
+    budget = Budget(0.2)
+    budget.check()
+
+    assert not await queue.wait_for_turn("bucket", budget.check)
+    await asyncio.sleep(0.2)
+
+    # The expired waiter was skipped, so the request is still available
+    assert budget.check() is None
+    assert queue.timed_out == 1
+
+@pytest.mark.asyncio
+async def test_max_depth():
+    queue = DeferredResponseQueue(max_depth=1, timeout=0.05)
+    budget = Budget(1.0)
+    budget.check()
+    waiter = asyncio.create_task(queue.wait_for_turn("bucket", budget.check))
+    await asyncio.sleep(0)
+
+    with pytest.raises(QueueFull):
+        await queue.wait_for_turn("bucket", budget.check)
+    await waiter
+    assert queue.rejected == 1
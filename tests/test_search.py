@@ -0,0 +1,56 @@
+import pytest
+import json
+from src.bot.search import DocsIndex, tokenize
+from src.bot.snapshot import open_snapshot, write_snapshot
+from src.bot.trmnl import DOCS_PATH
+
+@pytest.fixture
+def docs():
+    return json.loads(DOCS_PATH.read_text())
+
+@pytest.fixture
+def index(docs):
+    return DocsIndex.build(docs)
+
+def test_tokenize():
+    assert tokenize("BYOD/S: Bring-Your-Own!") == ["byod", "s", "bring", "your", "own"]
+
+def test_title_matches_rank_first(index):
+    results = index.search("privacy")
+    assert results[0][1]["title"] in ("Privacy Information", "Privacy Policy")
+    scores = [score for score, _ in results]
+    assert scores == sorted(scores, reverse=True)
+
+def test_docs_entries_point_to_commands(index):
+    results = index.search("framework design system")
+    commands = [document["command"] for _, document in results]
+    assert "framework" in commands
+
+def test_links_are_deduplicated(index):
+    urls = [document["url"] for document in index.documents if document["url"]]
+    titles_and_urls = [(document["title"], document["url"]) for document in index.documents if document["url"]]
+    assert len(titles_and_urls) == len(set(titles_and_urls))
+    assert "https://docs.usetrmnl.com/go/diy/byos" in urls
+
+def test_unknown_terms(index):
+    assert index.search("zyzzyva") == []
+    assert index.search("") == []
+
+def test_index_from_snapshot(index, tmp_path):
+    path = tmp_path / "docs_snapshot.bin"
+    write_snapshot(path, "digest-1", index.tables())
+    loaded = DocsIndex.from_snapshot(open_snapshot(path, "digest-1"))
+
+    # Same results, decoded from the snapshot only for the queried terms
+    for query in ("byos", "framework design system", "zyzzyva"):
+        assert loaded.search(query) == index.search(query)
+    assert set(loaded.lists) == {"byos", "framework", "design", "system"}
+    assert len(loaded.documents) == len(index.documents)
+
+def test_snapshot_decodes_common_terms_up_front(index, tmp_path, monkeypatch):
+    path = tmp_path / "docs_snapshot.bin"
+    write_snapshot(path, "digest-1", index.tables())
+    longest = max(index.postings, key=lambda term: len(index.postings[term]))
+    monkeypatch.setattr("src.bot.search.WARM_POSTINGS_BYTES", len(json.dumps(index.postings[longest], separators=(",", ":"))))
+    loaded = DocsIndex.from_snapshot(open_snapshot(path, "digest-1"))
+    assert set(loaded.weights) == {longest}
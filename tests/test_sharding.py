@@ -0,0 +1,34 @@
+import pytest
+from unittest.mock import MagicMock
+from src.bot.sharding import shard_options, shard_stats
+
+def test_no_config_means_auto_sharding():
+    assert shard_options({}) == {}
+    assert shard_options(None) == {}
+
+def test_explicit_shard_range():
+    config = {"sharding": {"shard_count": 8, "shard_range": [4, 8]}}
+    assert shard_options(config) == {"shard_count": 8, "shard_ids": [4, 5, 6, 7]}
+    assert shard_options({"sharding": {"shard_count": 2}}) == {"shard_count": 2}
+
+@pytest.mark.parametrize("options", [
+    {"shard_ids": [0, 1]},
+    {"shard_count": 2, "shard_ids": [2]},
+    {"shard_count": 2, "shard_range": [1, 1]},
+])
+def test_invalid_shard_ids(options):
+    with pytest.raises(ValueError):
+        shard_options({"sharding": options})
+
+def test_shard_stats():
+    bot = MagicMock()
+    bot.guilds = [MagicMock(shard_id=0), MagicMock(shard_id=1), MagicMock(shard_id=1)]
+    bot.latencies = [(1, 0.2), (0, 0.05)]
+    bot.shards = {0: MagicMock(is_closed=MagicMock(return_value=False)), 1: MagicMock(is_closed=MagicMock(return_value=True))}
+
+    stats = shard_stats(bot)
+
+    assert [(shard.shard_id, shard.latency, shard.guilds, shard.closed) for shard in stats] == [
+        (0, 0.05, 1, False),
+        (1, 0.2, 2, True),
+    ]
@@ -0,0 +1,79 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.bot.snapshot import SNAPSHOT_VERSION, Snapshot, SnapshotList, open_snapshot, write_snapshot
+
+TABLES = {
+    "docs": {"zeta": {"title": "Last"}, "alpha": {"title": "First", "links": {"A": "https://a"}}, "é": [1, 2.5, None]},
+    "documents": {str(i): {"id": i} for i in range(20)},
+    "empty": {},
+}
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "docs_snapshot.bin"
+    write_snapshot(path, "digest-1", TABLES)
+    return path
+
+def test_round_trip(path):
+    snapshot = open_snapshot(path, "digest-1")
+    docs = snapshot["docs"]
+
+    assert list(docs) == ["zeta", "alpha", "é"]  # insertion order
+    assert docs["alpha"] == {"title": "First", "links": {"A": "https://a"}}
+    assert docs["é"] == [1, 2.5, None]
+    assert dict(docs) == TABLES["docs"]
+    assert list(docs.records()) == list(TABLES["docs"].items())
+    assert len(snapshot["empty"]) == 0
+
+def test_missing_keys(path):
+    docs = open_snapshot(path, "digest-1")["docs"]
+    assert "beta" not in docs
+    assert docs.get("beta") is None
+    with pytest.raises(KeyError):
+        docs["beta"]
+    assert 1 not in docs
+
+def test_values_by_position(path):
+    documents = SnapshotList(open_snapshot(path, "digest-1")["documents"])
+    assert documents[7] == {"id": 7}
+    assert documents[-1] == {"id": 19}
+    assert [document["id"] for document in documents] == list(range(20))
+    with pytest.raises(IndexError):
+        documents[20]
+
+def test_digest_mismatch(path):
+    assert open_snapshot(path, "digest-2") is None
+    assert Snapshot(path).version == SNAPSHOT_VERSION
+
+def test_missing_or_corrupt_file(path, tmp_path):
+    assert open_snapshot(tmp_path / "missing.bin", "digest-1") is None
+
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    assert open_snapshot(empty, "digest-1") is None
+
+    garbage = tmp_path / "garbage.bin"
+    garbage.write_bytes(b"{\"docs\": {}}" * 10)
+    assert open_snapshot(garbage, "digest-1") is None
+
+    truncated = tmp_path / "truncated.bin"
+    truncated.write_bytes(path.read_bytes()[:-40])
+    assert open_snapshot(truncated, "digest-1") is None
+
+def test_rewrite_keeps_open_snapshot_readable(path):
+    old = open_snapshot(path, "digest-1")["docs"]
+    write_snapshot(path, "digest-2", {"docs": {"new": 1}})
+    assert old["alpha"]["title"] == "First"
+    assert dict(open_snapshot(path, "digest-2")["docs"]) == {"new": 1}
+
+def test_concurrent_writes_never_mix(path, tmp_path):
+    tables = [{"docs": {str(i): "x" * 10_000 for i in range(50)}, "writer": {"id": n}} for n in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda n: write_snapshot(path, f"digest-{n}", tables[n]), range(8)))
+
+    # Whichever write came last is complete, and no temporary files are left
+    snapshot = Snapshot(path)
+    writer = int(snapshot.digest.split("-")[1])
+    assert dict(snapshot["writer"]) == {"id": writer}
+    assert dict(snapshot["docs"]) == tables[writer]["docs"]
+    assert [file.name for file in tmp_path.iterdir()] == [path.name]
@@ -4,7 +4,11 @@ from discord import app_commands
 from unittest.mock import AsyncMock, MagicMock, patch
 import json
 from pathlib import Path
-from src.bot.trmnl import trmnl
+from src.bot.analytics import AnalyticsSink, AnalyticsStore
+from src.bot.docs_loader import DocsValidationError
+from src.bot.ingest import ContentStore
+from src.bot.command_sync import SyncDiff, SyncResult
+from src.bot.trmnl import trmnl, load_prepared_docs, name_list, setup, DOCS_PATH, PAGE_LINKS
 
 @pytest.fixture
 def bot():
@@ -14,14 +18,21 @@ def bot():
     return bot
 
 @pytest.fixture
-def cog(bot):
+def cog(bot, state_paths):
     return trmnl(bot)
 
+async def invoke(cog, name, interaction):
+    interaction.command.name = name
+    await cog.doc_commands[name].callback(cog, interaction)
+
 @pytest.fixture
 def interaction():
     interaction = AsyncMock()
     interaction.response = AsyncMock()
     interaction.response.send_message = AsyncMock()
+    interaction.response.is_done = MagicMock(return_value=False)
+    interaction.channel_id = 1234
+    interaction.extras = {}
     return interaction
 
 @pytest.mark.asyncio
@@ -38,13 +49,83 @@ async def test_sync_command(cog, interaction):
     args = interaction.response.send_message.call_args[1]
     assert "Successfully synced 2 commands" in args["embed"].description
 
+@pytest.mark.asyncio
+async def test_sync_command_skips_unchanged_tree(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    cog.bot.tree.sync.return_value = []
+    await cog.sync.callback(cog, interaction)
+    
+    # Execute
+    await cog.sync.callback(cog, interaction)
+
+    # Verify the second sync did not call Discord
+    assert cog.bot.tree.sync.call_count == 1
+    args = interaction.response.send_message.call_args[1]
+    assert "No changes" in args["embed"].description
+
+@pytest.mark.asyncio
+async def test_guild_sync_is_rejected_in_direct_messages(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    interaction.guild = None
+
+    # Execute
+    await cog.sync.callback(cog, interaction, scope="guild")
+
+    # Verify nothing was synced, and the global scope was not synced instead
+    assert not cog.bot.tree.sync.called
+    args = interaction.response.send_message.call_args[1]
+    assert args["ephemeral"] is True
+    assert "use it in a server" in args["embed"].description
+
+@pytest.mark.asyncio
+async def test_guild_sync_says_what_it_compared(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    cog.bot.tree.sync.return_value = []
+    interaction.guild.id = 42
+
+    # Execute
+    await cog.sync.callback(cog, interaction, scope="guild")
+
+    # Verify
+    cog.bot.tree.sync.assert_awaited_once_with(guild=interaction.guild)
+    embed = interaction.response.send_message.call_args[1]["embed"]
+    assert "Only commands registered for this server" in embed.footer.text
+
+@pytest.mark.asyncio
+async def test_sync_command_shortens_long_diffs(cog, interaction):
+    # Setup - a first sync lists every generated doc command as added
+    names = [f"generated-command-{i}" for i in range(120)]
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    result = SyncResult("global", SyncDiff(names, [], ["home"], first_sync=True), names, len(names))
+    cog.command_syncer.sync = AsyncMock(return_value=result)
+
+    # Execute
+    await cog.sync.callback(cog, interaction)
+
+    # Verify every field fits Discord's 1024 character limit
+    added, changed = interaction.response.send_message.call_args[1]["embed"].fields
+    assert len(added.value) <= 1024
+    assert added.value.startswith("`generated-command-0`, ")
+    hidden = int(added.value.rsplit("…and ", 1)[1].split()[0])
+    assert added.value.count("`") // 2 + hidden == len(names)
+    assert changed.value == "`home`"
+
+def test_name_list():
+    assert name_list(["home", "docs"]) == "`home`, `docs`"
+    assert name_list(["home", "docs", "blog"], limit=20) == "`home`, …and 2 more"
+    assert name_list(["a-very-long-command-name"], limit=10) == "…and 1 more"
+    assert name_list([]) == ""
+
 @pytest.mark.asyncio
 async def test_home_command(cog, interaction):
     # Setup
     cog.handle_rate_limit = AsyncMock(return_value=True)
     
     # Execute
-    await cog.home.callback(cog, interaction)
+    await invoke(cog, "home", interaction)
 
     # Verify
     assert interaction.response.send_message.called
@@ -58,7 +139,7 @@ async def test_rate_limit_block(cog, interaction):
     cog.handle_rate_limit = AsyncMock(return_value=False)
     
     # Execute
-    await cog.home.callback(cog, interaction)
+    await invoke(cog, "home", interaction)
 
     # Verify command was blocked due to rate limit
     assert not interaction.response.send_message.called
@@ -87,7 +168,7 @@ async def test_error_handling(cog, interaction):
     cog.handle_rate_limit = AsyncMock(side_effect=raise_error)
     
     # Execute
-    await cog.home.callback(cog, interaction)
+    await invoke(cog, "home", interaction)
     
     # Verify error handling
     assert interaction.response.send_message.called
@@ -101,7 +182,7 @@ async def test_docs_command(cog, interaction):
     cog.handle_rate_limit = AsyncMock(return_value=True)
     
     # Execute
-    await cog.docs.callback(cog, interaction)
+    await invoke(cog, "docs", interaction)
     
     # Verify
     assert interaction.response.send_message.called
@@ -115,7 +196,7 @@ async def test_framework_command(cog, interaction):
     cog.handle_rate_limit = AsyncMock(return_value=True)
     
     # Execute
-    await cog.framework.callback(cog, interaction)
+    await invoke(cog, "framework", interaction)
     
     # Verify
     assert interaction.response.send_message.called
@@ -129,7 +210,7 @@ async def test_privacy_command(cog, interaction):
     cog.handle_rate_limit = AsyncMock(return_value=True)
     
     # Execute
-    await cog.privacy.callback(cog, interaction)
+    await invoke(cog, "privacy", interaction)
     
     # Verify
     assert interaction.response.send_message.called
@@ -139,10 +220,10 @@ async def test_privacy_command(cog, interaction):
 @pytest.mark.asyncio
 async def test_file_not_found_error(cog, interaction):
     # Setup
-    def raise_error(*args, **kwargs):
+    async def raise_error(*args, **kwargs):
         raise FileNotFoundError("docs.json not found")
         
-    cog.reload_docs = MagicMock(side_effect=raise_error)
+    cog.reload_docs_async = AsyncMock(side_effect=raise_error)
     cog.handle_rate_limit = AsyncMock(return_value=True)
     
     # Execute
@@ -160,7 +241,7 @@ async def test_terms_command(cog, interaction):
     cog.handle_rate_limit = AsyncMock(return_value=True)
     
     # Execute
-    await cog.terms.callback(cog, interaction)
+    await invoke(cog, "terms", interaction)
     
     # Verify
     assert interaction.response.send_message.called
@@ -173,8 +254,8 @@ async def test_rate_limit_handling(cog, interaction):
     cog.handle_rate_limit = AsyncMock(return_value=False)
     
     # Execute
-    for cmd in [cog.home, cog.docs, cog.framework, cog.privacy, cog.terms]:
-        await cmd.callback(cog, interaction)
+    for name in ["home", "docs", "framework", "privacy", "terms"]:
+        await invoke(cog, name, interaction)
         assert not interaction.response.send_message.called
         interaction.response.send_message.reset_mock()
 
@@ -184,7 +265,7 @@ async def test_news_command(cog, interaction):
     cog.handle_rate_limit = AsyncMock(return_value=True)
     
     # Execute
-    await cog.news.callback(cog, interaction)
+    await invoke(cog, "news", interaction)
     
     # Verify
     assert interaction.response.send_message.called
@@ -198,7 +279,7 @@ async def test_updates_command(cog, interaction):
     cog.handle_rate_limit = AsyncMock(return_value=True)
     
     # Execute
-    await cog.updates.callback(cog, interaction)
+    await invoke(cog, "updates", interaction)
     
     # Verify
     assert interaction.response.send_message.called
@@ -212,10 +293,603 @@ async def test_diy_command(cog, interaction):
     cog.handle_rate_limit = AsyncMock(return_value=True)
     
     # Execute
-    await cog.diy.callback(cog, interaction)
+    await invoke(cog, "diy", interaction)
     
     # Verify
     assert interaction.response.send_message.called
     args = interaction.response.send_message.call_args[1]
     assert isinstance(args["embed"], discord.Embed)
-    assert "DIY TRMNL" in args["embed"].title
\ No newline at end of file
+    assert "DIY TRMNL" in args["embed"].title
+
+@pytest.mark.asyncio
+async def test_embeds_are_prebuilt(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    
+    # Execute in two channels so the second call is not coalesced
+    await invoke(cog, "news", interaction)
+    interaction.channel_id = 5678
+    await invoke(cog, "news", interaction)
+    
+    # Verify both calls were served the same cached embed
+    first, second = interaction.response.send_message.call_args_list
+    assert first[1]["embed"] is second[1]["embed"]
+    assert first[1]["embed"] is cog.embeds["news"]
+
+def test_reload_docs_swaps_embed_table(cog):
+    # Setup
+    old_embeds = cog.embeds
+    
+    # Execute
+    cog.reload_docs()
+    
+    # Verify a new table was published and the old one was left untouched
+    assert cog.embeds is not old_embeds
+    assert old_embeds["home"].title == "TRMNL Resources"
+    with pytest.raises(TypeError):
+        cog.embeds["home"] = None
+
+def test_commands_generated_from_docs(cog):
+    # Verify every command listed in docs.json was registered
+    expected = {"home", "docs", "framework", "news", "updates", "privacy", "terms", "diy"}
+    assert set(cog.doc_commands) == expected
+    assert cog.doc_commands["home"].description == "Get main TRMNL resources and information"
+    assert cog.bot.tree.add_command.call_count == len(expected)
+
+def test_reload_adds_and_removes_commands(cog, tmp_path, monkeypatch):
+    # Setup - drop "diy" and add a new "faq" page
+    docs = json.loads(DOCS_PATH.read_text())
+    del docs["docs"]["diy"]
+    docs["categories"]["diy"]["commands"] = []
+    docs["docs"]["faq"] = {
+        "title": "FAQ",
+        "description": "Frequently asked questions",
+        "content": "Common questions",
+        "links": {"FAQ": "https://usetrmnl.com/faq"}
+    }
+    docs_path = tmp_path / "docs.json"
+    docs_path.write_text(json.dumps(docs))
+    monkeypatch.setattr("src.bot.trmnl.DOCS_PATH", docs_path)
+    home = cog.doc_commands["home"]
+    
+    # Execute
+    cog.reload_docs()
+    
+    # Verify
+    assert "faq" in cog.doc_commands
+    assert "diy" not in cog.doc_commands
+    assert cog.doc_commands["home"] is home  # unchanged commands are kept
+    cog.bot.tree.remove_command.assert_called_once_with("diy")
+    assert cog.embeds["faq"].title == "FAQ"
+
+def write_docs(path, docs):
+    path.write_text(json.dumps(docs))
+    return path
+
+@pytest.mark.asyncio
+async def test_reload_docs_async_swaps_on_change(cog, tmp_path, monkeypatch):
+    # Setup
+    docs = json.loads(DOCS_PATH.read_text())
+    docs["docs"]["home"]["title"] = "New Home"
+    monkeypatch.setattr("src.bot.trmnl.DOCS_PATH", write_docs(tmp_path / "docs.json", docs))
+    
+    # Execute
+    changed = await cog.reload_docs_async()
+    unchanged = await cog.reload_docs_async()
+    
+    # Verify
+    assert changed and not unchanged
+    assert cog.embeds["home"].title == "New Home"
+    assert cog.docs_reloads == 1
+    assert cog.docs_reload_failures == 0
+
+@pytest.mark.asyncio
+async def test_reload_docs_async_keeps_state_on_invalid_file(cog, tmp_path, monkeypatch):
+    # Setup - a docs entry without content fails validation
+    docs = json.loads(DOCS_PATH.read_text())
+    del docs["docs"]["home"]["content"]
+    monkeypatch.setattr("src.bot.trmnl.DOCS_PATH", write_docs(tmp_path / "docs.json", docs))
+    embeds, docs_data = cog.embeds, cog.docs_data
+    
+    # Execute
+    with pytest.raises(DocsValidationError):
+        await cog.reload_docs_async()
+    
+    # Verify nothing was swapped
+    assert cog.embeds is embeds
+    assert cog.docs_data is docs_data
+    assert cog.docs_reload_failures == 1
+
+@pytest.mark.asyncio
+async def test_watch_docs_reloads_changed_file(cog, tmp_path, monkeypatch):
+    # Setup
+    docs = json.loads(DOCS_PATH.read_text())
+    docs_path = write_docs(tmp_path / "docs.json", docs)
+    monkeypatch.setattr("src.bot.trmnl.DOCS_PATH", docs_path)
+    await cog.watch_docs.coro(cog)  # picks up the new path
+    
+    # Execute - a broken write is reported once, the fix is picked up
+    docs_path.write_text("{not json")
+    await cog.watch_docs.coro(cog)
+    await cog.watch_docs.coro(cog)
+    docs["docs"]["news"]["title"] = "Fresh News"
+    write_docs(docs_path, docs)
+    await cog.watch_docs.coro(cog)
+    
+    # Verify
+    assert cog.docs_reload_failures == 1
+    assert cog.embeds["news"].title == "Fresh News"
+
+@pytest.mark.asyncio
+async def test_setup_falls_back_to_last_compiled_docs(bot, state_paths, monkeypatch):
+    # Setup - docs.json was compiled on an earlier start, then broken
+    load_prepared_docs()
+    docs = json.loads(DOCS_PATH.read_text())
+    docs_path = state_paths / "docs.json"
+    docs_path.write_text("{not json")
+    monkeypatch.setattr("src.bot.trmnl.DOCS_PATH", docs_path)
+    bot.add_cog = AsyncMock()
+
+    # Execute
+    await setup(bot)
+    cog = bot.add_cog.call_args[0][0]
+    docs["docs"]["news"]["title"] = "Fresh News"
+    write_docs(docs_path, docs)
+    await cog.watch_docs.coro(cog)
+
+    # Verify the commands were up from the start and the fix was picked up
+    assert "home" in cog.doc_commands
+    assert cog.embeds["news"].title == "Fresh News"
+
+@pytest.mark.asyncio
+async def test_setup_without_compiled_docs_starts_empty(bot, state_paths, monkeypatch):
+    # Setup
+    docs_path = state_paths / "docs.json"
+    docs_path.write_text("{not json")
+    monkeypatch.setattr("src.bot.trmnl.DOCS_PATH", docs_path)
+    bot.add_cog = AsyncMock()
+
+    # Execute
+    await setup(bot)
+
+    # Verify
+    cog = bot.add_cog.call_args[0][0]
+    assert cog.doc_commands == {}
+    assert cog.search_index.search("home") == []
+
+@pytest.mark.asyncio
+async def test_repeat_requests_in_channel_are_coalesced(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    message = MagicMock()
+    message.jump_url = "https://discord.com/channels/1/1234/99"
+    interaction.response.send_message.return_value = MagicMock(resource=message)
+    
+    # Execute
+    await invoke(cog, "news", interaction)
+    await invoke(cog, "news", interaction)
+    
+    # Verify the repeat got an ephemeral pointer instead of a new embed
+    first, second = interaction.response.send_message.call_args_list
+    assert "embed" in first[1]
+    assert second[1]["ephemeral"] is True
+    assert message.jump_url in second[1]["content"]
+    assert (cog.coalescer.sent, cog.coalescer.coalesced) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_coalescing_is_per_channel_and_command(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    
+    # Execute
+    await invoke(cog, "news", interaction)
+    await invoke(cog, "updates", interaction)
+    interaction.channel_id = 5678
+    await invoke(cog, "news", interaction)
+    
+    # Verify every response was a full embed
+    assert all("embed" in call[1] for call in interaction.response.send_message.call_args_list)
+    assert cog.coalescer.coalesced == 0
+
+@pytest.mark.asyncio
+async def test_search_command(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    
+    # Execute
+    await cog.search.callback(cog, interaction, "BYOS")
+    
+    # Verify
+    args = interaction.response.send_message.call_args[1]
+    assert args["embed"].title == "Search Results"
+    assert args["embed"].fields[0].value == "https://docs.usetrmnl.com/go/diy/byos"
+    assert args["ephemeral"] is True
+
+@pytest.mark.asyncio
+async def test_search_command_no_results(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    
+    # Execute
+    await cog.search.callback(cog, interaction, "zyzzyva")
+    
+    # Verify
+    args = interaction.response.send_message.call_args[1]
+    assert args["embed"].title == "No Results"
+
+@pytest.mark.asyncio
+async def test_doc_autocomplete(cog, interaction):
+    # Execute
+    choices = await cog.doc_autocomplete(interaction, "frame")
+    
+    # Verify
+    assert [choice.name for choice in choices][:1] == ["TRMNL Framework"]
+    assert all(len(choice.value) <= 100 for choice in choices)
+
+@pytest.mark.asyncio
+async def test_doc_command(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    
+    # Execute - a selected docs entry and free text naming a link
+    await cog.doc.callback(cog, interaction, "d:news")
+    interaction.channel_id = 5678
+    await cog.doc.callback(cog, interaction, "byos")
+    
+    # Verify
+    news, link = interaction.response.send_message.call_args_list
+    assert news[1]["embed"] is cog.embeds["news"]
+    assert link[1]["embed"].url == "https://docs.usetrmnl.com/go/diy/byos"
+
+@pytest.mark.asyncio
+async def test_reload_picks_up_crawled_pages(cog, interaction, tmp_path):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    url = "https://docs.usetrmnl.com/go/diy/byos"
+    ContentStore({url: {"title": "BYOS", "summary": "Point devices at your own server."}}).save(tmp_path / "content_store.json")
+    
+    # Execute
+    changed = await cog.reload_docs_async()
+    await cog.doc.callback(cog, interaction, "byos")
+    
+    # Verify
+    assert changed
+    assert interaction.response.send_message.call_args[1]["embed"].description == "Point devices at your own server."
+    assert cog.search_index.search("devices point")[0][1]["url"] == url
+
+def test_unchanged_docs_load_from_snapshot(cog, tmp_path, monkeypatch):
+    # Setup - the cog compiled the snapshot on startup
+    url = "https://docs.usetrmnl.com/go/diy/byos"
+    assert (tmp_path / "docs_snapshot.bin").exists()
+    monkeypatch.setattr("src.bot.trmnl.parse_docs", MagicMock(side_effect=AssertionError("parsed docs.json")))
+
+    # Execute
+    prepared = load_prepared_docs()
+
+    # Verify the same docs, with pages and the index read from the snapshot
+    assert prepared.docs_data == cog.docs_data
+    assert prepared.embeds["home"].title == cog.embeds["home"].title
+    assert prepared.search_index.search("byos")[0][1]["url"] == url
+    assert url not in prepared.content.pages
+
+def test_undecodable_snapshot_is_rebuilt(cog, tmp_path):
+    # Setup - valid header and digest, but a value that is not JSON
+    path = tmp_path / "docs_snapshot.bin"
+    data = path.read_bytes()
+    path.write_bytes(data.replace(b'"title":', b'"title"!', 1))
+
+    # Execute
+    prepared = load_prepared_docs()
+
+    # Verify the docs were parsed from docs.json and the snapshot rewritten
+    assert prepared.docs_data == cog.docs_data
+    assert path.read_bytes() == data
+
+@pytest.mark.asyncio
+async def test_extra_links_reuse_the_snapshot(cog, tmp_path, monkeypatch):
+    # Setup
+    snapshot = (tmp_path / "docs_snapshot.bin").read_bytes()
+    monkeypatch.setattr("src.bot.trmnl.parse_docs", MagicMock(side_effect=AssertionError("parsed docs.json")))
+
+    # Execute
+    await cog.set_extra_links("blog", {"New Post": "https://usetrmnl.com/blog/new-post"})
+
+    # Verify the links are shown without compiling them into the snapshot
+    assert next(iter(cog.docs_data["categories"]["blog"]["links"])) == "New Post"
+    assert (tmp_path / "docs_snapshot.bin").read_bytes() == snapshot
+
+@pytest.mark.asyncio
+async def test_changed_content_store_recompiles_snapshot(cog, tmp_path):
+    # Setup
+    url = "https://docs.usetrmnl.com/go/diy/byos"
+    ContentStore({url: {"title": "BYOS", "summary": "Point devices at your own server."}}).save(tmp_path / "content_store.json")
+
+    # Execute
+    await cog.reload_docs_async()
+    prepared = load_prepared_docs()
+
+    # Verify
+    assert prepared.content.pages[url]["summary"] == "Point devices at your own server."
+    assert prepared.content_digest == cog.content_digest
+
+@pytest.mark.asyncio
+async def test_stats_command(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    cog.metrics.observe("search", 0.012)
+    
+    # Execute
+    await cog.stats.callback(cog, interaction)
+    
+    # Verify
+    embed = interaction.response.send_message.call_args[1]["embed"]
+    assert "`/search` 1 calls" in embed.description
+    assert interaction.response.send_message.call_args[1]["ephemeral"]
+
+@pytest.mark.asyncio
+async def test_usage_command_reads_rollups(cog, interaction, tmp_path):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    cog.analytics = AnalyticsSink(AnalyticsStore(tmp_path / "analytics.db"))
+    interaction.guild_id = 42
+    for name in ("home", "home", "search"):
+        cog.analytics.record(name, 42)
+    cog.analytics.record("home", 7)
+    interaction.response.is_done = MagicMock(side_effect=lambda: interaction.response.defer.called)
+
+    # Execute
+    await cog.usage.callback(cog, interaction)
+
+    # Verify the answer was deferred, the buffered events were written first and only this server is counted
+    interaction.response.defer.assert_awaited_once_with(ephemeral=True, thinking=True)
+    embed = interaction.followup.send.call_args[1]["embed"]
+    assert interaction.followup.send.call_args[1]["ephemeral"]
+    assert embed.description.splitlines() == [
+        "`/home` 2 calls, 0 errors, 0 rate limited",
+        "`/search` 1 calls, 0 errors, 0 rate limited",
+    ]
+    assert embed.fields[0].value == "3"
+    assert not cog.analytics.pending
+    cog.analytics.store.close()
+
+@pytest.mark.asyncio
+async def test_usage_command_all_servers_is_owner_only(cog, interaction, tmp_path):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    cog.analytics = AnalyticsSink(AnalyticsStore(tmp_path / "analytics.db"))
+    cog.bot.is_owner = AsyncMock(return_value=False)
+
+    # Execute
+    await cog.usage.callback(cog, interaction, all_servers=True)
+
+    # Verify
+    assert "bot owner" in interaction.response.send_message.call_args[1]["content"]
+
+@pytest.mark.asyncio
+async def test_usage_command_without_analytics(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+
+    # Execute
+    await cog.usage.callback(cog, interaction)
+
+    # Verify
+    assert interaction.response.send_message.call_args[1]["content"] == "Usage analytics are disabled."
+
+@pytest.mark.asyncio
+async def test_shards_command(cog, interaction):
+    # Setup
+    cog.handle_rate_limit = AsyncMock(return_value=True)
+    cog.bot.shard_count = 2
+    cog.bot.guilds = [MagicMock(shard_id=0), MagicMock(shard_id=1), MagicMock(shard_id=1)]
+    cog.bot.latencies = [(0, 0.041), (1, 0.052)]
+    cog.bot.shards = {0: MagicMock(is_closed=MagicMock(return_value=False)), 1: MagicMock(is_closed=MagicMock(return_value=False))}
+    
+    # Execute
+    await cog.shards.callback(cog, interaction)
+    
+    # Verify
+    embed = interaction.response.send_message.call_args[1]["embed"]
+    assert embed.description.splitlines() == ["`#0` 41 ms, 1 guilds", "`#1` 52 ms, 2 guilds"]
+    assert embed.footer.text == "Shard count: 2 | Guilds: 3"
+
+GERMAN = {"de": {"docs": {"home": {"name": "start", "title": "TRMNL-Ressourcen", "description": "Die wichtigsten TRMNL-Ressourcen"}}}}
+
+@pytest.fixture
+def german_cog(cog, tmp_path, monkeypatch):
+    docs = json.loads(DOCS_PATH.read_text())
+    docs["locales"] = GERMAN
+    monkeypatch.setattr("src.bot.trmnl.DOCS_PATH", write_docs(tmp_path / "docs.json", docs))
+    cog.reload_docs()
+    return cog
+
+def test_localized_embeds_are_prebuilt(german_cog):
+    german = german_cog.localized_embeds["de"]
+    assert german["home"].title == "TRMNL-Ressourcen"
+    assert german["home"].fields[0].value == german_cog.embeds["home"].fields[0].value
+    # Untranslated commands share the English embed
+    assert german["news"] is german_cog.embeds["news"]
+    assert german_cog.doc_commands["home"].extras["localizations"] == {
+        "name": {"de": "start"},
+        "description": {"de": "Die wichtigsten TRMNL-Ressourcen"},
+    }
+
+@pytest.mark.asyncio
+async def test_doc_command_answers_in_the_guild_language(german_cog, interaction):
+    # Setup
+    german_cog.handle_rate_limit = AsyncMock(return_value=True)
+    interaction.guild_id = 10
+    interaction.locale = discord.Locale.american_english
+    german_cog.locale_preferences.guilds[10] = "de"
+
+    # Execute
+    await invoke(german_cog, "home", interaction)
+
+    # Verify
+    assert interaction.response.send_message.call_args[1]["embed"].title == "TRMNL-Ressourcen"
+
+@pytest.mark.asyncio
+async def test_language_command_saves_preference(german_cog, interaction, tmp_path):
+    # Setup
+    german_cog.handle_rate_limit = AsyncMock(return_value=True)
+    interaction.user.id = 42
+
+    # Execute
+    await german_cog.language.callback(german_cog, interaction, "de")
+    await german_cog.language.callback(german_cog, interaction, "xx")
+
+    # Verify
+    assert german_cog.locale_preferences.users == {42: "de"}
+    saved = json.loads((tmp_path / "locale_preferences.json").read_text())
+    assert saved["users"] == {"42": "de"}
+    titles = [call[1]["embed"].title for call in interaction.response.send_message.call_args_list]
+    assert titles == ["Language Updated", "Unknown Language"]
+
+@pytest.mark.asyncio
+async def test_server_language_needs_manage_guild(german_cog, interaction):
+    # Setup
+    german_cog.handle_rate_limit = AsyncMock(return_value=True)
+    interaction.guild_id = 10
+    interaction.permissions = discord.Permissions.none()
+
+    # Execute
+    await german_cog.language.callback(german_cog, interaction, "de", server=True)
+
+    # Verify
+    assert german_cog.locale_preferences.guilds == {}
+    assert interaction.response.send_message.call_args[1]["embed"].title == "Not Allowed"
+
+def test_locales_load_from_snapshot(german_cog, monkeypatch):
+    monkeypatch.setattr("src.bot.trmnl.parse_docs", MagicMock(side_effect=AssertionError("parsed docs.json")))
+    prepared = load_prepared_docs()
+    assert prepared.localized_embeds["de"]["home"].title == "TRMNL-Ressourcen"
+
+BLOG_POSTS = {f"Post {i}": f"https://usetrmnl.com/blog/post-{i}" for i in range(40)}
+
+@pytest.fixture
+def paged_cog(cog, tmp_path, monkeypatch):
+    # 44 links in the blog category: past Discord's 25 embed fields
+    docs = json.loads(DOCS_PATH.read_text())
+    docs["categories"]["blog"]["links"].update(BLOG_POSTS)
+    monkeypatch.setattr("src.bot.trmnl.DOCS_PATH", write_docs(tmp_path / "docs.json", docs))
+    cog.reload_docs()
+    return cog
+
+def test_large_category_is_split_into_pages(paged_cog):
+    pages = paged_cog.localized_pages["en-US"]
+    links = {**json.loads(DOCS_PATH.read_text())["categories"]["blog"]["links"], **BLOG_POSTS}
+
+    for embeds in (pages.categories["blog"], pages.docs["updates"]):
+        assert len(embeds) == 5
+        assert all(len(embed.fields) <= PAGE_LINKS for embed in embeds)
+        assert [(field.name, field.value) for embed in embeds for field in embed.fields] == list(links.items())
+        assert [embed.footer.text for embed in embeds] == [f"Page {i}/5" for i in range(1, 6)]
+    # The command's answer is its first page
+    assert paged_cog.embeds["updates"] is pages.docs["updates"][0]
+
+@pytest.mark.asyncio
+async def test_paged_doc_command_sends_buttons(paged_cog, interaction):
+    # Setup
+    paged_cog.handle_rate_limit = AsyncMock(return_value=True)
+
+    # Execute
+    await invoke(paged_cog, "updates", interaction)
+
+    # Verify
+    args = interaction.response.send_message.call_args[1]
+    assert args["embed"] is paged_cog.embeds["updates"]
+    assert [item.custom_id for item in args["view"].children] == [
+        "trmnl:page:d:updates:0:p", "trmnl:page:d:updates:1:n", "trmnl:category",
+    ]
+
+@pytest.mark.asyncio
+async def test_short_doc_command_sends_no_components(paged_cog, interaction):
+    # Setup
+    paged_cog.handle_rate_limit = AsyncMock(return_value=True)
+
+    # Execute
+    await invoke(paged_cog, "home", interaction)
+
+    # Verify
+    assert "view" not in interaction.response.send_message.call_args[1]
+
+@pytest.mark.asyncio
+async def test_show_page_edits_the_message_with_a_cached_page(paged_cog, interaction):
+    # Setup - the message answered the user clicking it
+    paged_cog.handle_rate_limit = AsyncMock(return_value=True)
+    interaction.message.interaction_metadata.user = interaction.user
+
+    # Execute twice: page 3, then a page past the end
+    await paged_cog.show_page(interaction, "c", "blog", 3)
+    await paged_cog.show_page(interaction, "c", "blog", 99)
+
+    # Verify
+    third, last = interaction.response.edit_message.call_args_list
+    embeds = paged_cog.localized_pages["en-US"].categories["blog"]
+    assert third[1]["embed"] is embeds[3]
+    assert [item.custom_id for item in third[1]["view"].children] == [
+        "trmnl:page:c:blog:2:p", "trmnl:page:c:blog:4:n", "trmnl:category",
+    ]
+    assert last[1]["embed"] is embeds[4]
+
+@pytest.mark.asyncio
+async def test_queued_click_edits_the_browser_message(paged_cog, interaction):
+    # Setup - one page turn per 50 ms, and this click has to wait for the next
+    paged_cog.load_rate_limits({"rate_limits": {"browse": {"scope": "user", "limit": 1, "per": 0.05}}})
+    paged_cog.load_response_queue({"rate_limit_queue": {"enabled": True, "timeout": 1.0}})
+    paged_cog.rate_limiter.reserve("browse", interaction.user.id, 1, 0.05)
+    interaction.type = discord.InteractionType.component
+    interaction.message.interaction_metadata.user = interaction.user
+    interaction.response.is_done = MagicMock(side_effect=lambda: interaction.response.defer.called)
+
+    # Execute
+    await paged_cog.show_page(interaction, "c", "blog", 1)
+
+    # Verify the message itself turned, not a new "thinking" message
+    interaction.response.defer.assert_awaited_once_with()
+    embeds = paged_cog.localized_pages["en-US"].categories["blog"]
+    assert interaction.edit_original_response.call_args[1]["embed"] is embeds[1]
+
+@pytest.mark.asyncio
+async def test_show_page_for_another_user_sends_a_copy(paged_cog, interaction):
+    # Setup - someone else's public browser message
+    paged_cog.handle_rate_limit = AsyncMock(return_value=True)
+    interaction.message.interaction_metadata.user.id = 1
+    interaction.user.id = 2
+
+    # Execute
+    await paged_cog.show_page(interaction, "c", "blog", 3)
+
+    # Verify the message is left alone
+    assert not interaction.response.edit_message.called
+    args = interaction.response.send_message.call_args[1]
+    assert args["embed"] is paged_cog.localized_pages["en-US"].categories["blog"][3]
+    assert args["ephemeral"]
+
+@pytest.mark.asyncio
+async def test_show_page_after_the_docs_dropped_it(paged_cog, interaction):
+    # Setup
+    paged_cog.handle_rate_limit = AsyncMock(return_value=True)
+
+    # Execute
+    await paged_cog.show_page(interaction, "d", "removed", 1)
+
+    # Verify
+    assert not interaction.response.edit_message.called
+    assert interaction.response.send_message.call_args[1]["content"] == "This page is no longer available."
+
+@pytest.mark.asyncio
+async def test_browse_command_opens_a_category(paged_cog, interaction):
+    # Setup
+    paged_cog.handle_rate_limit = AsyncMock(return_value=True)
+
+    # Execute
+    await paged_cog.browse.callback(paged_cog, interaction, "blog")
+    await paged_cog.browse.callback(paged_cog, interaction, "missing")
+
+    # Verify
+    blog, fallback = interaction.response.send_message.call_args_list
+    assert blog[1]["embed"] is paged_cog.localized_pages["en-US"].categories["blog"][0]
+    assert blog[1]["ephemeral"]
+    assert [option.value for option in blog[1]["view"].children[-1].item.options] == ["main", "blog", "legal", "diy"]
+    assert fallback[1]["embed"].title == "Main Resources"